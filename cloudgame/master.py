@@ -6,15 +6,17 @@ from typing import List, Dict
 import logging
 import numpy as np
 
-import clemcore.clemgame.metrics as ms
 from clemcore.clemgame import GameBenchmark, GameSpec
 from clemcore.clemgame import Player
 from clemcore.clemgame.legacy.scorer import GameScorer
 from clemcore.clemgame.legacy.master import DialogueGameMaster
 
 from clemcore.backends import Model, CustomResponseModel
-from clemcore.clemgame.metrics import METRIC_ABORTED, METRIC_SUCCESS, METRIC_LOSE, BENCH_SCORE, METRIC_REQUEST_COUNT, \
-    METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT_VIOLATED
+from clemcore.clemgame.metrics import BENCH_SCORE, METRIC_REQUEST_COUNT, METRIC_REQUEST_COUNT_PARSED, \
+    METRIC_REQUEST_COUNT_VIOLATED
+
+from shared import image_cache
+from shared.episode_scoring import EventScorer
 
 logger = logging.getLogger(__name__)
 
@@ -77,7 +79,7 @@ class Cloudgame(DialogueGameMaster):
 
     def _on_before_round(self):
         if self.current_round == 0:
-            self.set_context_for(self.speaker, self.initial_prompt, image=self.image)
+            self.set_context_for(self.speaker, self.initial_prompt, image=image_cache.prepare_all(self.image))
             self.set_context_for(self.judge, "Do you think this is correct?")
         if self.current_round == 1:
             self.set_context_for(self.speaker,
@@ -127,61 +129,47 @@ class Cloudgame(DialogueGameMaster):
             self.log_to_self(type_="aborted", value=self.aborted)
 
 
-class CloudgameScorer(GameScorer):
+class CloudgameScorer(EventScorer):
 
     def __init__(self, game_name: str, experiment: Dict, game_instance: Dict):
         super().__init__(game_name, experiment, game_instance)
-
-    def compute_scores(self, episode_interactions: Dict) -> None:
-
-        all_turn_scores = []
-        for turn_idx, turn in enumerate(episode_interactions["turns"]):
-            # player_1_message = turn[1]['action']['content']
-            score = 0
-            turn_score_dict = {"request_count": 0, "violated_request_count": 0, "parsed_request_count": 0}
-            aborted = False
-
-            for event in turn:
-                action = event["action"]
-
-                if action["type"] == "get message":
-                    turn_score_dict["request_count"] += 1
-                if action["type"] == "Valid format":
-                    turn_score_dict["parsed_request_count"] += 1
-                if action["type"] == "Invalid word count":
-                    turn_score_dict["violated_request_count"] += 1
-                    aborted = True
-                if action["type"] == "Invalid words":
-                    turn_score_dict["violated_request_count"] = 1
-                    aborted = True
-                if action["type"] == "judgement":
-                    score = action["content"]
-
-            # log turn request scores
-            self.log_turn_score(turn_idx, METRIC_REQUEST_COUNT_VIOLATED, turn_score_dict["violated_request_count"])
-            self.log_turn_score(turn_idx, METRIC_REQUEST_COUNT_PARSED, turn_score_dict["parsed_request_count"])
-            self.log_turn_score(turn_idx, METRIC_REQUEST_COUNT, turn_score_dict["request_count"])
-
-            all_turn_scores.append(turn_score_dict)
-
-        violated_request_count = sum([turn["violated_request_count"] for turn in all_turn_scores])
-        self.log_episode_score(ms.METRIC_REQUEST_COUNT_VIOLATED, violated_request_count)
-        parsed_request_count = sum([turn["parsed_request_count"] for turn in all_turn_scores])
-        self.log_episode_score(ms.METRIC_REQUEST_COUNT_PARSED, parsed_request_count)
-        request_count = sum([turn["request_count"] for turn in all_turn_scores])
-        self.log_episode_score(ms.METRIC_REQUEST_COUNT, request_count)
-
-        if aborted:
-            self.log_episode_score(METRIC_ABORTED, 1)
-            self.log_episode_score(METRIC_SUCCESS, 0)
-            self.log_episode_score(METRIC_LOSE, 0)
-            # Game-specific metrics
-            self.log_episode_score(BENCH_SCORE, np.nan)
-        else:
-            self.log_episode_score(METRIC_ABORTED, 0)
-            self.log_episode_score(METRIC_SUCCESS, 1 if score else 0)
-            self.log_episode_score(METRIC_LOSE, 0 if score else 1)
-            self.log_episode_score(BENCH_SCORE, 100)
+        # judgement and abort of the last turn
+        self.score = 0
+        self.aborted = False
+        self.event_handlers = {
+            "get message": self._on_get_message,
+            "Valid format": self._on_valid_format,
+            "Invalid word count": self._on_invalid_word_count,
+            "Invalid words": self._on_invalid_words,
+            "judgement": self._on_judgement,
+        }
+
+    def on_turn_start(self, turn_idx: int):
+        self.score = 0
+        self.aborted = False
+
+    def _on_get_message(self, event: Dict):
+        self.requests.turn[METRIC_REQUEST_COUNT] += 1
+
+    def _on_valid_format(self, event: Dict):
+        self.requests.turn[METRIC_REQUEST_COUNT_PARSED] += 1
+
+    def _on_invalid_word_count(self, event: Dict):
+        self.requests.turn[METRIC_REQUEST_COUNT_VIOLATED] += 1
+        self.aborted = True
+
+    def _on_invalid_words(self, event: Dict):
+        self.requests.turn[METRIC_REQUEST_COUNT_VIOLATED] = 1
+        self.aborted = True
+
+    def _on_judgement(self, event: Dict):
+        self.score = event["action"]["content"]
+
+    def on_episode_end(self):
+        self.log_episode_requests()
+        self.log_outcome(self.aborted, bool(self.score))
+        # Game-specific metrics
+        self.log_episode_score(BENCH_SCORE, np.nan if self.aborted else 100)
 
 
 class CloudgameBenchmark(GameBenchmark):
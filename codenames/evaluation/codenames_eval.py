@@ -36,31 +36,93 @@ display_names = {
 #   load_interactions(game_name)
 #   load_scores(game_name, results)
 
-def load_episode_scores(results_path):
-    # Get all episode scores as a pandas dataframe
-    scores = utils.load_scores(path=results_path)
-    df_episode_scores = utils.build_df_episode_scores(scores)
+SCORES_CACHE_NAME = "codenames-episode-scores"
+INDEX_COLUMNS = ['model', 'experiment', 'episode']
+
+# wide tables already loaded in this process, keyed by (results_path, cache_key)
+_loaded_tables = {}
+
+def scores_cache_key(score_files):
+    # the results directory is keyed by the latest modification of any scores file (and their number),
+    # as the mtime of the top level directory does not change when nested files are rewritten
+    latest_mtime = max((file.stat().st_mtime_ns for file in score_files), default=0)
+    return f"{latest_mtime}-{len(score_files)}"
+
+def find_score_files(results_path):
+    # results/<model(s)>/<game>/<experiment>/<episode>/scores.json
+    return sorted(Path(results_path).glob(f"*/{GAME_NAME}/*/*/scores.json"))
+
+def stream_episode_scores(score_files):
+    """
+    Read the episode scores of all given scores.json files into one columnar table.
+    Each metric is collected into its own column array, missing values are padded with NaN.
+    """
+    columns = {column: [] for column in INDEX_COLUMNS}
+    for row, score_file in enumerate(score_files):
+        episode_dir = score_file.parent
+        columns['model'].append(episode_dir.parents[2].name)
+        columns['experiment'].append(episode_dir.parent.name)
+        columns['episode'].append(episode_dir.name)
+        with open(score_file, 'r', encoding='utf-8') as file:
+            episode_scores = json.load(file)["episode scores"]
+        if METRIC_PLAYED in episode_scores:
+            raise PlayedScoreError("Computed scores should not contain METRIC_PLAYED.")
+        # the PLAYED variable is inferred from ABORTED
+        if METRIC_ABORTED in episode_scores:
+            episode_scores[METRIC_PLAYED] = 1 - episode_scores[METRIC_ABORTED]
+        for metric, value in episode_scores.items():
+            if metric not in columns:
+                columns[metric] = [np.nan] * row
+            columns[metric].append(value)
+        for column in columns.values():
+            if len(column) == row:
+                column.append(np.nan)
+    df = pd.DataFrame(columns)
+
+    # re-sorting the experiments by their number, experiments are named <number>_<name>
+    df['order_number'] = df['experiment'].str.split('_', n=1).str[0].astype(int)
+    return df
 
-    # Create the PLAYED variable, inferring it from ABORTED
-    df_played = score_amount_played(df_episode_scores)
-    
-    # We need ignore_index=True to reset the indices (otherwise we have duplicates)
-    df = pd.concat([df_episode_scores, df_played], ignore_index=True)
+def load_wide_scores(results_path):
+    """
+    Load the wide table of all codenames episode scores (one row per episode, one column per metric).
+    The table is cached as Parquet in the results directory and only rebuilt when a scores file changed.
+    """
+    score_files = find_score_files(results_path)
+    cache_key = scores_cache_key(score_files)
+    if (results_path, cache_key) in _loaded_tables:
+        return _loaded_tables[(results_path, cache_key)].copy()
+
+    cache_file = Path(results_path) / f"{SCORES_CACHE_NAME}-{cache_key}.parquet"
+    df = None
+    if cache_file.exists():
+        try:
+            df = pd.read_parquet(cache_file)
+        except ImportError:
+            pass  # no parquet engine installed, fall back to reading the scores files
+    if df is None:
+        df = stream_episode_scores(score_files)
+        try:
+            for old_cache_file in Path(results_path).glob(f"{SCORES_CACHE_NAME}-*.parquet"):
+                old_cache_file.unlink()
+            df.to_parquet(cache_file)
+        except ImportError:
+            print("Install pyarrow to cache the codenames episode scores.")
+
+    _loaded_tables[(results_path, cache_key)] = df
+    return df.copy()
 
-    # dropping all rows not concerning codenames
-    df = df[df['game'] == GAME_NAME].drop(columns=['game'])
-    df = df.set_index(['model', 'experiment', 'episode', 'metric'])
-    df = df['value'].unstack()
+def load_episode_scores(results_path):
+    # Get all episode scores as a wide pandas dataframe
+    df = load_wide_scores(results_path)
+    df = df.set_index(INDEX_COLUMNS)
 
     # setting values NaN or 0 if game was aborted
-    keep_metrics = [METRIC_ABORTED, METRIC_PLAYED, METRIC_SUCCESS, METRIC_LOSE, VARIABLE, EXPERIMENT_NAME, GAME_ENDED_THROUGH_ASSASSIN, METRIC_REQUEST_COUNT, METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT_VIOLATED, METRIC_REQUEST_SUCCESS]
+    keep_metrics = [METRIC_ABORTED, METRIC_PLAYED, METRIC_SUCCESS, METRIC_LOSE, VARIABLE, EXPERIMENT_NAME, GAME_ENDED_THROUGH_ASSASSIN, METRIC_REQUEST_COUNT, METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT_VIOLATED, METRIC_REQUEST_SUCCESS, 'order_number']
     flag_columns = [column for column in df.columns if (column.startswith('Cluegiver') or column.startswith('Guesser'))]
     keep_metrics.extend(flag_columns)
     df.loc[df[METRIC_ABORTED] == True, [column for column in df.columns if column not in keep_metrics]] = np.nan
 
-    # re-sorting the experiments by their number
-    for index, row in df.iterrows():
-        df.loc[index, 'order_number'] = int(index[1][0 : index[1].index('_')])
     df = df.reset_index()
     if 'mixed' in results_path:
         df['model'] = df['model'].apply(lambda x: f"{display_names[x.split('--')[0]]} : {display_names[x.split('--')[1]]}")
@@ -114,14 +176,6 @@ def score_clemscores(args):
     save_table(clemscores, f"{args.results_path}/experiment-results", "clemscores")
 
 
-def score_amount_played(df_episode_scores):
-    if METRIC_PLAYED in df_episode_scores['metric'].unique():
-        raise PlayedScoreError("Computed scores should not contain METRIC_PLAYED.")
-    aux = df_episode_scores[df_episode_scores["metric"] == METRIC_ABORTED].copy()
-    aux["metric"] = METRIC_PLAYED
-    aux["value"] = 1 - aux["value"]
-    return aux
-
 def make_clem_table(df: pd.DataFrame) -> pd.DataFrame:
     """Create benchmark results as a table."""
     columns = [column for column in df.columns if column in utils.MAIN_METRICS]
@@ -6,7 +6,7 @@ Creates files in ./in
 from tqdm import tqdm
 from clemcore.clemgame import GameInstanceGenerator
 import random, copy, argparse
-from typing import Set
+from typing import Dict, List
 from clemcore.utils.file_utils import file_path
 
 from codenames.constants import *
@@ -56,34 +56,86 @@ def shuffle_words_within_assignments(assignments):
         random.shuffle(assignments[alignment])
 
 
-def generate_similar_within_teams(categories, required):
+class CategoryIndex:
+    """
+    Precomputed category -> word index of a category wordlist, built once per wordlist.
+    Words are addressed by their position within a category, so that the availability of a category's words
+    can be kept as a bitset during a generation run (see CategorySampler).
+    """
+
+    def __init__(self, categories: Dict[str, List[str]]):
+        self.names = list(categories.keys())
+        self.words = [list(categories[name]) for name in self.names]
+        self.full_masks = [(1 << len(words)) - 1 for words in self.words]
+        # all (category, position) pairs a word occurs at, words can occur in several categories
+        self.occurrences = {}
+        for category, words in enumerate(self.words):
+            for position, word in enumerate(words):
+                self.occurrences.setdefault(word, []).append((category, position))
+
+    def new_run(self):
+        return CategorySampler(self)
+
+
+class CategorySampler:
+    """
+    Per-run availability bitsets over a CategoryIndex.
+    Categories and words are drawn without rejection: only available entries are ever candidates.
+    """
+
+    def __init__(self, index: CategoryIndex):
+        self.index = index
+        self.available = list(index.full_masks)
+        self.remaining = [len(words) for words in index.words]
+        self.taken_categories = []
+
+    def take_category(self, category: int):
+        self.taken_categories.append(self.index.names[category])
+        self.remaining[category] = 0
+
+    def take_word(self, word: str):
+        for category, position in self.index.occurrences.get(word, []):
+            bit = 1 << position
+            if self.available[category] & bit:
+                self.available[category] ^= bit
+                if self.remaining[category]:
+                    self.remaining[category] -= 1
+
+    def available_words(self, category: int):
+        mask = self.available[category]
+        words = self.index.words[category]
+        positions = []
+        while mask:
+            lowest = mask & -mask
+            positions.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return [words[position] for position in positions]
+
+
+def generate_similar_within_teams(categories: CategoryIndex, required):
     board = []
-    already_taken_words = []
-    already_taken_categories = []
+    sampler = categories.new_run()
     assignments = {"team": [], "opponent": [], "innocent": [], "assassin": []}
     for alignment in assignments:
         while len(assignments[alignment]) < required[alignment]:
             remaining = required[alignment] - len(assignments[alignment])
-            words = choose_instances_from_random_category(categories, already_taken_words, already_taken_categories,
-                                                          maximum=remaining)
+            words = choose_instances_from_random_category(sampler, maximum=remaining)
             assignments[alignment].extend(words)
             board.extend(words)
 
     shuffle_board(board)
     shuffle_words_within_assignments(assignments)
-    return {"board": board, "assignments": assignments, "private": {"categories": already_taken_categories}}
+    return {"board": board, "assignments": assignments, "private": {"categories": sampler.taken_categories}}
 
 
-def generate_similar_across_teams(categories, required):
+def generate_similar_across_teams(categories: CategoryIndex, required):
     total = required[TEAM] + required[OPPONENT] + required[INNOCENT] + required[ASSASSIN]
     board = []
-    already_taken_words = []
-    already_taken_categories = []
+    sampler = categories.new_run()
     assignments = {"team": [], "opponent": [], "innocent": [], "assassin": []}
     while len(board) < total:
         remaining = total - len(board)
-        words = choose_instances_from_random_category(categories, already_taken_words, already_taken_categories,
-                                                      maximum=remaining)
+        words = choose_instances_from_random_category(sampler, maximum=remaining)
         # choose random assignments to distribute words across
         i = 0
         while i < len(words):
@@ -97,18 +149,13 @@ def generate_similar_across_teams(categories, required):
         board.extend(words)
     shuffle_board(board)
     shuffle_words_within_assignments(assignments)
-    return {"board": board, "assignments": assignments, "private": {"categories": already_taken_categories}}
+    return {"board": board, "assignments": assignments, "private": {"categories": sampler.taken_categories}}
 
 
-def choose_instances_from_random_category(categories: Set, already_taken_words: Set, already_taken_categories: Set,
-                                          maximum=4):
-    # total = sum([len(categories[category]) for category in categories if category in remaining_category_names])
-    # category_probabilities = [len(categories[category])/total for category in categories if category in remaining_category_names]
-    category_name = get_random_category(categories, already_taken_categories, already_taken_words)
-    already_taken_categories.append(category_name)
-
-    category_words = categories[category_name]
-    remaining_words = [word for word in category_words if word not in already_taken_words]
+def choose_instances_from_random_category(sampler: CategorySampler, maximum=4):
+    category = get_random_category(sampler)
+    remaining_words = sampler.available_words(category)
+    sampler.take_category(category)
 
     # randomly choose 2-4 words from a category, so that not only one word slot remains
     choices = [2, 3, 4]
@@ -117,37 +164,31 @@ def choose_instances_from_random_category(categories: Set, already_taken_words:
             choices.remove(choice)
             break
     amount = random.choice(choices)
-    words = sample_words_from_category(list(remaining_words), min(amount, maximum))
-    already_taken_words.extend(words)
+    words = sample_words_from_category(remaining_words, min(amount, maximum))
+    for word in words:
+        sampler.take_word(word)
     return words
 
 
-def sample_words_from_category(category, number_of_words):
+def sample_words_from_category(category: List[str], number_of_words):
     if len(category) < number_of_words:
         raise ValueError(
             f"The category (with length {len(category)}) does not contain the required amount of words ({number_of_words})!")
     words = []
     for i in range(number_of_words):
-        word = random.choice(category)
+        word = category.pop(random.randrange(len(category)))
         words.append(word)
-        category.remove(word)
 
     return words
 
 
-def get_random_category(categories, already_taken_categories, already_taken_words):
-    # remaining_category_names = list(categories.keys() - already_taken_categories)
-    remaining_category_names = []
-    for category in categories:
-        if category in already_taken_categories:
-            continue
-        remaining_category_size = len(
-            [category_name for category_name in categories[category] if category_name not in already_taken_words])
-        remaining_category_names.extend([category for i in range(remaining_category_size)])
-
-    return random.choice(remaining_category_names)
-
-    # return np_random_generator.choice(category_list, 1, p=probabilities)
+def get_random_category(sampler: CategorySampler):
+    # categories are weighted by their number of remaining words, taken categories have a weight of 0
+    position = random.randrange(sum(sampler.remaining))
+    for category, weight in enumerate(sampler.remaining):
+        if position < weight:
+            return category
+        position -= weight
 
 
 generators = {'random': generate_random,
@@ -205,6 +246,8 @@ class CodenamesInstanceGenerator(GameInstanceGenerator):
                     print(f"> Wordlist {wordlist_name} does not exist, skip {name}.")
                     continue
                 wordlist = self.load_json(wordlist_path)["words"]
+                if isinstance(wordlist, dict):
+                    wordlist = CategoryIndex(wordlist)
 
                 print("Generating instances for experiment: ", name)
                 experiment = self.add_experiment(name)
@@ -9,7 +9,10 @@ from clemcore.clemgame.metrics import METRIC_ABORTED, METRIC_SUCCESS, METRIC_LOS
     METRIC_REQUEST_COUNT_VIOLATED, METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_SUCCESS_RATIO, BENCH_SCORE
 from clemcore.utils import file_utils, string_utils
 import math
-import re
+
+from question_checker import QuestionChecker
+from oracle import TraceEvaluator, get_oracle, parse_answer
+from shared.episode_scoring import EventScorer
 
 GAME_NAME = "guesswhat"
 
@@ -54,6 +57,7 @@ class GuessWhat(DialogueGameMaster):
         self.length_question_pattern = experiment["length_question_pattern"]
         self.syllable_question_pattern = experiment["syllable_question_pattern"]
         self.pos_question_pattern = experiment["pos_question_pattern"]
+        self.question_checker = QuestionChecker.from_experiment(experiment)
         self.incorrect_guess = False
         self.correct_guess = False
 
@@ -62,47 +66,8 @@ class GuessWhat(DialogueGameMaster):
         Checks the questions content to see if they follow the rules of the game.
         Returns a list of content errors found.
         """
-        errors = []
-
         question_text = question.replace(self.question_tag, "").strip().lower()
-        letter_based_pattern = re.compile(r'{}'.format(self.letter_based_pattern, re.IGNORECASE))
-        direct_guess_pattern = re.compile(r'{}'.format(self.direct_guess_pattern, re.IGNORECASE))
-        length_question_pattern = re.compile(r'{}'.format(self.length_question_pattern, re.IGNORECASE))
-        syllable_question_pattern = re.compile(r'{}'.format(self.syllable_question_pattern, re.IGNORECASE))
-        pos_question_pattern = re.compile(r'{}'.format(self.pos_question_pattern, re.IGNORECASE))
-
-        if letter_based_pattern.search(question_text):
-            errors.append({
-                "message": "Invalid question. Asking about specific letters or their positions is not allowed.",
-                "type": 1
-            })
-
-        direct_guess_match = direct_guess_pattern.match(question_text)
-        if direct_guess_match:
-            errors.append({
-                "message": "Invalid question. Guessing without 'GUESS:' format is not allowed.",
-                "type": 2
-            })
-
-        if length_question_pattern.search(question_text):
-            errors.append({
-                "message": "Invalid question. Asking about the length of the target word is not allowed.",
-                "type": 3
-            })
-
-        if syllable_question_pattern.search(question_text):
-            errors.append({
-                "message": "Invalid question. Asking about the number of syllables is not allowed.",
-                "type": 4
-            })
-
-        if pos_question_pattern.match(question_text):
-            errors.append({
-                "message": "Invalid question. Asking about the part of speech (POS) of the target word is not allowed.",
-                "type": 5
-            })
-
-        return errors
+        return self.question_checker.check(question_text)
 
     def _on_setup(self, **game_instance):
         self.game_instance = game_instance
@@ -232,21 +197,25 @@ class GuessWhat(DialogueGameMaster):
                 self.set_context_for(self.guesser, parsed_response)
 
 
-class GuessWhatScorer(GameScorer):
+class GuessWhatScorer(EventScorer):
 
     def __init__(self, game_name: str, experiment: Dict, game_instance: Dict):
         super().__init__(game_name, experiment, game_instance)
-
-    def compute_scores(self, episode_interactions: Dict) -> None:
-        turn_scores = []
-
-        invalid_format_guesser_count = 0
-        invalid_format_answerer_count = 0
-        invalid_content_guesser_count = 0
-        invalid_content_answerer_count = 0
-
-        guesser_won = False
-        max_turns = self.experiment["max_turns"]
+        self.event_handlers = {
+            "get message": self._on_get_message,
+            "invalid format": self._on_invalid_format,
+            "invalid content": self._on_invalid_content,
+            "correct guess": self._on_correct_guess,
+        }
+
+    def on_episode_start(self, episode_interactions: Dict):
+        self.invalid_format_guesser_count = 0
+        self.invalid_format_answerer_count = 0
+        self.invalid_content_guesser_count = 0
+        self.invalid_content_answerer_count = 0
+
+        self.guesser_won = False
+        self.max_turns = self.experiment["max_turns"]
 
         # Set lower_bound_turns based on the level to calculate speed
         game_level = self.experiment["name"]
@@ -255,70 +224,74 @@ class GuessWhatScorer(GameScorer):
         num_features_3 = 4
 
         if game_level == "Level_1" or "Abs_Level_1":
-            lower_bound_turns = num_categories_1 + 1
+            self.lower_bound_turns = num_categories_1 + 1
         elif game_level == "Level_2" or "Abs_Level_2":
-            lower_bound_turns = math.log2(max_turns) + 1
+            self.lower_bound_turns = math.log2(self.max_turns) + 1
         elif game_level == "Level_3" or "Abs_Level_3":
-            lower_bound_turns = num_features_3 + 1
-
-        for turn_idx, turn in enumerate(episode_interactions["turns"]):
-            turn_score = {"request_count": 1}
-            # Track invalid responses during this turn 
-            invalid_format_in_turn = False
-            invalid_content_in_turn = False
-
-            for event_idx, event in enumerate(turn):
-                action = event["action"]
-
-                # Handle invalid format and content per player by looking at the previous event's "from" field
-                if action["type"] == "invalid format":
-                    if event_idx - 1 >= 0:  # Check if there is a previous event
-                        previous_event = turn[event_idx - 1]
-                        if previous_event["from"] == "Player 1":  # Guesser
-                            invalid_format_guesser_count += 1
-                        elif previous_event["from"] == "Player 2":  # Answerer
-                            invalid_format_answerer_count += 1
-                    invalid_format_in_turn = True
-
-                if action["type"] == "invalid content":
-                    if event_idx - 1 >= 0:  # Check if there is a previous event
-                        previous_event = turn[event_idx - 1]
-                        if previous_event["from"] == "Player 1":  # Guesser
-                            invalid_content_guesser_count += 1
-                        elif previous_event["from"] == "Player 2":  # Answerer
-                            invalid_content_answerer_count += 1
-                    invalid_content_in_turn = True
-
-                if action["type"] == "correct guess":
-                    guesser_won = True
-
-            if invalid_format_in_turn or invalid_content_in_turn:
-                turn_score["violated_request_count"] = 1
-                turn_score["parsed_request_count"] = 0
-            else:
-                turn_score["violated_request_count"] = 0
-                turn_score["parsed_request_count"] = 1
-
-            self.log_turn_score(turn_idx, 'Accuracy', 1 if guesser_won else 0)
-            self.log_turn_score(turn_idx, METRIC_REQUEST_COUNT_VIOLATED, turn_score["violated_request_count"])
-            self.log_turn_score(turn_idx, METRIC_REQUEST_COUNT_PARSED, turn_score["parsed_request_count"])
-            self.log_turn_score(turn_idx, METRIC_REQUEST_COUNT, turn_score["request_count"])
-            turn_scores.append(turn_score)
-
+            self.lower_bound_turns = num_features_3 + 1
+
+        # follows the questions and answers to measure how well each question splits the candidates
+        self.trace_evaluator = TraceEvaluator(get_oracle(tuple(self.game_instance["candidate_list"])))
+        self.question_tag = self.experiment["question_tag"]
+        self.answer_tag = self.experiment["answer_tag"]
+        self.expected_information_gains = []
+
+    def on_turn_start(self, turn_idx: int):
+        self.requests.turn[METRIC_REQUEST_COUNT] = 1
+        # Track invalid responses during this turn
+        self.invalid_format_in_turn = False
+        self.invalid_content_in_turn = False
+        self.question = None
+        self.answer = None
+
+    def _on_get_message(self, event: Dict):
+        content = event["action"]["content"]
+        if event["from"] == "Player 1" and content.startswith(self.question_tag):
+            self.question = content[len(self.question_tag):]
+        elif event["from"] == "Player 2":
+            self.answer = parse_answer(content, self.answer_tag)
+
+    # Handle invalid format and content per player by looking at the previous event's "from" field
+    def _on_invalid_format(self, event: Dict):
+        if self.previous_event is not None:
+            if self.previous_event["from"] == "Player 1":  # Guesser
+                self.invalid_format_guesser_count += 1
+            elif self.previous_event["from"] == "Player 2":  # Answerer
+                self.invalid_format_answerer_count += 1
+        self.invalid_format_in_turn = True
+
+    def _on_invalid_content(self, event: Dict):
+        if self.previous_event is not None:
+            if self.previous_event["from"] == "Player 1":  # Guesser
+                self.invalid_content_guesser_count += 1
+            elif self.previous_event["from"] == "Player 2":  # Answerer
+                self.invalid_content_answerer_count += 1
+        self.invalid_content_in_turn = True
+
+    def _on_correct_guess(self, event: Dict):
+        self.guesser_won = True
+
+    def on_turn_end(self, turn_idx: int):
+        if self.invalid_format_in_turn or self.invalid_content_in_turn:
+            self.requests.turn[METRIC_REQUEST_COUNT_VIOLATED] = 1
+        else:
+            self.requests.turn[METRIC_REQUEST_COUNT_PARSED] = 1
+
+        self.log_turn_score(turn_idx, 'Accuracy', 1 if self.guesser_won else 0)
+        self.log_turn_requests(turn_idx)
+        if self.question is not None:
+            split = self.trace_evaluator.step(self.question, self.answer)
+            self.log_turn_score(turn_idx, "Remaining candidates", split["remaining"])
+            self.log_turn_score(turn_idx, "Expected information gain", split["expected_information_gain"])
+            self.log_turn_score(turn_idx, "Information gain", split["information_gain"])
+            if not math.isnan(split["expected_information_gain"]):
+                self.expected_information_gains.append(split["expected_information_gain"])
+
+    def on_episode_end(self):
         # Sum up turn scores
-        violated_request_count = sum(turn["violated_request_count"] for turn in turn_scores)
-        self.log_episode_score(METRIC_REQUEST_COUNT_VIOLATED, violated_request_count)
-
-        parsed_request_count = sum(turn["parsed_request_count"] for turn in turn_scores)
-        self.log_episode_score(METRIC_REQUEST_COUNT_PARSED, parsed_request_count)
-
-        request_count = sum(turn["request_count"] for turn in turn_scores)
-        self.log_episode_score(METRIC_REQUEST_COUNT, request_count)
-
-        # # Log the overall scores
-        # self.log_episode_score(METRIC_REQUEST_COUNT_VIOLATED, violated_request_count)
-        # self.log_episode_score(METRIC_REQUEST_COUNT_PARSED, parsed_request_count)
-        # self.log_episode_score(METRIC_REQUEST_COUNT, request_count)
+        self.log_episode_requests()
+        request_count = self.requests.episode[METRIC_REQUEST_COUNT]
+        parsed_request_count = self.requests.episode[METRIC_REQUEST_COUNT_PARSED]
 
         # Compute the request success ratio
         if request_count != 0:
@@ -327,24 +300,24 @@ class GuessWhatScorer(GameScorer):
             self.log_episode_score(METRIC_REQUEST_SUCCESS_RATIO, 0)
 
         # If any violation occurred, mark the game as aborted and don't compute BENCH_SCORE
-        if invalid_format_in_turn or invalid_content_in_turn:
+        if self.invalid_format_in_turn or self.invalid_content_in_turn:
             self.log_episode_score(METRIC_ABORTED, 1)
             self.log_episode_score(BENCH_SCORE, np.nan)
         else:
             # No abort, continue with normal scoring
             self.log_episode_score(METRIC_ABORTED, 0)
 
-            if guesser_won:
+            if self.guesser_won:
                 self.log_episode_score(METRIC_SUCCESS, 1)
                 self.log_episode_score(METRIC_LOSE, 0)
 
                 # The maximum speed will be reached if the guesser wins the game in the average minimum turns calculated for each level and 
                 # decreases as a consistent rate as the number of turns increases 
-                if request_count <= lower_bound_turns:
+                if request_count <= self.lower_bound_turns:
                     speed_score = 100
                     self.log_episode_score("Speed", 100)
                 else:
-                    speed_score = 100 * (max_turns - request_count) / (max_turns - lower_bound_turns)
+                    speed_score = 100 * (self.max_turns - request_count) / (self.max_turns - self.lower_bound_turns)
                 self.log_episode_score("Speed", max(0, speed_score))
 
                 bench_score = max(0, speed_score)
@@ -355,11 +328,18 @@ class GuessWhatScorer(GameScorer):
                 self.log_episode_score(METRIC_LOSE, 1)
                 self.log_episode_score(BENCH_SCORE, 0)
 
+        # Average over the questions the oracle could map to a feature of the candidates
+        if self.expected_information_gains:
+            self.log_episode_score("Average expected information gain",
+                                   sum(self.expected_information_gains) / len(self.expected_information_gains))
+        else:
+            self.log_episode_score("Average expected information gain", np.nan)
+
         # Log invalid response counts for both players
-        self.log_episode_score("Invalid format guesser response", invalid_format_guesser_count)
-        self.log_episode_score("Invalid format answerer response", invalid_format_answerer_count)
-        self.log_episode_score("Invalid content guesser response", invalid_content_guesser_count)
-        self.log_episode_score("Invalid content answerer response", invalid_content_answerer_count)
+        self.log_episode_score("Invalid format guesser response", self.invalid_format_guesser_count)
+        self.log_episode_score("Invalid format answerer response", self.invalid_format_answerer_count)
+        self.log_episode_score("Invalid content guesser response", self.invalid_content_guesser_count)
+        self.log_episode_score("Invalid content answerer response", self.invalid_content_answerer_count)
 
 
 class GuessWhatGameBenchmark(GameBenchmark):
@@ -0,0 +1,123 @@
+"""
+Offline candidate-elimination oracle for the Guess What game.
+
+The features of a candidate word are the categories and subcategories it is a member of in the datasets the
+instances were generated from (see utils/*categories_subcategories.json). For every instance the features are
+precomputed as bitsets over the candidate list, so that following a question/answer trace only needs a few
+integer operations per turn.
+"""
+import json
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+DATASET_FILES = ["categories_subcategories.json", "abstract_categories_subcategories.json"]
+
+
+def feature_phrase(name: str) -> str:
+    """Turns a category ('A bird') or a WordNet subcategory ('bird of prey.n.01') into the phrase used in questions."""
+    phrase = re.sub(r"\.[a-z]\.\d+$", "", name.strip().lower())
+    phrase = re.sub(r"^(a|an|the)\s+", "", phrase)
+    phrase = re.sub(r"[^\w\s'-]", "", phrase.replace("_", " "))
+    return " ".join(phrase.split())
+
+
+def feature_phrases(name: str) -> List[str]:
+    """The phrase of a category or subcategory, and its last word for multi-word phrases ('beverage')."""
+    phrase = feature_phrase(name)
+    words = phrase.split()
+    return [phrase, words[-1]] if len(words) > 1 else [phrase]
+
+
+@lru_cache(maxsize=None)
+def load_feature_index() -> Dict[str, frozenset]:
+    """Maps every (lower-cased) word of the datasets to the phrases of all categories and subcategories it is in."""
+    features = {}
+    for file_name in DATASET_FILES:
+        with open(os.path.join(os.path.dirname(__file__), "utils", file_name), 'r', encoding='utf-8') as f:
+            categories = json.load(f)["Categories"]
+        for category in categories:
+            category_phrases = feature_phrases(category["Category"])
+            for subcategory in category["Subcategories"]:
+                subcategory_phrases = feature_phrases(subcategory["Subcategory"])
+                for word in subcategory["Members"]:
+                    features.setdefault(word.lower(), set()).update(category_phrases + subcategory_phrases)
+    return {word: frozenset(phrases) for word, phrases in features.items()}
+
+
+def binary_entropy(p: float) -> float:
+    if p <= 0 or p >= 1:
+        return 0.
+    return -p * math.log2(p) - (1 - p) * math.log2(1 - p)
+
+
+class CandidateOracle:
+    """
+    The precomputed feature vectors of the candidates of one instance.
+    Bit i of a feature mask is set if the i-th candidate has the feature. Candidate words themselves are features
+    as well (only set for the word itself), so that questions naming a candidate directly are covered.
+    """
+
+    def __init__(self, candidate_list: List[str]):
+        self.candidates = list(candidate_list)
+        self.all_candidates = (1 << len(self.candidates)) - 1
+        feature_index = load_feature_index()
+        masks = {}
+        for idx, word in enumerate(self.candidates):
+            for phrase in feature_index.get(word.lower(), frozenset()) | {word.lower()}:
+                masks[phrase] = masks.get(phrase, 0) | (1 << idx)
+        self.feature_masks = masks
+        # longer phrases first, so that the most specific feature mentioned in a question wins
+        phrases = sorted(masks, key=lambda phrase: (-len(phrase), phrase))
+        self.pattern = re.compile(r"\b(" + "|".join(re.escape(phrase) for phrase in phrases) + r")(?:e?s)?\b")
+
+    def feature_mask(self, question: str) -> Optional[int]:
+        """Returns the mask of the feature a question asks about, or None if it refers to no known feature."""
+        matches = [match.group(1) for match in self.pattern.finditer(question.lower())]
+        if not matches:
+            return None
+        return self.feature_masks[max(matches, key=len)]
+
+    def names(self, mask: int) -> List[str]:
+        return [word for idx, word in enumerate(self.candidates) if mask >> idx & 1]
+
+
+@lru_cache(maxsize=1024)
+def get_oracle(candidate_list: Tuple[str, ...]) -> CandidateOracle:
+    return CandidateOracle(list(candidate_list))
+
+
+def parse_answer(answer: str, answer_tag: str) -> Optional[bool]:
+    answer_text = answer.replace(answer_tag, "").strip().lower()
+    if answer_text.startswith("yes"):
+        return True
+    if answer_text.startswith("no"):
+        return False
+    return None
+
+
+class TraceEvaluator:
+    """
+    Follows the questions and answers of an episode and keeps the set of remaining candidates as a bitset.
+    For each question it reports the expected information gain (in bits) with respect to a uniform belief over
+    the remaining candidates, the information actually gained by the answer and the number of remaining candidates.
+    Questions that do not refer to any known feature leave the remaining candidates untouched, their gains are NaN.
+    """
+
+    def __init__(self, oracle: CandidateOracle):
+        self.oracle = oracle
+        self.remaining = oracle.all_candidates
+
+    def step(self, question: str, answer: Optional[bool]) -> Dict:
+        before = self.remaining.bit_count()
+        mask = self.oracle.feature_mask(question)
+        if mask is None:
+            return {"remaining": before, "expected_information_gain": float("nan"), "information_gain": float("nan")}
+        expected_gain = binary_entropy((self.remaining & mask).bit_count() / before) if before else 0.
+        if answer is not None:
+            self.remaining &= mask if answer else ~mask
+        after = self.remaining.bit_count()
+        gain = math.log2(before / after) if before and after else 0.
+        return {"remaining": after, "expected_information_gain": expected_gain, "information_gain": gain}
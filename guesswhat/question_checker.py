@@ -0,0 +1,83 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# (experiment key, error type, error message, anchored) in the order the errors are reported;
+# anchored rules must match at the beginning of the question, the others may match anywhere
+QUESTION_RULES = [
+    ("letter_based_pattern", 1,
+     "Invalid question. Asking about specific letters or their positions is not allowed.", False),
+    ("direct_guess_pattern", 2,
+     "Invalid question. Guessing without 'GUESS:' format is not allowed.", True),
+    ("length_question_pattern", 3,
+     "Invalid question. Asking about the length of the target word is not allowed.", False),
+    ("syllable_question_pattern", 4,
+     "Invalid question. Asking about the number of syllables is not allowed.", False),
+    ("pos_question_pattern", 5,
+     "Invalid question. Asking about the part of speech (POS) of the target word is not allowed.", True),
+]
+
+# backreferences would point to the wrong groups once the patterns are combined
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+class QuestionChecker:
+    """
+    Checks the content of a question against the rule patterns of an experiment.
+
+    All rule patterns are compiled once into a single regular expression in which every rule is an optional
+    lookahead at the beginning of the question, so that one match call tells which rules are violated.
+    Patterns that cannot be combined are checked one after the other with their own compiled expression.
+    """
+
+    def __init__(self, patterns: Dict[str, str], flags: int = re.IGNORECASE):
+        self.rules = [(f"rule{error_type}", error_type, message, anchored, patterns[key])
+                      for key, error_type, message, anchored in QUESTION_RULES]
+        self.combined = None
+        if not any(BACKREFERENCE.search(pattern) for _, _, _, _, pattern in self.rules):
+            try:
+                self.combined = re.compile("".join(self._lookahead(name, pattern, anchored)
+                                                   for name, _, _, anchored, pattern in self.rules), flags)
+            except re.error:
+                pass
+        if self.combined is None:
+            self.compiled = [(re.compile(pattern, flags), anchored) for _, _, _, anchored, pattern in self.rules]
+
+    @staticmethod
+    def _lookahead(name: str, pattern: str, anchored: bool) -> str:
+        if anchored:
+            return f"(?=(?P<{name}>{pattern}))?"
+        # [\s\S] instead of . to reach matches after line breaks without changing . in the rule patterns
+        return rf"(?=(?:[\s\S]*?(?P<{name}>{pattern}))?)"
+
+    @classmethod
+    def from_experiment(cls, experiment: Dict) -> "QuestionChecker":
+        return get_question_checker(tuple(experiment[key] for key, _, _, _ in QUESTION_RULES))
+
+    def violations(self, question_text: str) -> List[int]:
+        """Returns the indices of all violated rules."""
+        if self.combined is not None:
+            match = self.combined.match(question_text)
+            return [idx for idx, (name, _, _, _, _) in enumerate(self.rules) if match.group(name) is not None]
+        return [idx for idx, (pattern, anchored) in enumerate(self.compiled)
+                if (pattern.match(question_text) if anchored else pattern.search(question_text))]
+
+    def check(self, question_text: str) -> List[Dict]:
+        """
+        Checks an (already stripped and lower-cased) question text.
+        Returns a list of content errors found.
+        """
+        errors = []
+        for idx in self.violations(question_text):
+            _, error_type, message, _, _ = self.rules[idx]
+            errors.append({
+                "message": message,
+                "type": error_type
+            })
+        return errors
+
+
+@lru_cache(maxsize=None)
+def get_question_checker(patterns: Tuple[str, ...]) -> QuestionChecker:
+    """Returns the (shared) checker for the given rule patterns, in the order of QUESTION_RULES."""
+    return QuestionChecker({key: pattern for (key, _, _, _), pattern in zip(QUESTION_RULES, patterns)})
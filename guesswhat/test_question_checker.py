@@ -0,0 +1,65 @@
+import json
+import os
+import re
+import unittest
+
+from guesswhat.question_checker import QuestionChecker, QUESTION_RULES
+
+
+class QuestionCheckerTestCase(unittest.TestCase):
+
+    questions = [
+        "is it a mammal?",
+        "does the target word start with the letter a?",
+        "is the second letter of the target word e?",
+        "is the target word 'table'?",
+        "is the target word \"pepsi\" ?",
+        "does the target word have more 5 letters?",
+        "does the target word contain exactly two syllables?",
+        "is the target word a noun?",
+        "is the target word a noun? does the target word have exactly 3 syllables",
+        "is it used in the kitchen and does the target word have less 4 letters?",
+    ]
+
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(__file__), "in", "instances.json"), encoding="utf-8") as f:
+            self.experiments = json.load(f)["experiments"]
+
+    def check_separately(self, experiment, question_text):
+        errors = []
+        for key, error_type, message, anchored in QUESTION_RULES:
+            pattern = re.compile(experiment[key], re.IGNORECASE)
+            if pattern.match(question_text) if anchored else pattern.search(question_text):
+                errors.append({"message": message, "type": error_type})
+        return errors
+
+    def test_combined_equals_separate_checks(self):
+        for experiment in self.experiments:
+            checker = QuestionChecker.from_experiment(experiment)
+            self.assertIsNotNone(checker.combined)
+            for question in self.questions:
+                self.assertEqual(checker.check(question), self.check_separately(experiment, question), question)
+
+    def test_checker_is_shared_per_experiment(self):
+        experiment = self.experiments[0]
+        self.assertIs(QuestionChecker.from_experiment(experiment), QuestionChecker.from_experiment(dict(experiment)))
+
+    def test_backreferences_fall_back_to_separate_checks(self):
+        patterns = {key: "^never$" for key, _, _, _ in QUESTION_RULES}
+        patterns["direct_guess_pattern"] = r"^is the target word\s*(['\"])[^'\"]+?\1\s*\?"
+        checker = QuestionChecker(patterns)
+        self.assertIsNone(checker.combined)
+        self.assertEqual([error["type"] for error in checker.check("is the target word 'table'?")], [2])
+        self.assertEqual(checker.check("is it a mammal?"), [])
+
+    def test_dot_keeps_its_meaning_across_lines(self):
+        patterns = {key: "^never$" for key, _, _, _ in QUESTION_RULES}
+        patterns["length_question_pattern"] = r"how.*letters"
+        checker = QuestionChecker(patterns)
+        self.assertIsNotNone(checker.combined)
+        self.assertEqual([error["type"] for error in checker.check("is it red?\nhow many letters?")], [3])
+        self.assertEqual(checker.check("how is it\nwith letters?"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
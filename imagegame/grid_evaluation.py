@@ -0,0 +1,258 @@
+"""
+Vectorized grid evaluation of imagegame.
+
+A grid is parsed once into an array of its (lowercased) cells, rows padded where they are shorter than the longest
+row, and masks of its cells and of its empty cells; precision, recall, F1 and the number of changed cells are counted
+with NumPy. The results are cached per (target, generated) and (previous, current) pair, and `prime_results_dir`
+computes them for all turns of all episodes of a results directory at once (stacking the grids of the same shape), so
+that the scorers only look them up. All caches are bounded.
+
+The scores are the same as in the original row-by-row evaluation, including its failures: `evaluate` and
+`calculate_flipped_pixels` raise where it raised (a generated grid with too few cells, a grid without filled cells).
+"""
+import glob
+import json
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+EMPTY_CELL = '▢'
+EMPTY_GRID = '▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢'
+# number of parsed grids kept
+GRID_CACHE_SIZE = 4096
+# number of evaluated grid pairs kept
+RESULT_CACHE_SIZE = 200000
+
+Scores = Tuple[float, float, float]
+
+
+class ParsedGrid:
+    """
+    Args:
+        cells: the lowercased cells (n_rows x longest row), padded where a row has fewer cells
+        present: True where a row has a cell
+        empty: True for the empty cells
+        row_lengths: number of cells of every row
+    """
+
+    __slots__ = ("cells", "present", "empty", "row_lengths", "size", "regular")
+
+    def __init__(self, cells: np.ndarray, present: np.ndarray, empty: np.ndarray, row_lengths: List[int]):
+        self.cells = cells
+        self.present = present
+        self.empty = empty
+        self.row_lengths = np.array(row_lengths)
+        # number of rows and number of cells of the first row (see evaluator.get_size)
+        self.size = (len(row_lengths), row_lengths[0])
+        # all rows have the same number of cells
+        self.regular = len(set(row_lengths)) == 1
+
+
+@lru_cache(maxsize=GRID_CACHE_SIZE)
+def parse_grid(grid: str) -> ParsedGrid:
+    rows = [row.split(' ') for row in grid.strip().split('\n')]
+    width = max(len(row) for row in rows)
+    cells = np.array([[cell.lower() for cell in row] + [""] * (width - len(row)) for row in rows], dtype=str)
+    present = np.zeros((len(rows), width), dtype=bool)
+    empty = np.zeros((len(rows), width), dtype=bool)
+    for r_index, row in enumerate(rows):
+        present[r_index, :len(row)] = True
+        empty[r_index, :len(row)] = [cell == EMPTY_CELL for cell in row]
+    return ParsedGrid(cells, present, empty, [len(row) for row in rows])
+
+
+def _aligned(reference: ParsedGrid, other: ParsedGrid) -> Tuple[np.ndarray, np.ndarray]:
+    """The cells and empty mask of other at the positions of the cells of reference (which other must all have)."""
+    n_rows, width = reference.cells.shape
+    if len(other.row_lengths) < n_rows or (other.row_lengths[:n_rows] < reference.row_lengths).any():
+        raise ValueError("The grid has fewer cells than the grid it is compared to")
+    return other.cells[:n_rows, :width], other.empty[:n_rows, :width]
+
+
+def scores_from_counts(recall_counter: int, total_recall_counter: int, precision_counter: int,
+                       total_precision_counter: int) -> Scores:
+    recall = round(recall_counter / float(total_recall_counter), 4)
+    precision = round(precision_counter / float(total_precision_counter), 4)
+
+    if precision == 0 or recall == 0:
+        f1 = 0
+    else:
+        f1 = (2 * precision * recall) / (precision + recall)
+    f1 = round(f1, 4)
+
+    return round(100 * precision, 0), round(100 * recall, 0), round(100 * f1, 0)
+
+
+def _count_matches(target: ParsedGrid, generated: ParsedGrid) -> Tuple[int, int, int, int]:
+    generated_cells, generated_empty = _aligned(target, generated)
+    same = generated_cells == target.cells
+    target_filled = target.present & ~target.empty
+    generated_filled = target.present & ~generated_empty
+    return (int((same & target_filled).sum()), int(target_filled.sum()),
+            int((same & generated_filled).sum()), int(generated_filled.sum()))
+
+
+def _count_flips(previous: ParsedGrid, current: ParsedGrid) -> int:
+    current_cells, _ = _aligned(previous, current)
+    return int(((current_cells != previous.cells) & previous.present).sum())
+
+
+_evaluations: "OrderedDict[Tuple[str, str], Scores]" = OrderedDict()
+_flips: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+
+
+def _remember(cache: OrderedDict, key, value):
+    cache[key] = value
+    if len(cache) > RESULT_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def evaluate(target: str, generated: str) -> Scores:
+    """Precision, recall and F1 (in percent) of the filled cells of the generated grid."""
+    key = (target, generated)
+    if key in _evaluations:
+        return _evaluations[key]
+    target_grid, generated_grid = parse_grid(target), parse_grid(generated)
+    if target_grid.size != generated_grid.size:
+        scores = (0.0, 0.0, 0.0)
+    else:
+        scores = scores_from_counts(*_count_matches(target_grid, generated_grid))
+    _remember(_evaluations, key, scores)
+    return scores
+
+
+def calculate_flipped_pixels(previous: str, current: str) -> int:
+    """Number of cells of the previous grid that are different in the current one."""
+    key = (previous, current)
+    if key not in _flips:
+        _remember(_flips, key, _count_flips(parse_grid(previous), parse_grid(current)))
+    return _flips[key]
+
+
+def _stacked_pairs(pairs: List[Tuple[str, str]]):
+    """
+    Parses the distinct grids of the pairs and stacks the pairs of regular grids of the same shape.
+
+    Returns:
+        the parsed first and second grid of every pair (None if it is no grid), and for every shape the indices of its
+        pairs and the stacked cells and empty masks of their first and second grids (n_pairs x rows x columns)
+    """
+    parsed: Dict[str, Optional[ParsedGrid]] = {}
+    for pair in pairs:
+        for grid in pair:
+            if grid not in parsed:
+                try:
+                    parsed[grid] = parse_grid(grid)
+                except AttributeError:  # no grid
+                    parsed[grid] = None
+    # distinct regular grids per shape, with their position in the stack of the shape
+    shapes: Dict[Tuple[int, int], Dict[str, int]] = {}
+    for grid, parsed_grid in parsed.items():
+        if parsed_grid is not None and parsed_grid.regular:
+            stack = shapes.setdefault(parsed_grid.cells.shape, {})
+            stack[grid] = len(stack)
+    parsed_pairs = [(parsed[first], parsed[second]) for first, second in pairs]
+    stacked = {}
+    for shape, stack in shapes.items():
+        indices = [index for index, (first, second) in enumerate(pairs) if first in stack and second in stack]
+        if not indices:
+            continue
+        cells = np.stack([parsed[grid].cells for grid in stack])
+        empty = np.stack([parsed[grid].empty for grid in stack])
+        first_ids = np.array([stack[pairs[index][0]] for index in indices])
+        second_ids = np.array([stack[pairs[index][1]] for index in indices])
+        stacked[shape] = (indices, cells[first_ids], empty[first_ids], cells[second_ids], empty[second_ids])
+    return parsed_pairs, stacked
+
+
+def evaluate_batch(pairs: Iterable[Tuple[str, str]]) -> List[Optional[Scores]]:
+    """Evaluates (target, generated) pairs; None for the pairs that evaluate raises for."""
+    pairs = list(pairs)
+    parsed_pairs, stacked = _stacked_pairs(pairs)
+    counts: List[Optional[tuple]] = [None] * len(pairs)
+    for indices, targets, target_empty, generated, generated_empty in stacked.values():
+        same = generated == targets
+        group_counts = np.stack([(same & ~target_empty).sum(axis=(1, 2)), (~target_empty).sum(axis=(1, 2)),
+                                 (same & ~generated_empty).sum(axis=(1, 2)), (~generated_empty).sum(axis=(1, 2))],
+                                axis=1)
+        for index, pair_counts in zip(indices, group_counts.tolist()):
+            counts[index] = tuple(pair_counts)
+    results: List[Optional[Scores]] = [None] * len(pairs)
+    for index, (target_grid, generated_grid) in enumerate(parsed_pairs):
+        if target_grid is None or generated_grid is None:
+            continue
+        try:
+            if target_grid.size != generated_grid.size:
+                results[index] = (0.0, 0.0, 0.0)
+            else:
+                results[index] = scores_from_counts(*(counts[index] or _count_matches(target_grid, generated_grid)))
+        except (ValueError, ZeroDivisionError):
+            continue
+        _remember(_evaluations, pairs[index], results[index])
+    return results
+
+
+def flipped_pixels_batch(pairs: Iterable[Tuple[str, str]]) -> List[Optional[int]]:
+    """Counts the changed cells of (previous, current) pairs; None for the pairs calculate_flipped_pixels raises for."""
+    pairs = list(pairs)
+    parsed_pairs, stacked = _stacked_pairs(pairs)
+    results: List[Optional[int]] = [None] * len(pairs)
+    for indices, previous, _, current, _ in stacked.values():
+        for index, count in zip(indices, (previous != current).sum(axis=(1, 2)).tolist()):
+            results[index] = count
+    for index, (previous_grid, current_grid) in enumerate(parsed_pairs):
+        if results[index] is None and previous_grid is not None and current_grid is not None:
+            try:
+                results[index] = _count_flips(previous_grid, current_grid)
+            except ValueError:
+                continue
+        if results[index] is not None:
+            _remember(_flips, pairs[index], results[index])
+    return results
+
+
+def episode_grid_pairs(target: str, episode_interactions: Dict) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+    """The (target, generated) and (previous, current) pairs of the grids drawn in an episode."""
+    evaluations, flips = [], []
+    previous = EMPTY_GRID
+    for turn in episode_interactions["turns"]:
+        for event in turn:
+            if event['action']['type'] == 'found grid':
+                current = event['action']['content']
+                evaluations.append((target, current))
+                flips.append((previous, current))
+                previous = current
+    return evaluations, flips
+
+
+def prime_results_dir(results_dir: str, game_name: str = "imagegame") -> int:
+    """
+    Evaluates the grids of all episodes of the game in a results directory together, so that scoring them only
+    looks the results up.
+
+    Returns:
+        the number of episodes read
+    """
+    evaluations, flips = [], []
+    n_episodes = 0
+    for interaction_file in glob.glob(os.path.join(results_dir, '**', 'interactions.json'), recursive=True):
+        if game_name not in Path(interaction_file).parts:
+            continue
+        try:
+            with open(interaction_file, encoding="utf-8") as f:
+                interactions = json.load(f)
+            with open(os.path.join(os.path.dirname(interaction_file), "instance.json"), encoding="utf-8") as f:
+                target = json.load(f)["target_grid"]
+        except (OSError, ValueError, KeyError):  # the scorer reports broken episodes
+            continue
+        episode_evaluations, episode_flips = episode_grid_pairs(target, interactions)
+        evaluations += episode_evaluations
+        flips += episode_flips
+        n_episodes += 1
+    evaluate_batch(dict.fromkeys(evaluations))
+    flipped_pixels_batch(dict.fromkeys(flips))
+    return n_episodes
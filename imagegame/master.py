@@ -5,11 +5,13 @@ from clemcore.backends import Model
 from clemcore.clemgame import GameMaster, GameBenchmark, metrics, Player, GameSpec
 from clemcore.clemgame.legacy.master import DialogueGameMaster
 from clemcore.clemgame.legacy.scorer import GameScorer
-from evaluator import evaluate, calculate_flipped_pixels
+from grid_evaluation import EMPTY_GRID, evaluate, calculate_flipped_pixels, prime_results_dir
 
 import re
 import math
 
+from shared.response_patterns import ResponseMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -59,6 +61,7 @@ class ImageGameMaster(DialogueGameMaster):
 
         self.game_instance = game_instance
         self.game = ImageGame(self.game_instance)
+        self.response_matcher = ResponseMatcher()
         self.instruction_giver = InstructionGiver(self.player_models[0],
                                                   name="Player 1",
                                                   game_role="Instruction Giver")
@@ -81,11 +84,11 @@ class ImageGameMaster(DialogueGameMaster):
             True, if the response is fine. Otherwise, False.
         """
         if player == self.instruction_giver:
-            match = re.compile(self.game.player_1_terminate_pattern, re.IGNORECASE).match(response)
+            match = self.response_matcher.match(self.game.player_1_terminate_pattern, response, re.IGNORECASE)
             if match:
                 return True
             else:
-                match = re.compile(self.game.player_1_response_pattern, re.IGNORECASE).match(response)
+                match = self.response_matcher.match(self.game.player_1_response_pattern, response, re.IGNORECASE)
                 if match:
                     return True
                 else:
@@ -93,7 +96,7 @@ class ImageGameMaster(DialogueGameMaster):
                     self.log_to_self("invalid format", "Invalid instruction format")
                     return False
         else:
-            match = re.compile(self.game.player_2_response_pattern).match(response)
+            match = self.response_matcher.match(self.game.player_2_response_pattern, response)
             if match:
                 return True
             else:
@@ -111,13 +114,13 @@ class ImageGameMaster(DialogueGameMaster):
             The parsed response
         """
         if player == self.instruction_giver:
-            match = re.compile(self.game.player_1_terminate_pattern, re.IGNORECASE).match(response)
+            match = self.response_matcher.match(self.game.player_1_terminate_pattern, response, re.IGNORECASE)
             if match:
                 self.game.terminate = True
                 self.log_to_self("found terminate pattern", response)
                 return None
             # check if the Player 1 message follows the rule => start with "Instruction:"
-            match = re.compile(self.game.player_1_response_pattern, re.IGNORECASE).match(response)
+            match = self.response_matcher.match(self.game.player_1_response_pattern, response, re.IGNORECASE)
             if match:
                 if '\n' in response:
                     parsed_instruction = response.split('\n')[0]
@@ -126,7 +129,7 @@ class ImageGameMaster(DialogueGameMaster):
                 self.log_to_self("found instruction", parsed_instruction)
                 return parsed_instruction
         elif player == self.instruction_follower:
-            match = re.compile(self.game.player_2_response_pattern).match(response)
+            match = self.response_matcher.match(self.game.player_2_response_pattern, response)
             if match:
                 self.log_to_self("found grid", response)
                 return response
@@ -173,7 +176,7 @@ class ImageGameScorer(GameScorer):
 
         precision, recall, f1 = 0, 0, 0
 
-        previous_turn_grid = '▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢\n▢ ▢ ▢ ▢ ▢'
+        previous_turn_grid = EMPTY_GRID
         flipped_count_sum = 0
         expression_length_sum = 0
         expression_number_of_tokens = 0
@@ -337,3 +340,8 @@ class ImageGameBenchmark(GameBenchmark):
 
     def create_game_scorer(self, experiment: Dict, game_instance: Dict) -> GameScorer:
         return ImageGameScorer(self.game_name, experiment, game_instance)
+
+    def compute_scores(self, results_dir: str):
+        # evaluate the grids of all episodes together, the scorers then only look the results up
+        prime_results_dir(results_dir, self.game_name)
+        super().compute_scores(results_dir)
@@ -10,6 +10,8 @@ import numpy as np
 import os
 import logging
 
+from shared.episode_scoring import EventScorer
+
 logger = logging.getLogger(__name__)
 
 
@@ -230,91 +232,56 @@ class MatchIt(DialogueGameMaster):
         return True
 
 
-class MatchItScorer(GameScorer):
+class MatchItScorer(EventScorer):
 
     def __init__(self, game_name: str, experiment: Dict, game_instance: Dict):
         super().__init__(game_name, experiment, game_instance)
-
-    def compute_scores(self, episode_interactions: Dict) -> None:
-
-        all_turn_scores = []
-        success_a = False
-        success_b = False
-        aborted = False
-        for turn_idx, turn in enumerate(episode_interactions["turns"]):
-            turn_score_dict = {"request_count": 0, "violated_request_count": 0, "parsed_request_count": 0}
-
-            for event in turn:
-                action = event["action"]
-                # parsed requests
-                if action["type"] == "invalid format":
-                    turn_score_dict["violated_request_count"] += 1
-                    turn_score_dict["request_count"] += 1
-                    # first_word = action["content"].split(" ")[-1]
-                    # with open("first_words.txt", "a") as myfile:
-                    #    myfile.write(first_word + "\n")
-                elif action["type"] == "invalid content":
-                    turn_score_dict["violated_request_count"] += 1
-                    turn_score_dict["request_count"] += 1
-                elif action["type"] == "valid format":
-                    turn_score_dict["parsed_request_count"] += 1
-                    turn_score_dict["request_count"] += 1
-                elif action["content"].startswith("Abort"):
-                    aborted = True
-                # decision success
-                elif action["type"] == "Decision Player A":
-                    if action["content"] == "success":
-                        success_a = True
-                elif action["type"] == "Decision Player B":
-                    if action["content"] == "success":
-                        success_b = True
-
-            # log turn request scores   
-            self.log_turn_score(turn_idx, ms.METRIC_REQUEST_COUNT_VIOLATED, turn_score_dict["violated_request_count"])
-            self.log_turn_score(turn_idx, ms.METRIC_REQUEST_COUNT_PARSED, turn_score_dict["parsed_request_count"])
-            self.log_turn_score(turn_idx, ms.METRIC_REQUEST_COUNT, turn_score_dict["request_count"])
-            # calculate episode scores from turn scores
-            all_turn_scores.append(turn_score_dict)
-
-            violated_request_count = sum([turn["violated_request_count"] for turn in all_turn_scores])
-            self.log_episode_score(ms.METRIC_REQUEST_COUNT_VIOLATED, violated_request_count)
-            parsed_request_count = sum([turn["parsed_request_count"] for turn in all_turn_scores])
-            self.log_episode_score(ms.METRIC_REQUEST_COUNT_PARSED, parsed_request_count)
-            request_count = sum([turn["request_count"] for turn in all_turn_scores])
-            self.log_episode_score(ms.METRIC_REQUEST_COUNT, request_count)
-            # log episode "success" scores
-            if aborted:
-                self.log_episode_score(ms.METRIC_ABORTED, 1)
-                self.log_episode_score(ms.METRIC_SUCCESS, 0)
-                self.log_episode_score(ms.METRIC_LOSE, 0)
-                # Game-specific metrics
-                self.log_episode_score(ms.BENCH_SCORE, np.nan)  # metric not applicable
-                self.log_episode_score("Player Score", np.nan)
-            else:
-                # two wrong decisions:
-                if not success_a and not success_b:
-                    self.log_episode_score(ms.METRIC_ABORTED, 0)
-                    self.log_episode_score(ms.METRIC_SUCCESS, 0)
-                    self.log_episode_score(ms.METRIC_LOSE, 1)
-                    # Game-specific metrics
-                    self.log_episode_score(ms.BENCH_SCORE, 0)
-                    self.log_episode_score("Player Score", 0)
-                # only one decided correctly
-                elif success_a != success_b:
-                    self.log_episode_score(ms.METRIC_ABORTED, 0)
-                    self.log_episode_score(ms.METRIC_SUCCESS, 0)
-                    self.log_episode_score(ms.METRIC_LOSE, 1)
-                    # Game-specific metrics
-                    self.log_episode_score(ms.BENCH_SCORE, 0)  # current decision, may change (before: 50)
-                    self.log_episode_score("Player Score", 50)
-
-                else:  # = success_a and success_b:
-                    self.log_episode_score(ms.METRIC_ABORTED, 0)
-                    self.log_episode_score(ms.METRIC_SUCCESS, 1)
-                    self.log_episode_score(ms.METRIC_LOSE, 0)
-                    # Game-specific metrics
-                    self.log_episode_score(ms.BENCH_SCORE, 100)
-                    self.log_episode_score("Player Score", 100)
+        self.success_a = False
+        self.success_b = False
+        self.aborted = False
+        self.event_handlers = {
+            "invalid format": self._on_violated_request,
+            "invalid content": self._on_violated_request,
+            "valid format": self._on_parsed_request,
+        }
+
+    def _on_violated_request(self, event: Dict):
+        self.requests.violated()
+
+    def _on_parsed_request(self, event: Dict):
+        self.requests.parsed()
+
+    def on_other_event(self, event: Dict):
+        action = event["action"]
+        if action["content"].startswith("Abort"):
+            self.aborted = True
+        # decision success
+        elif action["type"] == "Decision Player A":
+            if action["content"] == "success":
+                self.success_a = True
+        elif action["type"] == "Decision Player B":
+            if action["content"] == "success":
+                self.success_b = True
+
+    def on_episode_end(self):
+        self.log_episode_requests()
+        # log episode "success" scores
+        self.log_outcome(self.aborted, self.success_a and self.success_b)
+        if self.aborted:
+            # Game-specific metrics
+            self.log_episode_score(ms.BENCH_SCORE, np.nan)  # metric not applicable
+            self.log_episode_score("Player Score", np.nan)
+        # two wrong decisions:
+        elif not self.success_a and not self.success_b:
+            self.log_episode_score(ms.BENCH_SCORE, 0)
+            self.log_episode_score("Player Score", 0)
+        # only one decided correctly
+        elif self.success_a != self.success_b:
+            self.log_episode_score(ms.BENCH_SCORE, 0)  # current decision, may change (before: 50)
+            self.log_episode_score("Player Score", 50)
+        else:  # = success_a and success_b:
+            self.log_episode_score(ms.BENCH_SCORE, 100)
+            self.log_episode_score("Player Score", 100)
 
 
 class MatchItBenchmark(GameBenchmark):
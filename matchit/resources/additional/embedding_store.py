@@ -0,0 +1,129 @@
+"""
+Store of the CLIP image embeddings used to score the matchit image pairs.
+
+Images are encoded in batches (torch DataLoader, works on CPU). The embeddings are L2-normalized and kept as rows of a
+memory-mapped float16 matrix on disk, with the image id of every row next to it; images that are already in the store
+are never encoded again, new ones are appended. The cosine similarities of many pairs are then one matrix product.
+"""
+import os
+from typing import Dict, Hashable, Iterable, List, Sequence
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import DataLoader, Dataset
+
+BATCH_SIZE = 64
+# number of rows copied at once when the matrix grows
+COPY_BLOCK_SIZE = 65536
+
+
+class ImageFileDataset(Dataset):
+    def __init__(self, image_files: Sequence[str], transform):
+        self.image_files = image_files
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.image_files)
+
+    def __getitem__(self, idx):
+        return self.transform(Image.open(self.image_files[idx]))
+
+
+def encode_images(model, preprocess, image_files: Sequence[str], device: str = "cpu", batch_size: int = BATCH_SIZE,
+                  num_workers: int = 0) -> np.ndarray:
+    """
+    Args:
+        model: the CLIP model
+        preprocess: its image transform
+        image_files: the paths of the images
+    Returns:
+        the L2-normalized embeddings of the images (n_images x dim, float32)
+    """
+    loader = DataLoader(ImageFileDataset(image_files, preprocess), batch_size=batch_size, num_workers=num_workers)
+    embeddings = []
+    with torch.no_grad():
+        for batch in loader:
+            features = model.encode_image(batch.to(device)).float()
+            embeddings.append(torch.nn.functional.normalize(features, dim=-1).cpu().numpy())
+    return np.concatenate(embeddings)
+
+
+class EmbeddingStore:
+    """
+    Embeddings keyed by image id, in <path>.npy (n_images x dim, float16, memory-mapped) and <path>.ids.npy.
+
+    Args:
+        path: path of the store without extension
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows: Dict[Hashable, int] = {}
+        self.vectors = None
+        if os.path.isfile(self._vectors_file):
+            self.vectors = np.load(self._vectors_file, mmap_mode="r")
+            self.rows = {image_id: row for row, image_id in enumerate(np.load(self._ids_file).tolist())}
+
+    @property
+    def _vectors_file(self) -> str:
+        return f"{self.path}.npy"
+
+    @property
+    def _ids_file(self) -> str:
+        return f"{self.path}.ids.npy"
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, image_id: Hashable) -> bool:
+        return image_id in self.rows
+
+    def add(self, image_ids: List[Hashable], vectors: np.ndarray):
+        """Appends the embeddings of new images (their ids must not be in the store yet)."""
+        if not image_ids:
+            return
+        n_old = len(self.rows)
+        # write to temporary files first, so that the store is always complete
+        tmp_file = f"{self.path}.{os.getpid()}.tmp.npy"
+        matrix = np.lib.format.open_memmap(tmp_file, mode="w+", dtype=np.float16,
+                                           shape=(n_old + len(image_ids), vectors.shape[1]))
+        for start in range(0, n_old, COPY_BLOCK_SIZE):
+            end = min(start + COPY_BLOCK_SIZE, n_old)
+            matrix[start:end] = self.vectors[start:end]
+        matrix[n_old:] = vectors
+        matrix.flush()
+        del matrix
+        ids = list(self.rows) + list(image_ids)
+        tmp_ids_file = f"{self.path}.{os.getpid()}.tmp.ids.npy"
+        np.save(tmp_ids_file, np.array(ids))
+        self.vectors = None
+        os.replace(tmp_file, self._vectors_file)
+        os.replace(tmp_ids_file, self._ids_file)
+        self.vectors = np.load(self._vectors_file, mmap_mode="r")
+        self.rows = {image_id: row for row, image_id in enumerate(ids)}
+
+    def add_images(self, model, preprocess, image_files: Dict[Hashable, str], **encode_args) -> int:
+        """
+        Encodes and adds the images that are not in the store yet.
+
+        Args:
+            image_files: image file per image id
+            encode_args: see encode_images
+        Returns:
+            the number of encoded images
+        """
+        new_ids = [image_id for image_id in image_files if image_id not in self.rows]
+        if new_ids:
+            self.add(new_ids, encode_images(model, preprocess, [image_files[image_id] for image_id in new_ids],
+                                            **encode_args))
+        return len(new_ids)
+
+    def cosine_similarities(self, first_ids: Iterable[Hashable], second_ids: Iterable[Hashable]) -> np.ndarray:
+        """Cosine similarity of every pair (first_ids[i], second_ids[i])."""
+        first_ids, second_ids = list(first_ids), list(second_ids)
+        pair_ids = list(dict.fromkeys(first_ids + second_ids))
+        index = {image_id: i for i, image_id in enumerate(pair_ids)}
+        embeddings = self.vectors[[self.rows[image_id] for image_id in pair_ids]].astype(np.float32)
+        similarities = embeddings @ embeddings.T
+        return similarities[[index[image_id] for image_id in first_ids], [index[image_id] for image_id in second_ids]]
@@ -12,48 +12,34 @@ import requests
 import pathlib
 
 import os
-import glob
-from torch.utils.data import Dataset
 import clip
 import torch
-from PIL import Image
+
+import minhash
+from embedding_store import EmbeddingStore, BATCH_SIZE
 
 
 def filename_from_url(url):
     pattern = r'\d+.jpg'
     return re.findall(pattern,url)[-1]
 
-class ImageDataset(Dataset):
-    def __init__(self, img_dir, transform=None):
-        self.img_dir = img_dir
-        self.image_file_names = glob.glob(os.path.join(img_dir, "*.jpg"))
-        self.transform = transform
-        #self.img_labels = pd.read_csv(annotations_file)
-
-    def __len__(self):
-        return len(self.image_file_names)
-
-    def __getitem__(self, idx):
-        image_file_name = self.image_file_names[idx]
-        image = Image.open(image_file_name)
-        if self.transform:
-            image = self.transform(image)
-        return image
-
-def from_image_to_vector(x, process_fn):
-    with torch.no_grad():
-        image_features = model.encode_image(process_fn(x).unsqueeze(0))    
-    return image_features
-
-def cosine_function(x,y):
-    return torch.nn.functional.cosine_similarity(embedding_dict[x], embedding_dict[y]).item()
-
 
 if __name__ == '__main__':
     
     parser = argparse.ArgumentParser()
     parser.add_argument("--sample", "-k", help="Process k images from Visual Genome.", type=int)
     parser.add_argument("--nlargest","-n",help = "Take n pairs with top jaccard-indices.",  type=int)
+    parser.add_argument("--lsh-threshold", help="Find the pairs with a Jaccard index of at least this with MinHash-LSH "
+                                                "instead of comparing all pairs.", type=float)
+    parser.add_argument("--num-perm", help="Number of MinHash permutations (LSH mode).", type=int,
+                        default=minhash.NUM_PERM)
+    parser.add_argument("--candidates", help="Number of most similar pairs kept before dropping repeated pictures "
+                                             "(LSH mode, default: 20 n).", type=int)
+    parser.add_argument("--signatures", help="File the MinHash signatures are stored in and reused from (LSH mode).",
+                        default="minhash_signatures.npz")
+    parser.add_argument("--embeddings", help="Store of the CLIP embeddings of the pictures, reused by later runs.",
+                        default="clip_embeddings")
+    parser.add_argument("--batch-size", help="Number of pictures encoded at once.", type=int, default=BATCH_SIZE)
     args = parser.parse_args()
 
     n = args.nlargest
@@ -109,8 +95,15 @@ if __name__ == '__main__':
     contlist = list(img_conts.items())
     newlist = [set(y) for (_,y) in contlist]
     print("calculating jaccard similarities")
-    setsimlist = list(all_pairs(newlist, similarity_func_name="jaccard", 
-            similarity_threshold= 0))
+    if args.lsh_threshold is None:
+        setsimlist = list(all_pairs(newlist, similarity_func_name="jaccard", 
+                similarity_threshold= 0))
+    else:
+        # only the candidate pairs of MinHash-LSH are compared, and only the most similar of them are kept
+        signatures = minhash.cached_signatures({image_id: set(conts) for (image_id, conts) in contlist},
+                                               args.signatures, num_perm=args.num_perm)
+        setsimlist = minhash.top_pairs(minhash.similar_pairs(newlist, signatures, args.lsh_threshold),
+                                       args.candidates or 20 * n)
 
     print("Jaccards indices are calculated.")
 
@@ -121,7 +114,8 @@ if __name__ == '__main__':
     big_df["jac_ind"] = big_df["jac_ind"].round(4)
   
 
-    big_df.to_csv(str(args.sample)+"_pics_sample_jaccards.zip", columns = ["id1", "id2", "jac_ind"], index = False, encoding = "utf-8")
+    if args.lsh_threshold is None:
+        big_df.to_csv(str(args.sample)+"_pics_sample_jaccards.zip", columns = ["id1", "id2", "jac_ind"], index = False, encoding = "utf-8")
     
     #adding urls later because I don't need to save them
     big_df["url1"] = [url_lookup[i] for i in big_df.id1]
@@ -139,41 +133,34 @@ if __name__ == '__main__':
     n_largest.to_csv(str(n)+"_largest.csv")
 
 
-    urls = set(n_largest.url1).union(set(n_largest.url2))
-    # downloading n pictures into pictures folder -> make sure that empty before, or check whether this would be a problem
-    for url in tqdm(urls, desc ="downloading pictures"):
-        img_data = requests.get(url).content
-        with open(dir_name + '/' + filename_from_url(url), 'wb') as handler:
-            handler.write(img_data)
+    image_urls = dict(zip(n_largest.id1, n_largest.url1))
+    image_urls.update(zip(n_largest.id2, n_largest.url2))
+    store = EmbeddingStore(args.embeddings)
+    # downloading the pictures that are not encoded yet into pictures folder
+    image_files = {}
+    for image_id, url in tqdm(image_urls.items(), desc ="downloading pictures"):
+        if image_id in store:
+            continue
+        image_files[image_id] = dir_name + '/' + filename_from_url(url)
+        if not os.path.isfile(image_files[image_id]):
+            img_data = requests.get(url).content
+            with open(image_files[image_id], 'wb') as handler:
+                handler.write(img_data)
 
 
     ######################## CLIP
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model, preprocess = clip.load("ViT-B/32", device=device)
-
-    # image_dataset = ImageDataset(img_dir=os.environ["IMG_DIR"], transform=preprocess)
-    # next(iter(image_dataset)).shape
-
-    print("making image dataset")
-
-    image_dataset = ImageDataset(
-        img_dir=os.environ["IMG_DIR"], 
-        transform=lambda x: from_image_to_vector(x, process_fn=preprocess)
-    )
-
-    embedding_dict = {}
-
-    picturenames = [f for f in os.listdir(os.environ["IMG_DIR"]) if not f.startswith('.')]          ### hier wäre es echt gut, wenn vor dem Bilderdownload sichergegangen wird, dass in dem Ordner sonst goanix ist!
+    if image_files:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model, preprocess = clip.load("ViT-B/32", device=device)
 
-    print("Making embedding dict")
-    for i in range(len(picturenames)):
-        embedding_dict[int(picturenames[i].split(sep=".")[0])]=image_dataset.__getitem__(i)
+        print("Encoding %d new pictures" % len(image_files))
+        store.add_images(model, preprocess, image_files, device=device, batch_size=args.batch_size)
 
     print("Calculating clip score.")
 
-    n_largest['clipscore'] = n_largest.apply(lambda x: cosine_function(x.id1, x.id2), axis=1)
+    n_largest['clipscore'] = store.cosine_similarities(n_largest.id1, n_largest.id2)
 
     n_largest.to_csv(str(n)+"_largest_clipscore.csv")
 
-    print("Done.")
\ No newline at end of file
+    print("Done.")
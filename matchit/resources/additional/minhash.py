@@ -0,0 +1,137 @@
+"""
+MinHash-LSH search for similar image annotation sets (approximate alternative to SetSimilaritySearch.all_pairs).
+
+Every set is summarized by a MinHash signature (the minimum of num_perm hash functions over its tokens); sets whose
+signatures agree on all rows of at least one band become candidate pairs, and only those are compared exactly. The
+bands are chosen so that pairs at the Jaccard threshold are likely to collide, pairs far below it are not.
+Signatures only depend on the tokens of an image, so they are stored per image id and reused by later runs.
+"""
+import heapq
+import logging
+import os
+import zlib
+from typing import Dict, Hashable, Iterable, Iterator, List, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime of the universal hash functions (a * x + b) mod p
+MERSENNE_PRIME = (1 << 31) - 1
+NUM_PERM = 128
+SEED = 1
+# probability that a pair exactly at the Jaccard threshold becomes a candidate (pairs above it are more likely to)
+LSH_RECALL = 0.95
+# number of sets whose signatures are computed at once (bounds the memory to chunk tokens x num_perm)
+SIGNATURE_CHUNK_SIZE = 1024
+
+
+def token_hash(token: str) -> int:
+    """Stable 31 bit hash of a token (the same in every run, unlike hash())."""
+    return zlib.crc32(token.encode("utf-8")) % MERSENNE_PRIME
+
+
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    rng = np.random.RandomState(seed)
+    return (rng.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.int64),
+            rng.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.int64))
+
+
+def minhash_signatures(sets: Sequence[Set[str]], num_perm: int = NUM_PERM, seed: int = SEED) -> np.ndarray:
+    """
+    Args:
+        sets: the (non-empty) token sets
+    Returns:
+        the signatures of the sets (n_sets x num_perm, uint32)
+    """
+    a, b = _permutations(num_perm, seed)
+    signatures = np.empty((len(sets), num_perm), dtype=np.uint32)
+    for start in range(0, len(sets), SIGNATURE_CHUNK_SIZE):
+        chunk = sets[start:start + SIGNATURE_CHUNK_SIZE]
+        tokens = np.array([token_hash(token) for token_set in chunk for token in token_set], dtype=np.int64)
+        offsets = np.cumsum([0] + [len(token_set) for token_set in chunk[:-1]])
+        hashes = (tokens[:, None] * a[None, :] + b[None, :]) % MERSENNE_PRIME
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(hashes, offsets, axis=0)
+    return signatures
+
+
+def cached_signatures(image_sets: Dict[Hashable, Set[str]], path: str, num_perm: int = NUM_PERM,
+                      seed: int = SEED) -> np.ndarray:
+    """
+    Loads the signatures of the images stored in path, computes those of the other images and stores them all.
+
+    Args:
+        image_sets: token set per image id
+        path: .npz file of the signatures (ids and signatures of the images of all runs so far)
+    Returns:
+        the signatures of the images, in the order of image_sets
+    """
+    known: Dict[Hashable, np.ndarray] = {}
+    if os.path.isfile(path):
+        stored = np.load(path, allow_pickle=False)
+        if stored["signatures"].shape[1] == num_perm and int(stored["seed"]) == seed:
+            known = dict(zip(stored["ids"].tolist(), stored["signatures"]))
+        else:
+            logger.warning("Ignoring the signatures in %s, they were computed with other parameters", path)
+    missing = [image_id for image_id in image_sets if image_id not in known]
+    if missing:
+        logger.info("Computing the MinHash signatures of %d images", len(missing))
+        known.update(zip(missing, minhash_signatures([image_sets[image_id] for image_id in missing], num_perm, seed)))
+        ids = list(known)
+        # write to a temporary file first, so that the signature file is always complete
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, ids=np.array(ids), signatures=np.stack([known[image_id] for image_id in ids]), seed=seed)
+        os.replace(tmp_path, path)
+    return np.stack([known[image_id] for image_id in image_sets])
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """
+    Number of bands and rows per band (bands x rows <= num_perm): the widest bands (fewest candidates) with which a
+    pair at the threshold still becomes a candidate with probability LSH_RECALL.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= LSH_RECALL:
+            return bands, rows
+    return num_perm, 1
+
+
+def candidate_pairs(signatures: np.ndarray, bands: int, rows: int) -> Iterator[Tuple[int, int]]:
+    """Streams the pairs (i < j) of sets whose signatures agree on a band, each pair once (at its first band)."""
+    banded = signatures[:, :bands * rows].reshape(len(signatures), bands, rows)
+    for band in range(bands):
+        keys = np.ascontiguousarray(banded[:, band]).view(np.dtype((np.void, rows * signatures.itemsize))).ravel()
+        order = np.argsort(keys, kind="stable")
+        bucket_starts = np.flatnonzero(np.r_[True, keys[order][1:] != keys[order][:-1]])
+        for start, end in zip(bucket_starts, np.r_[bucket_starts[1:], len(order)]):
+            if end - start < 2:
+                continue
+            members = order[start:end]
+            first, second = np.triu_indices(len(members), k=1)
+            first, second = members[first], members[second]
+            # skip the pairs that already collided in an earlier band
+            earlier = (banded[first, :band] == banded[second, :band]).all(axis=2).any(axis=1)
+            for i, j in zip(first[~earlier].tolist(), second[~earlier].tolist()):
+                yield (i, j) if i < j else (j, i)
+
+
+def similar_pairs(sets: Sequence[Set[str]], signatures: np.ndarray, threshold: float) -> Iterator[Tuple[int, int, float]]:
+    """Streams the candidate pairs (i, j, Jaccard similarity) whose exact Jaccard similarity is at least threshold."""
+    bands, rows = lsh_params(threshold, signatures.shape[1])
+    logger.info("LSH with %d bands of %d rows", bands, rows)
+    for i, j in candidate_pairs(signatures, bands, rows):
+        jaccard = len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+        if jaccard >= threshold:
+            yield i, j, jaccard
+
+
+def top_pairs(pairs: Iterable[Tuple[int, int, float]], k: int) -> List[Tuple[int, int, float]]:
+    """The k pairs with the highest similarity, most similar first, keeping only k pairs in memory."""
+    heap: List[Tuple[float, int, int]] = []
+    for i, j, similarity in pairs:
+        if len(heap) < k:
+            heapq.heappush(heap, (similarity, i, j))
+        elif similarity > heap[0][0]:
+            heapq.heapreplace(heap, (similarity, i, j))
+    return [(i, j, similarity) for similarity, i, j in sorted(heap, reverse=True)]
@@ -5,7 +5,8 @@ import sys
 import os
 
 sys.path.append(os.path.abspath('../clembench/mm_mapworld'))
-from mm_mapworld_maps import AbstractMap
+from shared.map_generation import generate_maps
+from shared.mapworld_instance import MapInstance
 
 import numpy as np
 import os
@@ -74,31 +75,31 @@ class MmMapWorldGraphsInstanceGenerator(GameInstanceGenerator):
             imgs[nodes[i]] = after_copy_path
         return imgs, cat_mapping
 
-    def create_instances(self, mapping: Dict, grid_size: int, graph_size: int, num_instances=NUM_INSTANCES):
+    def create_instances(self, mapping: Dict, grid_size: int, graph_size: int, num_instances=NUM_INSTANCES,
+                         seed: int = 0):
         instances = []
-        for i in range(num_instances):
-            map = AbstractMap(*grid_size, graph_size)
-            nodes = [str(n) for n in map.G]
-            edges = list(map.G.edges())
+        for map_nodes, map_edges in generate_maps(*grid_size, graph_size, num_instances, seed=seed):
+            nodes = [str(n) for n in map_nodes]
+            edges = list(map_edges)
             rev_edges = [(edge[1], edge[0]) for edge in edges]
             edges.extend(rev_edges)
             img_ref, cat_ref = self.assign_images(mapping, nodes)
+            start = map_nodes[nodes.index(random.choice(nodes))]
             instances.append({
-                'nodes': nodes,
-                'edges': [str(e) for e in edges],
-                'imgs': img_ref,
-                'cats': cat_ref,
-                'start': random.choice(nodes),
+                'map': MapInstance.from_labels(map_nodes, edges, start,
+                                               imgs={node: img_ref[str(node)] for node in map_nodes},
+                                               cats={node: cat_ref[str(node)] for node in map_nodes}).to_json(),
                 'use_loop_warning': True,
                 'use_turn_limit_warning': True
             })
         return instances
 
-    def instance_from_config(self, config, mapping, prompts):
+    def instance_from_config(self, config, mapping, prompts, seed: int = 0):
         instances = self.create_instances(mapping,
                                           grid_size=GRIDS[config.get('size', 'large')],
                                           graph_size=SIZES[config.get('size', 'large')],
-                                          num_instances=config.get('num_instances', NUM_INSTANCES)
+                                          num_instances=config.get('num_instances', NUM_INSTANCES),
+                                          seed=seed
                                           )
         for i in range(len(instances)):
             if config.get('one_shot', 0):
@@ -140,7 +141,7 @@ class MmMapWorldGraphsInstanceGenerator(GameInstanceGenerator):
         for experiment_name, experiment_config in experiments.items():
             experiment = self.add_experiment(experiment_name)
             game_id = 0
-            generated_instances = self.instance_from_config(experiment_config, mapping, prompts)
+            generated_instances = self.instance_from_config(experiment_config, mapping, prompts, seed)
             for inst in generated_instances:
                 instance = self.add_game_instance(experiment, game_id)
                 for key, value in inst.items():
@@ -3,15 +3,16 @@ from typing import List, Dict, Tuple
 import re
 import os
 import json
-from queue import Queue
-from copy import deepcopy
 import numpy as np
 import matplotlib.pyplot as plt
-import imageio
-import shutil
 import networkx as nx
 
-import mm_mapworld_utils as utils
+from shared import mapworld_instance
+from shared import image_cache
+from shared import graph_similarity
+from shared.mapworld_graph import CARDINAL_TO_DELTA, detect_loop
+from shared.mapworld_oracle import ExplorationOracle
+from shared import mapworld_plots as plots
 from clemcore.backends import Model, CustomResponseModel
 from clemcore.clemgame import GameMaster, GameBenchmark, GameSpec
 from clemcore.clemgame.legacy.master import DialogueGameMaster
@@ -24,19 +25,6 @@ DIRS = ["north", "south", "east", "west"]
 GAME_NAME = 'mm_mapworld_graphs'
 MAX_TURNS = 20
 
-CARDINAL_TO_DELTA = {
-    'north': (0, 1),
-    'south': (0, -1),
-    'east': (1, 0),
-    'west': (-1, 0)
-}
-DELTA_TO_CARDINAL = {
-    (0, 1): 'north',
-    (0, -1): 'south',
-    (1, 0): 'east',
-    (-1, 0): 'west'
-}
-
 REV_DIR = {
     'north': 'south',
     'east': 'west',
@@ -58,12 +46,12 @@ class PathWalker(Player):
 class PathDescriber(Player):
     def __init__(self, game_instance):
         super().__init__(CustomResponseModel())
-        instance_data = utils.load_instance(game_instance)
-        self.imgs = instance_data["imgs"]
-        self.nodes = instance_data["nodes"]
-        self.edges = instance_data["edges"]
-        self.start = instance_data["start"]
-        self.current_room = instance_data["start"]
+        self.map = mapworld_instance.load(game_instance)
+        self.nodes = self.map.nodes
+        self.edges = self.map.edge_labels
+        self.graph = self.map.graph
+        self.start = self.map.start_room
+        self.current_room = self.map.start_room
         self.success_response = game_instance["success_response"]
         self.invalid_response = game_instance["invalid_response"]
         self.init_prompt = game_instance["initial_prompt"]
@@ -77,24 +65,17 @@ class PathDescriber(Player):
         self.invalid_move = False
 
     def get_available_moves(self, node):
-        return [edge for edge in self.edges if node == edge[0]]
+        return self.graph.available_moves(node)
 
     def detect_loop(self):
-        if len(self.visited_nodes) >= 4:
-            if len(set(self.visited_nodes[-4:])) < 3:
-                return True
-        return False
+        return detect_loop(self.visited_nodes)
 
     def get_available_directions(self, node):
-        moves = self.get_available_moves(node)
-        deltas = [utils.edge_to_delta(move) for move in moves]
-        cardinals = [DELTA_TO_CARDINAL[delta] for delta in deltas]
-        return cardinals
+        return self.graph.available_directions(node)
 
     def cardinal_room_change(self, cardinal):
-        delta = CARDINAL_TO_DELTA[cardinal]
-        new_room = (self.current_room[0] + delta[0], self.current_room[1] + delta[1])
-        if (self.current_room, new_room) in self.edges:
+        new_room = self.graph.move(self.current_room, cardinal)
+        if new_room is not None:
             self.current_room = new_room
 
     def _custom_response(self, context) -> str:
@@ -126,30 +107,25 @@ class MmMapWorldGraphs(DialogueGameMaster):
         self.did_reprompt: bool = False
 
     def get_available_moves(self, node):
-        return [edge for edge in self.edges if node == edge[0]]
+        return self.graph.available_moves(node)
 
     def get_available_directions(self, node):
-        moves = self.get_available_moves(node)
-        deltas = [utils.edge_to_delta(move) for move in moves]
-        cardinals = [DELTA_TO_CARDINAL[delta] for delta in deltas]
-        return cardinals
+        return self.graph.available_directions(node)
 
     def cardinal_room_change(self, cardinal):
-        delta = CARDINAL_TO_DELTA[cardinal]
-        new_room = (self.current_room[0] + delta[0], self.current_room[1] + delta[1])
-        if (self.current_room, new_room) in self.edges:
+        new_room = self.graph.move(self.current_room, cardinal)
+        if new_room is not None:
             self.current_room = new_room
 
     def _on_setup(self, **game_instance):
         """" sets the information you specify in instances.json """
         self.game_instance = game_instance
-        instance_data = utils.load_instance(self.game_instance)
-        self.imgs = instance_data["imgs"]
-        self.nodes = instance_data["nodes"]
-        self.edges = instance_data["edges"]
-        self.start = instance_data["start"]
-        self.cats = instance_data["cats"]
-        self.current_room = instance_data["start"]
+        self.map = mapworld_instance.load(self.game_instance)
+        self.nodes = self.map.nodes
+        self.edges = self.map.edge_labels
+        self.graph = self.map.graph
+        self.start = self.map.start_room
+        self.current_room = self.map.start_room
         self.visited_nodes = [self.current_room]
 
         self.response_regex = re.compile(game_instance["response_regex"], re.IGNORECASE)
@@ -180,7 +156,7 @@ class MmMapWorldGraphs(DialogueGameMaster):
     def _on_before_round(self):
         img_path = 'games/mm_mapworld/resources/images/'
         value = {
-            "image": [img_path + os.path.split(self.imgs[self.current_room])[1]]
+            "image": [img_path + os.path.split(self.map.image(self.current_room))[1]]
         }
         self.log_to_self("room_image", json.dumps(value))
 
@@ -257,7 +233,7 @@ class MmMapWorldGraphs(DialogueGameMaster):
             if not self.need_reprompt or self.did_reprompt:
                 self.set_context_for(self.describer, utterance)
         if player == self.describer:
-            self.set_context_for(self.walker, utterance, image=[self.imgs[self.current_room]])
+            self.set_context_for(self.walker, utterance, image=[image_cache.prepare(self.map.image(self.current_room))])
 
     def _should_pass_turn(self):
         if self.current_player == self.walker and self.need_reprompt and not self.did_reprompt:
@@ -265,7 +241,7 @@ class MmMapWorldGraphs(DialogueGameMaster):
             reprompt = self.reprompt_format
             reprompt = reprompt.replace("$DIRECTIONS$", ', '.join(avail))
             if self.use_images:
-                self.set_context_for(self.walker, reprompt, image=[self.imgs[self.current_room]])
+                self.set_context_for(self.walker, reprompt, image=[image_cache.prepare(self.map.image(self.current_room))])
             else:
                 self.set_context_for(self.walker, reprompt)
             self.did_reprompt = True
@@ -293,12 +269,13 @@ class MmMapWorldGraphs(DialogueGameMaster):
 class MM_MapWorldGraphsScorer(GameScorer):
     def __init__(self, game_name: str, experiment: Dict, game_instance: Dict):
         super().__init__(game_name, experiment, game_instance)
-        instance_data = utils.load_instance(self.game_instance)
+        self.map = mapworld_instance.load(self.game_instance)
         self.name = game_name
-        self.imgs = instance_data["imgs"]
-        self.nodes = instance_data["nodes"]
-        self.edges = instance_data["edges"]
-        self.start_node = instance_data["start"]
+        self.nodes = self.map.nodes
+        self.edges = self.map.edge_labels
+        self.graph = self.map.graph
+        self.start_node = self.map.start_room
+        self.oracle = ExplorationOracle(self.graph.edges, restrict_to_visited=True)
         self.response_regex = re.compile(game_instance['response_regex'], re.IGNORECASE)
         self.actual_graph = nx.Graph()
         self.actual_graph.add_nodes_from(self.nodes)
@@ -308,46 +285,16 @@ class MM_MapWorldGraphsScorer(GameScorer):
         self.gen_start = None
 
     def adj(self, node):
-        return set([ed[1] for ed in self.edges if ed[0] == node])
+        return self.graph.adj(node)
 
     def visited_all(self, visited, to_visit):
         return all([n in visited for n in to_visit])
 
     def get_available_moves(self, node, visited):
-        return [edge for edge in self.edges if node == edge[0] and (edge[0] in visited or edge[1] in visited)]
+        return [edge for edge in self.graph.available_moves(node) if edge[0] in visited or edge[1] in visited]
 
     def find_best_moves(self, current, visited):
-        to_visit = [ed[1] for ed in self.edges if ed[0] in visited and ed[1] not in visited]
-        start = [current]
-        q = Queue()
-        q.put(start)
-        found = set()
-        max_len = 100
-        while True:
-            if not q.qsize():
-                break
-            n = q.get()
-            if len(n) > max_len:
-                break
-            if self.visited_all(n, to_visit):
-                found.add((n[0], n[1]))
-                max_len = len(n)
-                continue
-            if len(n) == max_len:
-                continue
-            avail = self.get_available_moves(n[-1], visited)
-            if all([move[1] in n for move in avail]):
-                for move in avail:
-                    new = deepcopy(n)
-                    new.append(move[1])
-                    q.put(new)
-            else:
-                for move in avail:
-                    if not move[1] in n:
-                        new = deepcopy(n)
-                        new.append(move[1])
-                        q.put(new)
-        return found
+        return self.oracle.best_moves(current, visited)
 
     def gen_graph(self, graph_info):
         nodes = graph_info['nodes']
@@ -410,147 +357,8 @@ class MM_MapWorldGraphsScorer(GameScorer):
         plt.grid(True)
         return fig
 
-    def plot_path_and_gen(self, path, graph):
-        offset = 0.05
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(8, 4), sharex=True, sharey=True)
-        plt.xlim(-3, 6)
-        plt.ylim(-3, 6)
-        # path plot on the left (ax1)
-        for node in self.nodes:
-            if node in path and node != path[-1]:
-                ax1.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=17.5, zorder=9, mfc='tab:olive')
-            if node == path[-1]:
-                ax1.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=17.5, zorder=9, mfc='tab:cyan')
-            if not node in path:
-                ax1.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=17.5, zorder=9, mfc='tab:gray')
-        traveled = {node: 0 for node in self.nodes}
-        traveled[self.start_node] += 1
-        for edge in self.edges:
-            if edge[0] in path and edge[1] in path:
-                ax1.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='black',
-                         linestyle='--', zorder=5, linewidth=1.8)
-            else:
-                ax1.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='gray',
-                         linestyle='--', zorder=5, linewidth=1.8)
-        last = path[0]
-        if len(path) > 1:
-            for i in range(1, len(path)):
-                if path[i] == path[i - 1]:
-                    continue
-                x1, y1 = last
-                x2, y2 = path[i]
-                dx = x2 - x1
-                dy = y2 - y1
-                t = traveled[path[i]]
-                traveled[path[i]] += 1
-                color = "black"
-                if i == len(path) - 1:
-                    color = "red"
-                t = sum([(1 / (1 + j)) for j in range(t)])
-                ax1.arrow(x1,
-                          y1,
-                          dx + t * offset,
-                          dy + t * offset,
-                          color=color,
-                          width=0.005,
-                          head_width=0.05,
-                          length_includes_head=True,
-                          zorder=10)
-                last = (
-                    x1 + dx + t * offset,
-                    y1 + dy + t * offset
-                )
-                # the generated graph goes on the right (ax2)
-        nodes = graph['V']
-        edges = graph['E']
-        for node in nodes:
-            ax2.plot(node[0], node[1], 'o', color='brown',
-                     linewidth=10, markersize=17.5, zorder=9, mfc='tab:gray')
-        for edge in edges:
-            ax2.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='gray',
-                     linestyle='--', zorder=5, linewidth=1.8)
-        ax1.set_xlabel('X')
-        ax2.set_xlabel('X')
-        ax1.set_ylabel('Y')
-        ax1.grid(True)
-        ax2.grid(True)
-        tcks = np.arange(-2, 7)
-        ax1.set_xticks(tcks)
-        ax2.set_xticks(tcks)
-        ax1.set_yticks(tcks)
-        ax2.set_yticks(tcks)
-        ax1.set_title("Target Graph")
-        ax2.set_title("Generated Graph")
-        return fig
-
-    def plot_path(self, path):
-        offset = 0.05
-        fig = plt.figure(figsize=(4, 4))
-        for node in self.nodes:
-            if node in path and node != path[-1]:
-                plt.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=25, zorder=9, mfc='tab:olive')
-            if node == path[-1]:
-                plt.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=25, zorder=9, mfc='tab:cyan')
-            if not node in path:
-                plt.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=25, zorder=9, mfc='tab:gray')
-        plt.xlim(-1, 4)
-        plt.ylim(-1, 4)
-        traveled = {node: 0 for node in self.nodes}
-        traveled[self.start_node] += 1
-        for edge in self.edges:
-            if edge[0] in path and edge[1] in path:
-                plt.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='black', linestyle='--', zorder=5)
-            else:
-                plt.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='gray', linestyle='--', zorder=5)
-        last = path[0]
-        if len(path) > 1:
-            for i in range(1, len(path)):
-                if path[i] == path[i - 1]:
-                    continue
-                x1, y1 = last
-                x2, y2 = path[i]
-                dx = x2 - x1
-                dy = y2 - y1
-                t = traveled[path[i]]
-                traveled[path[i]] += 1
-                color = "black"
-                if i == len(path) - 1:
-                    color = "red"
-                t = sum([(1 / (1 + j)) for j in range(t)])
-                plt.arrow(x1,
-                          y1,
-                          dx + t * offset,
-                          dy + t * offset,
-                          color=color,
-                          width=0.005,
-                          head_width=0.05,
-                          length_includes_head=True,
-                          zorder=10)
-                last = (
-                    x1 + dx + t * offset,
-                    y1 + dy + t * offset
-                )
-        plt.xlabel('X')
-        plt.ylabel('Y')
-        plt.grid(True)
-        return fig
-
-    def normalize(self, distance):
-        normalized_distance = 1 / (1 + np.exp(-0.5 * distance))
-        normalized_distance = 2 * (normalized_distance - 0.5)
-        return normalized_distance
-
     def calculate_similarity(self, graph1, graph2):
-        distance = nx.graph_edit_distance(graph1, graph2)
-        normalized_distance = self.normalize(distance)
-        similarity = 1 - normalized_distance
-        return similarity
+        return graph_similarity.calculate_similarity(graph1, graph2)
 
     def compute_scores(self, episode_interactions) -> None:
         current = self.start_node
@@ -661,38 +469,13 @@ class MM_MapWorldGraphsScorer(GameScorer):
         super().store_scores(interactions_dir)
 
         # plotting & animation
-        if not os.path.exists("tmp"):
-            os.makedirs("tmp")
-        path_plot = self.plot_path(self.path)
-        path_plot.savefig(os.path.join(interactions_dir, "path.png"))
-        plt.close()
-        if not os.path.exists("tmp/step_plots"):
-            os.makedirs("tmp/step_plots")
-        images = []
-        gen_images = []
-        gen_dir = os.path.join(interactions_dir, "generated_graphs")
-        tmp_gen_dir = os.path.join(interactions_dir, "generated_graphs", "tmp")
-        if not os.path.exists(tmp_gen_dir):
-            os.makedirs(tmp_gen_dir)
-        for i in range(len(self.gens)):
-            generated_graph_turn = self.plot_path_and_gen(self.path[:i + 1], self.gens[i])
-            generated_graph_turn.savefig(os.path.join(tmp_gen_dir, f"{i}.png"))
-            generated_graph_turn.savefig(os.path.join(gen_dir, f"{i}.pdf"))
-            gen_images.append(imageio.imread(os.path.join(tmp_gen_dir, f"{i}.png")))
-            plt.close()
-        if self.gens:
-            imageio.mimsave(os.path.join(gen_dir, "animation.gif"), gen_images, fps=1, loop=True)
-        for i in range(len(self.path)):
-            step_plot = self.plot_path(self.path[:i + 1])
-            step_plot.savefig(f"tmp/step_plots/{i}.png")
-            images.append(imageio.imread(f"tmp/step_plots/{i}.png"))
-            plt.close()
-        imageio.mimsave(os.path.join(interactions_dir, "animation.gif"), images, fps=1, loop=True)
-        try:
-            shutil.rmtree("tmp")
-            shutil.rmtree(tmp_gen_dir)
-        except OSError as e:
-            print("Error: %s - %s." % (e.filename, e.strerror))
+        mode = plots.animation_mode(self.experiment)
+        if mode == "off":
+            return
+        map_info = dict(nodes=self.nodes, edges=self.edges, start=self.start_node, mark_path_edges=True)
+        plots.submit(plots.render_path, self.path, map_info, interactions_dir, mode)
+        if mode == "gif":
+            plots.submit(plots.render_generated_graphs, self.path, self.gens, map_info, interactions_dir)
 
 
 class MmMapWorldGraphsBenchmark(GameBenchmark):
@@ -711,6 +494,13 @@ class MmMapWorldGraphsBenchmark(GameBenchmark):
     def create_game_scorer(self, experiment: Dict, game_instance: Dict) -> GameScorer:
         return MM_MapWorldGraphsScorer(self.game_name, experiment, game_instance)
 
+    def close(self):
+        # the path plots are rendered while scoring goes on
+        try:
+            plots.wait_for_renders()
+        finally:
+            super().close()
+
 
 def main():
     game_path = os.path.dirname(os.path.abspath(__file__))
@@ -2,10 +2,10 @@ from clemcore.clemgame import GameInstanceGenerator
 import sys
 import os
 sys.path.append(os.path.abspath('../clembench/mm_mapworld'))
-from mm_mapworld_maps import AbstractMap
+from shared.map_generation import generate_maps
+from shared.mapworld_instance import MapInstance
 
 import numpy as np
-import networkx as nx
 import os
 import random
 import json
@@ -41,35 +41,18 @@ def create_instances(grid_size = GRIDS['medium'], graph_size = SIZES['medium'],
     instances = []
     np.random.seed(SEED)
     random.seed(SEED)
-    for i in range(num_instances):
-        j = 0
-        while j < 10000:
-            map = AbstractMap(*grid_size, graph_size)
-            j += 1
-            try:
-                c = nx.find_cycle(map.G)
-                if cycle:
-                    break  
-                else: 
-                    continue
-            except nx.NetworkXNoCycle:
-                if cycle:
-                    continue
-                else:
-                    break
-        if j == 1000:   
-            print("could not find an appropriate graph with cycles = ", cycle)     
-        nodes = [str(n) for n in map.G]
-        edges = list(map.G.edges())
+    maps = generate_maps(*grid_size, graph_size, num_instances, cycle=cycle, seed=SEED)
+    for map_nodes, map_edges in maps:
+        nodes = [str(n) for n in map_nodes]
+        edges = list(map_edges)
         rev_edges = [(edge[1], edge[0]) for edge in edges]
         edges.extend(rev_edges)
         img_ref, cat_ref = assign_images(nodes)
+        start = map_nodes[nodes.index(random.choice(nodes))]
         instances.append({
-            'nodes': nodes,
-            'edges': [str(e) for e in edges],
-            'imgs': img_ref,
-            'cats': cat_ref,
-            'start': random.choice(nodes),
+            'map': MapInstance.from_labels(map_nodes, edges, start,
+                                           imgs={node: img_ref[str(node)] for node in map_nodes},
+                                           cats={node: cat_ref[str(node)] for node in map_nodes}).to_json(),
             'use_images': True,
             'reprompt': False,
             'use_loop_warning': True,
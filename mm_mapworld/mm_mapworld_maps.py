@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
+import random
+
 import numpy as np
 import networkx as nx
 
+from shared.map_generation import random_walk_map
+
 class AbstractMap(object):
     dir2delta = {'n': np.array((-1, 0)),
                  's': np.array((1, 0)),
@@ -17,23 +21,12 @@ class AbstractMap(object):
         self.G = self.make_graph(n, m, n_rooms)
 
     def make_graph(self, n, m, n_rooms):
-        map_array = np.zeros((n, m))
+        # the walk is seeded from numpy, so that np.random.seed keeps the maps reproducible
+        rng = random.Random(int(np.random.randint(2 ** 31)))
+        nodes, edges = random_walk_map(n, m, n_rooms, rng)
         G = nx.Graph()
-
-        current_pos = np.random.randint(0, n), np.random.randint(0, m)
-        map_array[current_pos] = 1
-        G.add_node(current_pos)
-
-        while map_array.sum() < n_rooms:
-            random_dir = np.random.choice(['n', 's', 'e', 'w'])
-            new_pos = tuple(np.array(current_pos) + self.dir2delta[random_dir])
-            if min(new_pos) < 0 or new_pos[0] >= n or new_pos[1] >= m:
-                # illegal move
-                continue
-            map_array[new_pos] = 1
-            G.add_node(new_pos)
-            G.add_edge(current_pos, new_pos)
-            current_pos = new_pos
+        G.add_nodes_from(nodes)
+        G.add_edges_from(edges)
         return G
 
     def plot_graph(self):
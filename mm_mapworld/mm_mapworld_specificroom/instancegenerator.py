@@ -2,7 +2,8 @@ from clemcore.clemgame import GameInstanceGenerator
 import sys
 import os
 sys.path.append(os.path.abspath('../clembench/mm_mapworld'))
-from mm_mapworld_maps import AbstractMap
+from shared.map_generation import generate_maps
+from shared.mapworld_instance import MapInstance
 
 import numpy as np
 import os
@@ -36,30 +37,31 @@ def create_instances(grid_size = GRIDS['large'], graph_size = SIZES['large'], nu
     instances = []
     np.random.seed(SEED)
     random.seed(SEED)
-    for i in range(num_instances):
-        this_dist = int(np.random.choice(goal_dist))
-        start = None
-        target = None
-        while start is None:
-            map = AbstractMap(*grid_size, graph_size)
-            dists = dict(nx.all_pairs_shortest_path_length(map.G))
-            for node1 in dists:
-                for node2 in dists[node1]:
-                    if dists[node1][node2] == this_dist:
-                        start = str(node1)
-                        target = str(node2)
-        nodes = [str(n) for n in map.G]
-        edges = list(map.G.edges())
+    dists_needed = [int(np.random.choice(goal_dist)) for _ in range(num_instances)]
+    # a map has two rooms at distance d exactly if its diameter is at least d
+    maps = {d: iter(generate_maps(*grid_size, graph_size, dists_needed.count(d), min_diameter=d, seed=SEED + d))
+            for d in set(dists_needed)}
+    for this_dist in dists_needed:
+        map_nodes, map_edges = next(maps[this_dist])
+        G = nx.Graph()
+        G.add_nodes_from(map_nodes)
+        G.add_edges_from(map_edges)
+        dists = dict(nx.all_pairs_shortest_path_length(G))
+        for node1 in dists:
+            for node2 in dists[node1]:
+                if dists[node1][node2] == this_dist:
+                    start = str(node1)
+                    target = str(node2)
+        nodes = [str(n) for n in map_nodes]
+        edges = list(map_edges)
         rev_edges = [(edge[1], edge[0]) for edge in edges]
         edges.extend(rev_edges)
         img_ref, cat_ref = assign_images(nodes, target)
         instances.append({
-            'nodes': nodes,
-            'edges': [str(e) for e in edges],
-            'imgs': img_ref,
-            'cats': cat_ref,
-            'start': start,
-            'target': target,
+            'map': MapInstance.from_labels(map_nodes, edges, map_nodes[nodes.index(start)],
+                                           map_nodes[nodes.index(target)],
+                                           imgs={node: img_ref[str(node)] for node in map_nodes},
+                                           cats={node: cat_ref[str(node)] for node in map_nodes}).to_json(),
             'target_cat': cat_ref[target],
             'dist': this_dist,
             'use_images': True,
@@ -3,14 +3,13 @@ from typing import List, Dict, Tuple, Union
 import re
 import os
 import json
-from queue import Queue
-from copy import deepcopy
 import numpy as np
-import matplotlib.pyplot as plt
-import imageio
-import shutil
 
-import mm_mapworld_utils as utils
+from shared import mapworld_instance
+from shared import image_cache
+from shared.mapworld_graph import detect_loop
+from shared.mapworld_oracle import ExplorationOracle
+from shared import mapworld_plots as plots
 from clemcore.backends import Model, CustomResponseModel
 from clemcore.clemgame import GameMaster, GameBenchmark, GameSpec
 from clemcore.clemgame.legacy.master import DialogueGameMaster
@@ -23,19 +22,6 @@ DIRS = ["north", "south", "east", "west"]
 GAME_NAME = 'mm_mapworld_specificroom'
 MAX_TURNS = 20
 
-CARDINAL_TO_DELTA = {
-    'north': (0, 1),
-    'south': (0, -1),
-    'east': (1, 0),
-    'west': (-1, 0)
-}
-DELTA_TO_CARDINAL = {
-    (0, 1): 'north',
-    (0, -1): 'south',
-    (1, 0): 'east',
-    (-1, 0): 'west'
-}
-
 
 class PathWalker(Player):
     def __init__(self, model: Model):
@@ -50,15 +36,14 @@ class PathWalker(Player):
 class PathDescriber(Player):
     def __init__(self, game_instance):
         super().__init__(CustomResponseModel())
-        instance_data = utils.load_instance(game_instance)
-        self.imgs = instance_data["imgs"]
-        self.nodes = instance_data["nodes"]
-        self.edges = instance_data["edges"]
-        self.start = instance_data["start"]
-        self.cats = instance_data["cats"]
-        self.target = instance_data["target"]
+        self.map = mapworld_instance.load(game_instance)
+        self.nodes = self.map.nodes
+        self.edges = self.map.edge_labels
+        self.graph = self.map.graph
+        self.start = self.map.start_room
+        self.target = self.map.target_room
         self.target_cat = game_instance["target_cat"].replace('_', ' ')
-        self.current_room = instance_data["start"]
+        self.current_room = self.map.start_room
         self.init_prompt = game_instance["initial_prompt"].replace("$GOAL$", self.target_cat)
         self.success_response = game_instance["success_response"]
         self.invalid_response = game_instance["invalid_response"]
@@ -72,24 +57,17 @@ class PathDescriber(Player):
         self.invalid_move = False
 
     def get_available_moves(self, node):
-        return [edge for edge in self.edges if node == edge[0]]
+        return self.graph.available_moves(node)
 
     def detect_loop(self):
-        if len(self.visited_nodes) >= 4:
-            if len(set(self.visited_nodes[-4:])) < 3:
-                return True
-        return False
+        return detect_loop(self.visited_nodes)
 
     def get_available_directions(self, node):
-        moves = self.get_available_moves(node)
-        deltas = [utils.edge_to_delta(move) for move in moves]
-        cardinals = [DELTA_TO_CARDINAL[delta] for delta in deltas]
-        return cardinals
+        return self.graph.available_directions(node)
 
     def cardinal_room_change(self, cardinal):
-        delta = CARDINAL_TO_DELTA[cardinal]
-        new_room = (self.current_room[0] + delta[0], self.current_room[1] + delta[1])
-        if (self.current_room, new_room) in self.edges:
+        new_room = self.graph.move(self.current_room, cardinal)
+        if new_room is not None:
             self.current_room = new_room
 
     def _custom_response(self, context) -> str:
@@ -123,32 +101,27 @@ class MmMapWorld(DialogueGameMaster):
         self.did_reprompt: bool = False
 
     def get_available_moves(self, node):
-        return [edge for edge in self.edges if node == edge[0]]
+        return self.graph.available_moves(node)
 
     def get_available_directions(self, node):
-        moves = self.get_available_moves(node)
-        deltas = [utils.edge_to_delta(move) for move in moves]
-        cardinals = [DELTA_TO_CARDINAL[delta] for delta in deltas]
-        return cardinals
+        return self.graph.available_directions(node)
 
     def cardinal_room_change(self, cardinal):
-        delta = CARDINAL_TO_DELTA[cardinal]
-        new_room = (self.current_room[0] + delta[0], self.current_room[1] + delta[1])
-        if (self.current_room, new_room) in self.edges:
+        new_room = self.graph.move(self.current_room, cardinal)
+        if new_room is not None:
             self.current_room = new_room
 
     def _on_setup(self, **game_instance):
         """" sets the information you specify in instances.json """
         self.game_instance = game_instance
-        instance_data = utils.load_instance(self.game_instance)
-        self.imgs = instance_data["imgs"]
-        self.nodes = instance_data["nodes"]
-        self.edges = instance_data["edges"]
-        self.cats = instance_data["cats"]
-        self.target = instance_data["target"]
+        self.map = mapworld_instance.load(self.game_instance)
+        self.nodes = self.map.nodes
+        self.edges = self.map.edge_labels
+        self.graph = self.map.graph
+        self.target = self.map.target_room
         self.target_cat = game_instance["target_cat"]
-        self.start = instance_data["start"]
-        self.current_room = instance_data["start"]
+        self.start = self.map.start_room
+        self.current_room = self.map.start_room
         self.visited_nodes = [self.current_room]
         self.response_regex = re.compile(game_instance["response_regex"], re.IGNORECASE)
         self.done_regex = re.compile(game_instance["done_regex"], re.IGNORECASE)
@@ -175,7 +148,7 @@ class MmMapWorld(DialogueGameMaster):
     def _on_before_round(self):
         img_path = 'games/mm_mapworld_specificroom/resources/images/'
         value = {
-            "image": [img_path + os.path.split(self.imgs[self.current_room])[1]]
+            "image": [img_path + os.path.split(self.map.image(self.current_room))[1]]
         }
         self.log_to_self("room_image", json.dumps(value))
 
@@ -256,7 +229,7 @@ class MmMapWorld(DialogueGameMaster):
             if not self.need_reprompt or self.did_reprompt:
                 self.set_context_for(self.describer, utterance)
         if player == self.describer:
-            self.set_context_for(self.walker, utterance, image=[player.imgs[self.current_room]])
+            self.set_context_for(self.walker, utterance, image=[image_cache.prepare(player.map.image(self.current_room))])
 
     def _should_pass_turn(self):
         if self.current_player == self.walker and self.need_reprompt and not self.did_reprompt:
@@ -264,7 +237,7 @@ class MmMapWorld(DialogueGameMaster):
             reprompt = self.reprompt_format
             reprompt = reprompt.replace("$DIRECTIONS$", ', '.join(avail))
             if self.use_images:
-                self.set_context_for(self.walker, reprompt, image=[self.imgs[self.current_room]])
+                self.set_context_for(self.walker, reprompt, image=[image_cache.prepare(self.map.image(self.current_room))])
             else:
                 self.set_context_for(self.walker, reprompt)
             self.did_reprompt = True
@@ -292,116 +265,28 @@ class MmMapWorld(DialogueGameMaster):
 class MM_MapWorldScorer(GameScorer):
     def __init__(self, game_name: str, experiment: Dict, game_instance: Dict):
         super().__init__(game_name, experiment, game_instance)
-        instance_data = utils.load_instance(self.game_instance)
+        self.map = mapworld_instance.load(self.game_instance)
         self.name = game_name
-        self.imgs = instance_data["imgs"]
-        self.nodes = instance_data["nodes"]
-        self.edges = instance_data["edges"]
-        self.start_node = instance_data["start"]
-        self.target = instance_data["target"]
+        self.nodes = self.map.nodes
+        self.edges = self.map.edge_labels
+        self.graph = self.map.graph
+        self.start_node = self.map.start_room
+        self.oracle = ExplorationOracle(self.graph.edges, restrict_to_visited=True)
+        self.target = self.map.target_room
         self.target_cat = game_instance['target_cat']
-        self.cats = instance_data['cats']
         self.dist = game_instance['dist']
 
     def adj(self, node):
-        return set([ed[1] for ed in self.edges if ed[0] == node])
+        return self.graph.adj(node)
 
     def visited_all(self, visited, to_visit):
         return all([n in visited for n in to_visit])
 
     def get_available_moves(self, node, visited):
-        return [edge for edge in self.edges if node == edge[0] and (edge[0] in visited or edge[1] in visited)]
+        return [edge for edge in self.graph.available_moves(node) if edge[0] in visited or edge[1] in visited]
 
     def find_best_moves(self, current, visited):
-        to_visit = [ed[1] for ed in self.edges if ed[0] in visited and ed[1] not in visited]
-        start = [current]
-        q = Queue()
-        q.put(start)
-        found = set()
-        max_len = 100
-        while True:
-            if not q.qsize():
-                break
-            n = q.get()
-            if len(n) > max_len:
-                break
-            if self.visited_all(n, to_visit):
-                found.add((n[0], n[1]))
-                max_len = len(n)
-                continue
-            if len(n) == max_len:
-                continue
-            avail = self.get_available_moves(n[-1], visited)
-            if all([move[1] in n for move in avail]):
-                for move in avail:
-                    new = deepcopy(n)
-                    new.append(move[1])
-                    q.put(new)
-            else:
-                for move in avail:
-                    if not move[1] in n:
-                        new = deepcopy(n)
-                        new.append(move[1])
-                        q.put(new)
-        return found
-
-    def plot_path(self, path):
-        offset = 0.05
-        fig = plt.figure(figsize=(4, 4))
-        for node in self.nodes:
-            if node in path and node != path[-1] and node != self.target:
-                plt.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=25, zorder=9, mfc='tab:olive')
-            if node == path[-1] and node != self.target:
-                plt.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=25, zorder=9, mfc='tab:cyan')
-            if node == self.target:
-                plt.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=25, zorder=9, mfc='tab:orange')
-            if not node in path:
-                plt.plot(node[0], node[1], 'o', color='brown',
-                         linewidth=20, markersize=25, zorder=9, mfc='tab:gray')
-        plt.xlim(-1, 4)
-        plt.ylim(-1, 4)
-        traveled = {node: 0 for node in self.nodes}
-        traveled[self.start_node] += 1
-        for edge in self.edges:
-            if edge[0] in path and edge[1] in path:
-                plt.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='black', linestyle='--', zorder=5)
-            else:
-                plt.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='gray', linestyle='--', zorder=5)
-        last = path[0]
-        if len(path) > 1:
-            for i in range(1, len(path)):
-                if path[i] == path[i - 1]:
-                    continue
-                x1, y1 = last
-                x2, y2 = path[i]
-                dx = x2 - x1
-                dy = y2 - y1
-                t = traveled[path[i]]
-                traveled[path[i]] += 1
-                color = "black"
-                if i == len(path) - 1:
-                    color = "red"
-                t = sum([(1 / (1 + j)) for j in range(t)])
-                plt.arrow(x1,
-                          y1,
-                          dx + t * offset,
-                          dy + t * offset,
-                          color=color,
-                          width=0.005,
-                          head_width=0.05,
-                          length_includes_head=True,
-                          zorder=10)
-                last = (
-                    x1 + dx + t * offset,
-                    y1 + dy + t * offset
-                )
-        plt.xlabel('X')
-        plt.ylabel('Y')
-        plt.grid(True)
-        return fig
+        return self.oracle.best_moves(current, visited)
 
     def compute_scores(self, episode_interactions) -> None:
         current = self.start_node
@@ -485,24 +370,12 @@ class MM_MapWorldScorer(GameScorer):
         super().store_scores(interactions_dir)
 
         # plotting & animation
-        if not os.path.exists("tmp"):
-            os.makedirs("tmp")
-        path_plot = self.plot_path(self.path)
-        path_plot.savefig(os.path.join(interactions_dir, "path.png"))
-        plt.close()
-        if not os.path.exists("tmp/step_plots"):
-            os.makedirs("tmp/step_plots")
-        images = []
-        for i in range(len(self.path)):
-            step_plot = self.plot_path(self.path[:i + 1])
-            step_plot.savefig(f"tmp/step_plots/{i}.png")
-            images.append(imageio.imread(f"tmp/step_plots/{i}.png"))
-            plt.close()
-        imageio.mimsave(os.path.join(interactions_dir, "animation.gif"), images, fps=1, loop=True)
-        try:
-            shutil.rmtree("tmp")
-        except OSError as e:
-            print("Error: %s - %s." % (e.filename, e.strerror))
+        mode = plots.animation_mode(self.experiment)
+        if mode == "off":
+            return
+        map_info = dict(nodes=self.nodes, edges=self.edges, start=self.start_node, target=self.target,
+                        mark_path_edges=True)
+        plots.submit(plots.render_path, self.path, map_info, interactions_dir, mode)
 
 
 class MmMapWorldBenchmark(GameBenchmark):
@@ -521,6 +394,13 @@ class MmMapWorldBenchmark(GameBenchmark):
     def create_game_scorer(self, experiment: Dict, game_instance: Dict) -> GameScorer:
         return MM_MapWorldScorer(self.game_name, experiment, game_instance)
 
+    def close(self):
+        # the path plots are rendered while scoring goes on
+        try:
+            plots.wait_for_renders()
+        finally:
+            super().close()
+
 
 def main():
     game_path = os.path.dirname(os.path.abspath(__file__))
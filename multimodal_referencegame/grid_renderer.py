@@ -0,0 +1,119 @@
+"""
+Raster renderer of the character grids of the multimodal_referencegame grid experiment.
+
+Grids are drawn directly into a pixel array (same layout as the former matplotlib plots: 640x480, the cells framed by
+the plot area), the cell texts are blitted from a glyph atlas that rasterizes every distinct text once per process.
+The images are named by a hash of the grid, so every grid is rendered once (and not again if its image exists) and
+the output does not depend on the order or the number of worker processes.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+import matplotlib
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# number of worker processes rendering the grids; 0 renders them in the calling process
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+IMAGE_WIDTH = 640
+IMAGE_HEIGHT = 480
+# plot area (left, bottom, right, top) as fractions of the image, as matplotlib's default subplot
+AXES_BOX = (0.125, 0.11, 0.9, 0.88)
+# space between the plot area and the grid, as a fraction of the grid size
+MARGIN = 0.05
+FONT_PATH = os.path.join(matplotlib.get_data_path(), "fonts", "ttf", "DejaVuSans.ttf")
+# 12pt at 100 dpi
+FONT_SIZE = 17
+EMPTY_CELL = "▢"
+
+
+def parse_grid(grid: str) -> List[List[str]]:
+    return [line.split(' ') for line in grid.split('\n')]
+
+
+def grid_file_name(grid: str) -> str:
+    return f"{hashlib.sha1(grid.encode('utf-8')).hexdigest()[:16]}.png"
+
+
+@lru_cache(maxsize=None)
+def _font() -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(FONT_PATH, FONT_SIZE)
+
+
+@lru_cache(maxsize=256)
+def glyph(text: str) -> np.ndarray:
+    """The ink coverage (0 to 1) of the text of a cell, cropped to its bounding box."""
+    left, top, right, bottom = _font().getbbox(text)
+    image = Image.new("L", (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(image).text((-left, -top), text, fill=255, font=_font())
+    return np.asarray(image, dtype=np.float32) / 255
+
+
+def _draw_box(image: np.ndarray, left: int, top: int, right: int, bottom: int):
+    image[top, left:right + 1] = 0
+    image[bottom, left:right + 1] = 0
+    image[top:bottom + 1, left] = 0
+    image[top:bottom + 1, right] = 0
+
+
+def _draw_glyph(image: np.ndarray, text: str, center_x: float, center_y: float):
+    coverage = glyph(text)
+    height, width = coverage.shape
+    top = int(round(center_y - height / 2))
+    left = int(round(center_x - width / 2))
+    region = image[top:top + height, left:left + width]
+    region[...] = np.rint(region * (1 - coverage[:region.shape[0], :region.shape[1]])).astype(np.uint8)
+
+
+def render_grid(grid: str) -> np.ndarray:
+    """Renders a grid (rows separated by newlines, cells by spaces) as a grayscale image."""
+    cells = parse_grid(grid)
+    n_rows, n_cols = len(cells), max(len(row) for row in cells)
+    image = np.full((IMAGE_HEIGHT, IMAGE_WIDTH), 255, dtype=np.uint8)
+    axes_left, axes_right = round(AXES_BOX[0] * IMAGE_WIDTH), round(AXES_BOX[2] * IMAGE_WIDTH)
+    axes_top, axes_bottom = round((1 - AXES_BOX[3]) * IMAGE_HEIGHT), round((1 - AXES_BOX[1]) * IMAGE_HEIGHT)
+    _draw_box(image, axes_left, axes_top, axes_right, axes_bottom)
+    cell_width = (axes_right - axes_left) / (n_cols * (1 + 2 * MARGIN))
+    cell_height = (axes_bottom - axes_top) / (n_rows * (1 + 2 * MARGIN))
+    xs = [round(axes_left + (MARGIN * n_cols + col) * cell_width) for col in range(n_cols + 1)]
+    ys = [round(axes_top + (MARGIN * n_rows + row) * cell_height) for row in range(n_rows + 1)]
+    for row, row_cells in enumerate(cells):
+        for col, cell in enumerate(row_cells):
+            _draw_box(image, xs[col], ys[row], xs[col + 1], ys[row + 1])
+            if cell != EMPTY_CELL:
+                _draw_glyph(image, cell, (xs[col] + xs[col + 1]) / 2, (ys[row] + ys[row + 1]) / 2)
+    return image
+
+
+def _render_to_file(grid_and_path: Tuple[str, str]):
+    grid, path = grid_and_path
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    Image.fromarray(render_grid(grid)).save(tmp_path, format="PNG")
+    os.replace(tmp_path, path)
+
+
+def render_grids(grids: Iterable[str], out_dir: str, workers: int = None) -> Dict[str, str]:
+    """
+    Renders the images of all grids that do not have one in out_dir yet.
+
+    Args:
+        grids: the grids, may contain duplicates
+        out_dir: the directory of the grid images
+        workers: number of worker processes (defaults to RENDER_WORKERS)
+    Returns:
+        the path of the image of every grid
+    """
+    workers = RENDER_WORKERS if workers is None else workers
+    paths = {grid: os.path.join(out_dir, grid_file_name(grid)) for grid in grids}
+    missing = [(grid, path) for grid, path in paths.items() if not os.path.isfile(path)]
+    os.makedirs(out_dir, exist_ok=True)
+    if workers and len(missing) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_render_to_file, missing, chunksize=max(1, len(missing) // (4 * workers))))
+    else:
+        for grid_and_path in missing:
+            _render_to_file(grid_and_path)
+    return paths
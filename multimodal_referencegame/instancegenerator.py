@@ -9,15 +9,18 @@ import os
 import random
 from clemcore.clemgame import GameInstanceGenerator
 import shutil
-import matplotlib.pyplot as plt
 import json
 import logging
 
+from grid_renderer import render_grids
+
 random.seed(123)
 
 logger = logging.getLogger(__name__)
 
 MAX_NUMBER_INSTANCES = 30
+GRID_KEYS = ['player_1_target_grid', 'player_1_second_grid', 'player_1_third_grid',
+             'player_2_first_grid', 'player_2_second_grid', 'player_2_third_grid']
 
 class ReferenceGameInstanceGenerator(GameInstanceGenerator):
 
@@ -106,37 +109,8 @@ class ReferenceGameInstanceGenerator(GameInstanceGenerator):
         random_index = random.randint(0, len(images)-1)
         return images[random_index]
 
-    def plot_grid(self, grid, file_path):
-        fig, ax = plt.subplots()
-        ax.set_xticks([])
-        ax.set_yticks([])
-
-        for y in range(len(grid)):
-            for x in range(len(grid[y])):
-                if grid[y][x] == "▢":
-                    ax.add_patch(plt.Rectangle((x, -y - 1), 1, 1, facecolor="white", edgecolor="black"))
-                else:
-                    ax.add_patch(plt.Rectangle((x, -y - 1), 1, 1, facecolor="white", edgecolor="black"))
-                    ax.text(x + 0.5, -y - 0.5, grid[y][x], ha='center', va='center', color='black', fontsize=12)
-
-        ax.autoscale_view()
-        # plt.show()
-        plt.savefig(file_path)
-
-    def process_grid(self, saved_grids, grid):
-
-        if grid not in saved_grids:
-            ascii_grid = []
-            lines = grid.split('\n')
-            for l in lines:
-                line = l.split(' ')
-                ascii_grid.append(line)
-
-            file_path = os.path.join("resources", "grid_images", f"{len(saved_grids)}.png")
-            self.plot_grid(ascii_grid, file_path)
-
-            saved_grids[grid] = os.path.join("games", "multimodal_referencegame", file_path)
-        return saved_grids[grid]
+    def process_grid(self, grid_paths, grid):
+        return os.path.join("games", "multimodal_referencegame", grid_paths[grid])
 
     def generate_grid_instances(self):
         # GRID EXPERIMENT
@@ -144,11 +118,15 @@ class ReferenceGameInstanceGenerator(GameInstanceGenerator):
         player_b_prompt_header = self.load_template(os.path.join("resources", "initial_prompts", "player_b_prompt_images.template"))
 
         instances = {}
-        saved_grids = {}
 
         with open(os.path.join("resources", "ascii_game_instances.json")) as json_file:
             instances = json.load(json_file)
 
+        # render the images of all grids at once
+        grids = [instance[key] for exp in instances['experiments'] for instance in exp['game_instances']
+                 for key in GRID_KEYS]
+        grid_paths = render_grids(grids, os.path.join("resources", "grid_images"))
+
         for exp in instances['experiments']:
 
             game_counter = 0
@@ -158,13 +136,13 @@ class ReferenceGameInstanceGenerator(GameInstanceGenerator):
 
             for instance in exp['game_instances']:
 
-                player1_target_grid =self.process_grid(saved_grids, instance['player_1_target_grid'])
-                player_1_second_grid = self.process_grid(saved_grids, instance['player_1_second_grid'])
-                player_1_third_grid = self.process_grid(saved_grids, instance['player_1_third_grid'])
+                player1_target_grid =self.process_grid(grid_paths, instance['player_1_target_grid'])
+                player_1_second_grid = self.process_grid(grid_paths, instance['player_1_second_grid'])
+                player_1_third_grid = self.process_grid(grid_paths, instance['player_1_third_grid'])
 
-                player_2_first_grid = self.process_grid(saved_grids, instance['player_2_first_grid'])
-                player_2_second_grid = self.process_grid(saved_grids, instance['player_2_second_grid'])
-                player_2_third_grid = self.process_grid(saved_grids, instance['player_2_third_grid'])
+                player_2_first_grid = self.process_grid(grid_paths, instance['player_2_first_grid'])
+                player_2_second_grid = self.process_grid(grid_paths, instance['player_2_second_grid'])
+                player_2_third_grid = self.process_grid(grid_paths, instance['player_2_third_grid'])
 
                 game_instance = self.add_game_instance(experiment, game_counter)
 
@@ -10,6 +10,9 @@ from clemcore.clemgame import GameBenchmark, GameSpec
 from clemcore.clemgame.legacy.master import DialogueGameMaster
 from clemcore.clemgame.legacy.scorer import GameScorer
 
+from shared import image_cache
+from shared.response_patterns import ResponseMatcher, compile_pattern
+
 logger = logging.getLogger(__name__)
 
 
@@ -55,13 +58,14 @@ class MultimodalReferenceGameMaster(DialogueGameMaster):
 
     def _on_setup(self, **game_instance):
         self.game = MultimodalReferenceGame(game_instance)
+        self.response_matcher = ResponseMatcher()
         self.instruction_giver = InstructionGiver(self.player_models[0])
         self.instruction_follower = InstructionFollower(self.player_models[1])
         p1_initial_context = dict(role="user",
                                   content=self.game.player_1_prompt_header,
-                                  image=[self.game.player_1_first_image,
-                                         self.game.player_1_second_image,
-                                         self.game.player_1_third_image])
+                                  image=image_cache.prepare_all([self.game.player_1_first_image,
+                                                                 self.game.player_1_second_image,
+                                                                 self.game.player_1_third_image]))
         self.add_player(self.instruction_giver, initial_context=p1_initial_context)
         self.add_player(self.instruction_follower)
         self.terminate = False
@@ -79,7 +83,7 @@ class MultimodalReferenceGameMaster(DialogueGameMaster):
         """
         if player == self.instruction_giver:
             # Player 1 response validation
-            p1_match = re.compile(self.game.player_1_response_pattern, re.IGNORECASE).match(response)
+            p1_match = self.response_matcher.match(self.game.player_1_response_pattern, response, re.IGNORECASE)
             if p1_match and p1_match.group('remainder') == "":
                 return True
             self.terminate = True
@@ -93,7 +97,7 @@ class MultimodalReferenceGameMaster(DialogueGameMaster):
             # Game only has one round, so we terminate regardless of the response
             self.terminate = True
             # Player 2 response validation
-            p2_match = re.compile(self.game.player_2_response_pattern, re.IGNORECASE).match(response)
+            p2_match = self.response_matcher.match(self.game.player_2_response_pattern, response, re.IGNORECASE)
             if p2_match and p2_match.group('remainder') == "":
                 return True
             # abort the game if the output doesn't match the rule
@@ -113,13 +117,12 @@ class MultimodalReferenceGameMaster(DialogueGameMaster):
         """
         if player == self.instruction_giver:
             # Player 1 response parsing
-            p1_match = re.compile(self.game.player_1_response_pattern, re.IGNORECASE).match(response)
+            p1_match = self.response_matcher.match(self.game.player_1_response_pattern, response, re.IGNORECASE)
             if p1_match:
                 return response
         elif player == self.instruction_follower:
             # Player 2 response parsing
-            player_2_pattern = re.compile(self.game.player_2_response_pattern, re.IGNORECASE)
-            p2_match = re.match(player_2_pattern, response)
+            p2_match = self.response_matcher.match(self.game.player_2_response_pattern, response, re.IGNORECASE)
             if p2_match:
                 return p2_match.group('content').lower()  # return the label only
         return None
@@ -141,7 +144,7 @@ class MultimodalReferenceGameMaster(DialogueGameMaster):
                      self.game.player_2_third_image]
             self.set_context_for(self.instruction_follower,
                                  content=content,
-                                 image=image)
+                                 image=image_cache.prepare_all(image))
         else:
             if parsed_response in self.game.target_image_name:
                 self.log_to_self('parse_correct', parsed_response)
@@ -212,8 +215,8 @@ class MultimodalReferenceGameScorer(GameScorer):
             # TODO: move to game master for future runs
             p2_match = False
             if turn[5]['action']['type'] == "invalid format":
-                player_2_pattern = re.compile(self.player_2_response_pattern, re.IGNORECASE)
-                p2_match = re.match(player_2_pattern, turn[5]['action']['original_content'])
+                player_2_pattern = compile_pattern(self.player_2_response_pattern, re.IGNORECASE)
+                p2_match = player_2_pattern.match(turn[5]['action']['original_content'])
 
             if turn[5]['action']['type'] == "parse" or p2_match:
                 turn_parsed_request_count += 1
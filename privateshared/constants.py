@@ -16,6 +16,11 @@ SLOT_PATH = 'resources/texts/{}/slot_values.json'
 PROMPT_PATH = 'resources/initial_prompts/{}_{}'
 WORDS_PATH = 'resources/{}_words.json'
 
+# probing: issue the first try of all probes of a round at once (overridable per experiment)
+CONCURRENT_PROBING = False
+# number of probes sent at the same time to backends that cannot generate batches
+MAX_CONCURRENCY = 8
+
 # labels
 INVALID = 'NA'
 INVALID_LABEL = 2
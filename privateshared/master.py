@@ -3,14 +3,15 @@ A game to test the scorekeeping abilities of a model.
 Implementation of a game master that control the game mechanisms. 
 """
 import random
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional
 
 import numpy as np
 from sklearn.metrics import accuracy_score as acc_score
 from sklearn.metrics import cohen_kappa_score
 
 import clemcore.clemgame.metrics as ms
-from clemcore.backends import Model, CustomResponseModel
+from clemcore.backends import Model, CustomResponseModel, HumanModel
 from clemcore.clemgame import GameSpec, Player, GameBenchmark
 from clemcore.clemgame.legacy.master import DialogueGameMaster
 from clemcore.clemgame.legacy.scorer import GameScorer
@@ -18,7 +19,8 @@ import logging
 
 from constants import (
     PROBES_PATH, RETRIES_PATH, UPDATE, WORDS_PATH, REQUESTS_PATH,
-    INVALID_LABEL, INVALID, SUCCESS, NOT_SUCCESS, NOT_PARSED, RESULT)
+    INVALID_LABEL, INVALID, SUCCESS, NOT_SUCCESS, NOT_PARSED, RESULT, CONCURRENT_PROBING,
+    MAX_CONCURRENCY)
 
 logger = logging.getLogger(__name__)
 
@@ -119,6 +121,7 @@ class PrivateShared(DialogueGameMaster):
         self.words = Words(self.load_json(WORDS_PATH.format(game_instance['lang'])))  # load language specific words
         self.initial_prompt = game_instance['initial_prompt']
         self.all_probes: List[List[Dict]] = []
+        self.concurrent_probing: bool = self.experiment.get('concurrent_probing', CONCURRENT_PROBING)
         
         self.answerer: Answerer = Answerer(self.player_models[0], self.words)
         self.questioner: Questioner = Questioner(game_instance['request_order'],
@@ -288,10 +291,13 @@ class PrivateShared(DialogueGameMaster):
     def probe(self) -> Tuple[List[Dict], bool]:
         """Perform a round of probing."""
         probes = self._create_turn_probes()
+        first_tries = [None] * len(probes)
+        if self.concurrent_probing:
+            first_tries = self._generate_first_tries(probes)
         success_by_round = []
-        for probe in probes:
+        for probe, first_try in zip(probes, first_tries):
             # perform a probing loop, with retries up to maximum retries
-            answer, parsed_response, successful, tries = self._probing_loop(probe)
+            answer, parsed_response, successful, tries = self._probing_loop(probe, first_try)
             # add results to the probe object
             probe['answer'] = answer
             probe['value'] = self._convert_response(parsed_response)
@@ -305,17 +311,42 @@ class PrivateShared(DialogueGameMaster):
             self.played_probing_rounds += 1
         return probes, probing_successful
 
-    def _probing_loop(self, probe: Dict) -> Tuple[str, str, bool, int]:
+    def _generate_first_tries(self, probes: List[Dict]) -> List[Optional[Tuple]]:
+        """
+        Generate the answers to the first try of all probes of a round at once.
+        The probes are independent of each other and share the (non-memorized) dialogue so far, so they are
+        sent as one batch if the backend supports it, and otherwise concurrently. Nothing is logged here: the
+        answers are consumed by _probing_loop in the original order, only retries are generated sequentially.
+
+        Returns:
+            A (prompt, response_object, response_text) tuple per probe, or None to generate it in _probing_loop.
+        """
+        model = self.answerer.model
+        if isinstance(model, (CustomResponseModel, HumanModel)):
+            return [None] * len(probes)  # no backend request to save
+        perspectives = [self.answerer.get_perspective()
+                        + [dict(role="user", content=self._get_probe_content(probe['question'], 1))]
+                        for probe in probes]
+        if model.supports_batching():
+            return model.generate_batch_response(perspectives)
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(perspectives))) as executor:
+            return list(executor.map(model.generate_response, perspectives))
+
+    def _probing_loop(self, probe: Dict, first_try: Optional[Tuple] = None) -> Tuple[str, str, bool, int]:
         """
         Perform a probing round until valid response or max attempts.
         Questions from the probing are *not* added to the message history ("memorized").
+        An already generated answer to the first try can be given, it is then logged instead of asking again.
         """
         tries = 1
         successful = False
         while tries <= len(self.retries):
             question = self._get_probe_content(probe['question'], tries)
             context = dict(role="user", content=question)
-            answer = self.answerer(context, memorize=False)
+            if tries == 1 and first_try is not None:
+                answer = self._perceive_generated(context, *first_try)
+            else:
+                answer = self.answerer(context, memorize=False)
             self.request_counts[self.current_round] += 1  # requests to the answerer per round
             parsed_response = self._parse_probing_response(answer)
             self.log_to_self("parse", parsed_response)
@@ -327,6 +358,13 @@ class PrivateShared(DialogueGameMaster):
             tries += 1
         return answer, parsed_response, successful, tries
 
+    def _perceive_generated(self, context: Dict, prompt, response_object, response_text: str) -> str:
+        """Let the answerer perceive an already generated (non-memorized) answer, as if it was asked just now."""
+        self.answerer.perceive_context(context, memorize=False)
+        self.answerer.perceive_response(response_text, memorize=False,
+                                        metadata=dict(prompt=prompt, response_object=response_object))
+        return response_text
+
     def _get_probe_content(self, question: str, tries: int) -> str:
         return question[:].replace(self.words.me, f'{self.words.me}{self.retries[tries - 1]} ')
 
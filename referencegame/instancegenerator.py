@@ -10,10 +10,12 @@ Creates instances_{version}_{lang}.json in in/
 
 import logging
 import os
-import Levenshtein # to calculate distance between grids
+
+import numpy as np
 
 from clemcore.clemgame import GameInstanceGenerator
 
+from referencegame.resources.grid_distances import cached_distances, nearest_distractors
 from referencegame.resources.localization_utils import MULTILINGUAL_PATTERNS
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,7 @@ VERSION = "v3.0"
 GRIDS = "resources/grids_v3.0.json"
 P1_MODE = "strict"  # "liberal"
 P2_MODE = "strict"  # "liberal"
+DISTANCE_METRIC = "levenshtein"  # "hamming" (see resources/grid_distances.py)
 # modes relate to regex parsing:
 #         Strict parsing mode:
 #         - "remainder" should be "" (checked by game master)
@@ -29,74 +32,40 @@ P2_MODE = "strict"  # "liberal"
 #         - "remainder" doesn't have to be empty (checked by game master)
 
 
-def generate_samples(grids):
+def generate_samples(grids, name="grids"):
     """
     Generate triplets from grids
     :param grids: list of string grid representations
+    :param name: name of the grid group (prefix of its cached distance matrix)
     :return: list of triplets where the first is the target and the following two are distractors
     """
     samples = []
     # calculate edit distance between grids
-    edit_distances = get_distances(grids)
+    edit_distances = get_distances(grids, name)
     # select distractors with smallest edit distance
-    for target_grid_id in range(len(grids)):
-        second_grid_id, third_grid_id = select_distractors(target_grid_id, edit_distances)
+    for target_grid_id, (second_grid_id, third_grid_id) in enumerate(nearest_distractors(edit_distances).tolist()):
         samples.append((grids[target_grid_id], grids[second_grid_id], grids[third_grid_id]))
     return samples
 
 
-def get_distances(grids):
+def get_distances(grids, name="grids"):
     """
     Calculate edit distances to select similar distractors
     :param grids: list of string grid representations
+    :param name: name of the grid group (prefix of its cached distance matrix)
     :return: matrix of edit distances with ids corresponding to grids (the full matrix is filled for easier access to distances per grid)
     """
-    distances = []
-    for i in range(len(grids)):
-        i_distances = []
-        for j in range(len(grids)):
-            if i == j:
-                i_distances.append(0)
-            else:
-                i_distances.append(Levenshtein.distance(grids[i], grids[j]))
-        distances.append(i_distances)
-    return distances
-
-
-def select_distractors(target_grid: int, distances: list):
+    return cached_distances(grids, DISTANCE_METRIC, name)
+
+
+def select_distractors(target_grid: int, distances):
     """
     Select two most similar distractors for the given target
     :param target_grid: id of the target grid in corresponding distance matrix
     :param distances: matrix of distances between grid ids
     :return: ids of two distractor grids
     """
-    id1 = None
-    id2 = None
-    min_distance = 1
-    distance_list = distances[target_grid]
-    found1 = False
-    found2 = False
-    while not found2:
-        # iterate through list of distances,
-        # increasing the distance with every iteration
-        # to find the two lowest distances and return their ids
-        if min_distance in distance_list:
-            if not found1:
-                # save id of lowest distance
-                id1 = distance_list.index(min_distance)
-                found1 = True
-            elif id1 != distance_list.index(min_distance):
-                # save id of next lowest distance if id1 is already found
-                id2 = distance_list.index(min_distance)
-                found2 = True
-            elif min_distance in distance_list[id1 + 1:]:
-                # or save next id of same lowest distance as id1 if it exists
-                id2 = distance_list.index(min_distance, id1 + 1)
-                found2 = True
-            else:
-                min_distance += 1
-        else:
-            min_distance += 1
+    id1, id2 = nearest_distractors(np.asarray(distances)[[target_grid]])[0].tolist()
     return id1, id2
 
 
@@ -119,7 +88,8 @@ class ReferenceGameInstanceGenerator(GameInstanceGenerator):
         # generate sub experiments
         for grids_group in grids.keys():
             # get triplets
-            samples = generate_samples(grids[grids_group])
+            samples = generate_samples(grids[grids_group],
+                                       f"{os.path.splitext(os.path.basename(GRIDS))[0]}_{grids_group}")
 
             player_a_prompt_header = self.load_template(f"resources/initial_prompts/"
                                                         f"{self.lang}/player_a_prompt_header.template")
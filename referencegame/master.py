@@ -12,6 +12,8 @@ from clemcore.clemgame.legacy.master import DialogueGameMaster
 
 import re
 
+from shared.response_patterns import ResponseMatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -61,6 +63,7 @@ class ReferenceGameMaster(DialogueGameMaster):
 
     def _on_setup(self, **game_instance):
         self.game = ReferenceGame(game_instance)
+        self.response_matcher = ResponseMatcher()
         self.instruction_giver = InstructionGiver(self.player_models[0])
         self.instruction_follower = InstructionFollower(self.player_models[1])
         p1_initial_prompt = self.game.player_1_prompt_header
@@ -80,7 +83,7 @@ class ReferenceGameMaster(DialogueGameMaster):
         """
         if player == self.instruction_giver:
             # Player 1 response validation
-            p1_match = re.compile(self.game.player_1_response_pattern, re.IGNORECASE).match(response)
+            p1_match = self.response_matcher.match(self.game.player_1_response_pattern, response, re.IGNORECASE)
             if p1_match:
                 if (self.game.p1_mode == "liberal"
                         or (self.game.p1_mode == "strict" and p1_match.group('remainder') == "")):
@@ -94,7 +97,7 @@ class ReferenceGameMaster(DialogueGameMaster):
             # Game only has one round, so we terminate regardless of the response
             self.game.terminate = True
             # Player 2 response validation
-            p2_match = re.compile(self.game.player_2_response_pattern, re.IGNORECASE).match(response)
+            p2_match = self.response_matcher.match(self.game.player_2_response_pattern, response, re.IGNORECASE)
             if p2_match:
                 if (self.game.p2_mode == "liberal"
                         or (self.game.p2_mode == "strict" and p2_match.group('remainder') == "")):
@@ -115,13 +118,12 @@ class ReferenceGameMaster(DialogueGameMaster):
         """
         if player == self.instruction_giver:
             # Player 1 response parsing
-            p1_match = re.compile(self.game.player_1_response_pattern, re.IGNORECASE).match(response)
+            p1_match = self.response_matcher.match(self.game.player_1_response_pattern, response, re.IGNORECASE)
             if p1_match:
                 return response
         elif player == self.instruction_follower:
             # Player 2 response parsing
-            player_2_pattern = re.compile(self.game.player_2_response_pattern, re.IGNORECASE)
-            p2_match = re.match(player_2_pattern, response)
+            p2_match = self.response_matcher.match(self.game.player_2_response_pattern, response, re.IGNORECASE)
             if p2_match:
                 return p2_match.group('response').lower()  # return the label only
         return None
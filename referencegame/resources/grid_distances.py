@@ -0,0 +1,119 @@
+"""
+Distance matrices between grids for the referencegame distractor selection
+
+The edit distance matrix of all grids of a group is computed at once (rapidfuzz, which the Levenshtein
+package is built on, fills it in C) instead of pair by pair. For grids of the same shape, the number of
+differing cells (Hamming distance) can be used instead, computed with NumPy.
+Matrices are cached on disk, keyed by the content of the grids, so they are only computed once per grid file version.
+"""
+
+import hashlib
+import logging
+import os
+
+import numpy as np
+from rapidfuzz.distance import Levenshtein
+from rapidfuzz.process import cdist
+
+logger = logging.getLogger(__name__)
+
+# "levenshtein": edit distance between the grid strings (used for all instance versions so far)
+# "hamming": number of differing cells, only for grids of the same shape (falls back to "levenshtein" otherwise)
+METRICS = ["levenshtein", "hamming"]
+DISTANCE_CACHE_DIR = os.environ.get("CLEMBENCH_DISTANCE_CACHE",
+                                    os.path.join(os.path.expanduser("~"), ".cache", "clembench", "referencegame"))
+# number of grids compared at once in the Hamming computation (bounds the memory to block x n_grids x n_cells)
+HAMMING_BLOCK_SIZE = 256
+
+
+def grid_cells(grids: list):
+    """
+    Split grids into their cells
+    :param grids: list of string grid representations
+    :return: array of cell ids (n_grids x n_cells), or None if the grids do not all have the same number of cells
+    """
+    cells = [grid.split() for grid in grids]
+    if not cells or len({len(grid_cells) for grid_cells in cells}) != 1:
+        return None
+    symbols = {}
+    return np.array([[symbols.setdefault(cell, len(symbols)) for cell in grid_cells] for grid_cells in cells],
+                    dtype=np.int32)
+
+
+def levenshtein_matrix(grids: list) -> np.ndarray:
+    """
+    :param grids: list of string grid representations
+    :return: matrix of edit distances between all grids
+    """
+    return cdist(grids, grids, scorer=Levenshtein.distance, dtype=np.int32, workers=-1)
+
+
+def hamming_matrix(cells: np.ndarray) -> np.ndarray:
+    """
+    :param cells: array of cell ids as returned by grid_cells
+    :return: matrix of the number of differing cells between all grids
+    """
+    distances = np.empty((len(cells), len(cells)), dtype=np.int32)
+    for start in range(0, len(cells), HAMMING_BLOCK_SIZE):
+        block = cells[start:start + HAMMING_BLOCK_SIZE]
+        distances[start:start + len(block)] = (block[:, None, :] != cells[None, :, :]).sum(axis=2)
+    return distances
+
+
+def compute_distances(grids: list, metric: str = "levenshtein") -> np.ndarray:
+    """
+    :param grids: list of string grid representations
+    :param metric: one of METRICS
+    :return: matrix of distances with ids corresponding to grids
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown grid distance metric '{metric}', expected one of {METRICS}")
+    if metric == "hamming":
+        cells = grid_cells(grids)
+        if cells is not None:
+            return hamming_matrix(cells)
+        logger.warning("Grids differ in shape, using the edit distance instead of the Hamming distance")
+    return levenshtein_matrix(grids)
+
+
+def cached_distances(grids: list, metric: str = "levenshtein", name: str = "grids") -> np.ndarray:
+    """
+    Load the distance matrix of the given grids from the disk cache, or compute and store it
+    :param grids: list of string grid representations
+    :param metric: one of METRICS
+    :param name: readable prefix of the cache file (e.g. grid file and group), the content of the grids is part of the key
+    :return: matrix of distances with ids corresponding to grids
+    """
+    digest = hashlib.sha1("\0".join([metric] + list(grids)).encode("utf-8")).hexdigest()
+    cache_path = os.path.join(DISTANCE_CACHE_DIR, f"{name}_{metric}_{digest[:16]}.npy")
+    if os.path.isfile(cache_path):
+        return np.load(cache_path)
+    distances = compute_distances(grids, metric)
+    try:
+        os.makedirs(DISTANCE_CACHE_DIR, exist_ok=True)
+        # write to a temporary file first, so that a cache file is always complete
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+        np.save(tmp_path, distances)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache the grid distances in %s: %s", DISTANCE_CACHE_DIR, e)
+    return distances
+
+
+def nearest_distractors(distances: np.ndarray, k: int = 2) -> np.ndarray:
+    """
+    Select the k most similar distractors for every grid
+    Grids with distance 0 (the grid itself and duplicates) are no distractors; ties are broken by the lower id.
+    :param distances: matrix of distances between grid ids (or some of its rows)
+    :param k: number of distractors per grid
+    :return: array of distractor ids (n_grids x k), ordered by distance
+    """
+    distances = np.asarray(distances, dtype=np.int64)
+    n_grids = distances.shape[1]
+    if ((distances > 0).sum(axis=1) < k).any():
+        raise ValueError(f"Every grid needs at least {k} different grids to select distractors from")
+    # one unique key per candidate: its distance, then its id
+    keys = np.where(distances > 0, distances * n_grids + np.arange(n_grids), np.iinfo(np.int64).max)
+    candidates = np.argpartition(keys, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(keys, candidates, axis=1), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
@@ -0,0 +1,4 @@
+"""
+Modules shared by several games (imported as `shared.<module>`, with the repository root on the python path, see
+prepare_path.sh).
+"""
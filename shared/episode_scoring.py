@@ -0,0 +1,97 @@
+"""
+Event-dispatch scorer base of the games that score their episodes event by event (matchit, cloudgame, guesswhat).
+
+An EventScorer goes through the episode once: every event is passed to the handler of its action type, the request
+counts of the turn are logged at its end and added to running episode totals, and the episode scores are logged
+once, after the last turn. Scoring an episode is linear in its number of events.
+"""
+from typing import Callable, Dict, Optional
+
+from clemcore.clemgame.legacy.scorer import GameScorer
+from clemcore.clemgame.metrics import METRIC_ABORTED, METRIC_SUCCESS, METRIC_LOSE, METRIC_REQUEST_COUNT, \
+    METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT_VIOLATED
+
+# request metrics in the order they are logged
+REQUEST_METRICS = [METRIC_REQUEST_COUNT_VIOLATED, METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT]
+
+
+class RequestCounts:
+    """Request counts of the current turn (`turn`, keyed by REQUEST_METRICS) and running totals of the episode."""
+
+    def __init__(self):
+        self.turn: Dict[str, int] = dict.fromkeys(REQUEST_METRICS, 0)
+        self.episode: Dict[str, int] = dict.fromkeys(REQUEST_METRICS, 0)
+
+    def start_turn(self):
+        self.turn = dict.fromkeys(REQUEST_METRICS, 0)
+
+    def end_turn(self):
+        for metric, count in self.turn.items():
+            self.episode[metric] += count
+
+    def parsed(self):
+        self.turn[METRIC_REQUEST_COUNT_PARSED] += 1
+        self.turn[METRIC_REQUEST_COUNT] += 1
+
+    def violated(self):
+        self.turn[METRIC_REQUEST_COUNT_VIOLATED] += 1
+        self.turn[METRIC_REQUEST_COUNT] += 1
+
+
+class EventScorer(GameScorer):
+    """
+    Scores an episode in one pass over its events.
+
+    Subclasses map action types to handlers in `event_handlers` (events of other types go to `on_other_event`) and
+    log their scores in the hooks; `on_turn_end` logs the request counts of the turn (call `log_turn_requests` where
+    they belong among the other turn scores when overriding it).
+    """
+
+    def __init__(self, game_name: str, experiment: Dict, game_instance: Dict):
+        super().__init__(game_name, experiment, game_instance)
+        self.requests = RequestCounts()
+        # the event before the current one in the current turn
+        self.previous_event: Optional[Dict] = None
+        self.event_handlers: Dict[str, Callable[[Dict], None]] = {}
+
+    def compute_scores(self, episode_interactions: Dict) -> None:
+        self.on_episode_start(episode_interactions)
+        for turn_idx, turn in enumerate(episode_interactions["turns"]):
+            self.requests.start_turn()
+            self.previous_event = None
+            self.on_turn_start(turn_idx)
+            for event in turn:
+                self.event_handlers.get(event["action"]["type"], self.on_other_event)(event)
+                self.previous_event = event
+            self.on_turn_end(turn_idx)
+            self.requests.end_turn()
+        self.on_episode_end()
+
+    def on_episode_start(self, episode_interactions: Dict):
+        pass
+
+    def on_turn_start(self, turn_idx: int):
+        pass
+
+    def on_other_event(self, event: Dict):
+        pass
+
+    def on_turn_end(self, turn_idx: int):
+        self.log_turn_requests(turn_idx)
+
+    def on_episode_end(self):
+        pass
+
+    def log_turn_requests(self, turn_idx: int):
+        for metric in REQUEST_METRICS:
+            self.log_turn_score(turn_idx, metric, self.requests.turn[metric])
+
+    def log_episode_requests(self):
+        for metric in REQUEST_METRICS:
+            self.log_episode_score(metric, self.requests.episode[metric])
+
+    def log_outcome(self, aborted: bool, success: bool):
+        """Logs the aborted, success and lose scores (success and lose are 0 if aborted)."""
+        self.log_episode_score(METRIC_ABORTED, int(aborted))
+        self.log_episode_score(METRIC_SUCCESS, int(success and not aborted))
+        self.log_episode_score(METRIC_LOSE, int(not success and not aborted))
@@ -0,0 +1,96 @@
+"""
+Graph similarity of the MapWorld graph games (textmapworld_graphreasoning, mm_mapworld_graphs).
+
+The similarity is based on the graph edit distance with uniform costs and without node labels, so it only depends
+on the structure of the graphs. Distances are cached by the Weisfeiler-Lehman hashes of both graphs (verified by an
+isomorphism check, as different graphs may share a hash): models often send the same graph again.
+Small graphs get the exact distance; for larger ones the best upper bound found within a time budget is used, the
+search stops early once it reaches the lower bound.
+"""
+import time
+import warnings
+from collections import OrderedDict
+from typing import List, Tuple
+
+import networkx as nx
+import numpy as np
+
+# graphs with at most this number of nodes get the exact edit distance
+EXACT_MAX_NODES = 8
+# time budget (in seconds) of the edit distance search for larger graphs
+SIMILARITY_TIMEOUT = 10.0
+# number of (graph, graph) hash pairs kept in the cache
+CACHE_SIZE = 4096
+
+
+def normalize(distance):
+    normalized_distance = 1 / (1 + np.exp(-0.5 * distance))
+    normalized_distance = 2 * (normalized_distance - 0.5)
+    return normalized_distance
+
+
+def canonical_hash(graph: nx.Graph) -> str:
+    with warnings.catch_warnings():
+        # the hashes are only compared within one process, changes of the hash function across versions do not matter
+        warnings.simplefilter("ignore", UserWarning)
+        return nx.weisfeiler_lehman_graph_hash(graph)
+
+
+def distance_lower_bound(graph1: nx.Graph, graph2: nx.Graph) -> int:
+    """Every edit operation changes the number of nodes or the number of edges by at most one."""
+    return (abs(graph1.number_of_nodes() - graph2.number_of_nodes())
+            + abs(graph1.number_of_edges() - graph2.number_of_edges()))
+
+
+def distance_upper_bound(graph1: nx.Graph, graph2: nx.Graph) -> int:
+    """Cost of substituting the nodes of the smaller graph, deleting all edges and inserting the missing parts."""
+    return (abs(graph1.number_of_nodes() - graph2.number_of_nodes())
+            + graph1.number_of_edges() + graph2.number_of_edges())
+
+
+class GraphSimilarity:
+
+    def __init__(self, exact_max_nodes: int = EXACT_MAX_NODES, timeout: float = SIMILARITY_TIMEOUT,
+                 cache_size: int = CACHE_SIZE):
+        self.exact_max_nodes = exact_max_nodes
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Tuple[str, str], List[Tuple[nx.Graph, nx.Graph, float]]] = OrderedDict()
+
+    def edit_distance(self, graph1: nx.Graph, graph2: nx.Graph) -> float:
+        key = (canonical_hash(graph1), canonical_hash(graph2))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            for cached1, cached2, distance in self._cache[key]:
+                if nx.is_isomorphic(graph1, cached1) and nx.is_isomorphic(graph2, cached2):
+                    return distance
+        if key[0] == key[1] and nx.is_isomorphic(graph1, graph2):
+            distance = 0.
+        else:
+            distance = self._compute(graph1, graph2)
+        self._cache.setdefault(key, []).append((graph1.copy(), graph2.copy(), distance))
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return distance
+
+    def _compute(self, graph1: nx.Graph, graph2: nx.Graph) -> float:
+        if max(graph1.number_of_nodes(), graph2.number_of_nodes()) <= self.exact_max_nodes:
+            return nx.graph_edit_distance(graph1, graph2)
+        lower = distance_lower_bound(graph1, graph2)
+        best = distance_upper_bound(graph1, graph2)
+        deadline = time.monotonic() + self.timeout
+        for _, _, cost in nx.optimize_edit_paths(graph1, graph2, upper_bound=best, timeout=self.timeout):
+            best = min(best, cost)
+            if best <= lower or time.monotonic() > deadline:
+                break
+        return best
+
+    def similarity(self, graph1: nx.Graph, graph2: nx.Graph) -> float:
+        return 1 - normalize(self.edit_distance(graph1, graph2))
+
+
+_similarity = GraphSimilarity()
+
+
+def calculate_similarity(graph1: nx.Graph, graph2: nx.Graph) -> float:
+    return _similarity.similarity(graph1, graph2)
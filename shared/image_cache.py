@@ -0,0 +1,95 @@
+"""
+Preprocessing cache for the images sent to multimodal models (mm_mapworld_*, cloudgame, multimodal_referencegame).
+
+Downscaling is off by default, so that the models get the original images and results stay comparable with earlier
+runs; set CLEMBENCH_MAX_IMAGE_SIDE to a positive value to turn it on. Images larger than MAX_IMAGE_SIDE are then
+downscaled once and stored on disk under a name derived from the content of the original image and the preprocessing
+settings, so that every process and run reuses them. The players then get the path of the (small) cached image, or
+its data URL if IMAGE_PAYLOAD is "data_url"; data URLs are kept in a per-process LRU cache, so that rooms visited
+again are not read and encoded again.
+"""
+import base64
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+
+try:
+    from PIL import Image
+except ImportError:  # without Pillow the original images are sent
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# longest side (in pixels) of the images sent to the models; 0 (default) sends the original images
+MAX_IMAGE_SIDE = int(os.environ.get("CLEMBENCH_MAX_IMAGE_SIDE", 0))
+JPEG_QUALITY = int(os.environ.get("CLEMBENCH_JPEG_QUALITY", 85))
+IMAGE_CACHE_DIR = os.environ.get("CLEMBENCH_IMAGE_CACHE",
+                                 os.path.join(os.path.expanduser("~"), ".cache", "clembench", "images"))
+# "path" passes the path of the cached image to the backend, "data_url" the base64-encoded image itself
+IMAGE_PAYLOAD = os.environ.get("CLEMBENCH_IMAGE_PAYLOAD", "path")
+
+
+def _is_local(image: str) -> bool:
+    return not image.startswith(("http://", "https://", "data:")) and os.path.isfile(image)
+
+
+@lru_cache(maxsize=4096)
+def _prepared_path(image_path: str, mtime: float, size: int) -> Optional[str]:
+    with open(image_path, "rb") as f:
+        content = f.read()
+    with Image.open(io.BytesIO(content)) as image:
+        if max(image.size) <= MAX_IMAGE_SIDE:
+            return None
+        image_format = "JPEG" if image.format == "JPEG" else "PNG"
+        settings = f"{MAX_IMAGE_SIDE}-{JPEG_QUALITY}" if image_format == "JPEG" else str(MAX_IMAGE_SIDE)
+        digest = hashlib.sha1(content + settings.encode()).hexdigest()
+        cached_path = os.path.join(IMAGE_CACHE_DIR, digest[:2], f"{digest}.{image_format.lower()}")
+        if not os.path.isfile(cached_path):
+            image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            # write to a temporary file first, processes scoring or playing in parallel may prepare the same image
+            tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+            if image_format == "JPEG":
+                image.convert("RGB").save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True)
+            else:
+                image.save(tmp_path, "PNG", optimize=True)
+            os.replace(tmp_path, cached_path)
+    return cached_path
+
+
+def prepared_path(image: str) -> str:
+    """Returns the path of the downscaled version of a local image (or the image itself if nothing is to be done)."""
+    if Image is None or not MAX_IMAGE_SIDE or not _is_local(image):
+        return image
+    stat = os.stat(image)
+    try:
+        return _prepared_path(os.path.abspath(image), stat.st_mtime, stat.st_size) or image
+    except OSError as e:
+        logger.warning("Could not preprocess image %s, sending the original: %s", image, e)
+        return image
+
+
+@lru_cache(maxsize=256)
+def _data_url(image_path: str, mtime: float) -> str:
+    mime_type = mimetypes.guess_type(image_path)[0] or "image/jpeg"
+    with open(image_path, "rb") as f:
+        return f"data:{mime_type};base64,{base64.b64encode(f.read()).decode('utf-8')}"
+
+
+def prepare(image: str) -> str:
+    """Returns what to send to the backend for an image."""
+    path = prepared_path(image)
+    if IMAGE_PAYLOAD == "data_url" and _is_local(path):
+        return _data_url(path, os.stat(path).st_mtime)
+    return path
+
+
+def prepare_all(images: Union[str, List[str], Tuple[str, ...]]) -> Union[str, List[str]]:
+    """Applies prepare to a single image or to each image of a list."""
+    if isinstance(images, str):
+        return prepare(images)
+    return [prepare(image) for image in images]
@@ -0,0 +1,160 @@
+"""
+Batch map generation of the MapWorld games (mm_mapworld_* and textmapworld_*).
+
+A map is a random walk on an n x m grid that stops once it has visited n_rooms rooms. Maps that have to be
+cycle-free are rejected as soon as the walk closes a cycle (instead of after the full walk), and as the walk
+is connected, a map has a cycle exactly if it has at least as many edges as rooms. The walks are run in chunks
+of attempts across a pool of worker processes; every chunk has its own seed, derived from the generation seed
+and the chunk number, and the chunks are merged in order, so the maps only depend on the seed and not on the
+number of workers. Maps that are translations of each other are duplicates.
+"""
+import hashlib
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+# number of worker processes generating the maps; 0 generates them in the calling process
+GENERATION_WORKERS = min(4, os.cpu_count() or 1)
+# random walks per chunk (unit of work of a worker)
+CHUNK_ATTEMPTS = 2000
+# random walks per requested map after which the generation gives up
+MAX_ATTEMPTS_PER_MAP = 10000
+
+STEPS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+Node = Tuple[int, int]
+Edge = Tuple[Node, Node]
+GridMap = Tuple[List[Node], List[Edge]]
+
+
+def random_walk_map(n: int, m: int, n_rooms: int, rng: random.Random, cycle: Optional[bool] = None) \
+        -> Optional[GridMap]:
+    """
+    Walks randomly over the grid until n_rooms rooms are visited.
+
+    Args:
+        cycle: True if the map must contain a cycle, False if it must not, None if it does not matter
+    Returns:
+        the rooms in the order of their first visit and the edges (in networkx order), or None if the map
+        does not fulfill the cycle constraint
+    """
+    if n * m < n_rooms:
+        raise ValueError('n*m must be larger than n_rooms')
+    current = (rng.randrange(n), rng.randrange(m))
+    nodes = [current]
+    visited = {current}
+    edges = set()
+    while len(nodes) < n_rooms:
+        dx, dy = rng.choice(STEPS)
+        new = (current[0] + dx, current[1] + dy)
+        if not (0 <= new[0] < n and 0 <= new[1] < m):
+            # illegal move
+            continue
+        if new not in visited:
+            nodes.append(new)
+            visited.add(new)
+            edges.add((current, new))
+        elif (current, new) not in edges and (new, current) not in edges:
+            if cycle is False:
+                # the walk closes a cycle
+                return None
+            edges.add((current, new))
+        current = new
+    if cycle and len(edges) < len(nodes):
+        return None
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from(edges)
+    return nodes, list(graph.edges())
+
+
+def canonical_hash(grid_map: GridMap) -> str:
+    """Hash of the edges of a map moved to the origin, so that translated maps have the same hash."""
+    nodes, edges = grid_map
+    min_x = min(node[0] for node in nodes)
+    min_y = min(node[1] for node in nodes)
+    normalized = sorted(tuple(sorted(((a[0] - min_x, a[1] - min_y), (b[0] - min_x, b[1] - min_y))))
+                        for a, b in edges)
+    if not normalized:
+        normalized = [((nodes[0][0] - min_x, nodes[0][1] - min_y),)]
+    return hashlib.sha1(repr(normalized).encode()).hexdigest()
+
+
+def _chunk_seed(seed: int, chunk: int) -> int:
+    return int(np.random.SeedSequence([seed, chunk]).generate_state(1)[0])
+
+
+def diameter(grid_map: GridMap) -> int:
+    graph = nx.Graph()
+    graph.add_nodes_from(grid_map[0])
+    graph.add_edges_from(grid_map[1])
+    return nx.diameter(graph)
+
+
+def _generate_chunk(n: int, m: int, n_rooms: int, cycle: Optional[bool], min_diameter: int, seed: int,
+                    chunk: int) -> List[GridMap]:
+    rng = random.Random(_chunk_seed(seed, chunk))
+    maps = []
+    for _ in range(CHUNK_ATTEMPTS):
+        grid_map = random_walk_map(n, m, n_rooms, rng, cycle)
+        if grid_map is not None and (not min_diameter or diameter(grid_map) >= min_diameter):
+            maps.append(grid_map)
+    return maps
+
+
+def generate_maps(n: int, m: int, n_rooms: int, count: int, cycle: Optional[bool] = None, min_diameter: int = 0,
+                  seed: int = 0, workers: int = None) -> List[GridMap]:
+    """
+    Generates count unique maps for one (grid, rooms, cycle) configuration.
+
+    Args:
+        min_diameter: only maps with two rooms at least this far apart (and so rooms at every distance up to it)
+        workers: number of worker processes (defaults to GENERATION_WORKERS)
+    Raises:
+        ValueError: if not enough unique maps are found within MAX_ATTEMPTS_PER_MAP random walks per map
+    """
+    if n * m < n_rooms:
+        raise ValueError('n*m must be larger than n_rooms')
+    workers = GENERATION_WORKERS if workers is None else workers
+    max_chunks = math.ceil(count * MAX_ATTEMPTS_PER_MAP / CHUNK_ATTEMPTS)
+    generate_chunk = partial(_generate_chunk, n, m, n_rooms, cycle, min_diameter, seed)
+    unique = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+    try:
+        for first_chunk in range(0, max_chunks, max(workers, 1)):
+            chunks = range(first_chunk, min(first_chunk + max(workers, 1), max_chunks))
+            results = executor.map(generate_chunk, chunks) if executor else map(generate_chunk, chunks)
+            for maps in results:
+                for grid_map in maps:
+                    unique.setdefault(canonical_hash(grid_map), grid_map)
+            if len(unique) >= count:
+                return list(unique.values())[:count]
+    finally:
+        if executor:
+            executor.shutdown()
+    raise ValueError(f"Could only generate {len(unique)} of {count} unique maps with {n_rooms} rooms "
+                     f"on a {n}x{m} grid (cycle={cycle})")
+
+
+def save_maps(maps: List[GridMap], path: str):
+    """Stores the maps as compact edge lists, one JSON object per line."""
+    with open(path, "w", encoding="utf-8") as f:
+        for nodes, edges in maps:
+            f.write(json.dumps({"nodes": nodes, "edges": edges}, separators=(",", ":")) + "\n")
+
+
+def load_maps(path: str) -> List[GridMap]:
+    maps = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stored = json.loads(line)
+            maps.append(([tuple(node) for node in stored["nodes"]],
+                         [(tuple(a), tuple(b)) for a, b in stored["edges"]]))
+    return maps
@@ -0,0 +1,69 @@
+"""
+Shared graph type of the MapWorld games (mm_mapworld_* and textmapworld_*).
+
+The instances list the (directed) edges of a map; the graph indexes them once per node, so that the moves,
+neighbours and the room reached in a direction are dictionary lookups instead of scans over all edges.
+"""
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+CARDINAL_TO_DELTA = {
+    'north': (0, 1),
+    'south': (0, -1),
+    'east': (1, 0),
+    'west': (-1, 0)
+}
+DELTA_TO_CARDINAL = {delta: cardinal for cardinal, delta in CARDINAL_TO_DELTA.items()}
+
+
+def edge_to_delta(edge: Tuple[Tuple[int, int], Tuple[int, int]]) -> Tuple[int, int]:
+    return edge[1][0] - edge[0][0], edge[1][1] - edge[0][1]
+
+
+def detect_loop(visited_nodes: List[Hashable]) -> bool:
+    """A loop is detected if the last four visited rooms contain less than three different rooms."""
+    if len(visited_nodes) >= 4:
+        if len(set(visited_nodes[-4:])) < 3:
+            return True
+    return False
+
+
+class MapGraph:
+    """
+    Args:
+        nodes: the rooms of the map
+        edges: the (directed) moves of the map as (from_node, to_node) pairs
+        directions: for every room the available directions and the rooms they lead to, in the order they are
+            presented to the players; derived from the coordinates if the rooms are grid positions
+    """
+
+    def __init__(self, nodes: Iterable[Hashable], edges: Iterable[Tuple[Hashable, Hashable]],
+                 directions: Dict[Hashable, List[Tuple[str, Hashable]]] = None):
+        self.nodes = list(nodes)
+        self.edges = [tuple(edge) for edge in edges]
+        self.edge_set = set(self.edges)
+        self.moves: Dict[Hashable, List[Tuple[Hashable, Hashable]]] = {node: [] for node in self.nodes}
+        for edge in self.edges:
+            self.moves.setdefault(edge[0], []).append(edge)
+        self.neighbors: Dict[Hashable, Set[Hashable]] = {node: {edge[1] for edge in moves}
+                                                         for node, moves in self.moves.items()}
+        if directions is None:
+            directions = {node: [(DELTA_TO_CARDINAL[edge_to_delta(edge)], edge[1]) for edge in moves]
+                          for node, moves in self.moves.items()}
+        self.directions: Dict[Hashable, Dict[str, Hashable]] = {node: dict(node_directions)
+                                                                 for node, node_directions in directions.items()}
+
+    def available_moves(self, node: Hashable) -> List[Tuple[Hashable, Hashable]]:
+        return self.moves.get(node, [])
+
+    def adj(self, node: Hashable) -> Set[Hashable]:
+        return self.neighbors.get(node, set())
+
+    def available_directions(self, node: Hashable) -> List[str]:
+        return list(self.directions.get(node, {}))
+
+    def has_edge(self, source: Hashable, target: Hashable) -> bool:
+        return (source, target) in self.edge_set
+
+    def move(self, node: Hashable, direction: str) -> Optional[Hashable]:
+        """Returns the room reached by going into a direction, or None if there is no such exit."""
+        return self.directions.get(node, {}).get(direction)
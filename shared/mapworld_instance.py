@@ -0,0 +1,199 @@
+"""
+Typed instance representation of the MapWorld games (mm_mapworld_* and textmapworld_*).
+
+Rooms are integer ids (indices into `rooms`, which holds their labels: grid positions or room names), the
+directed edges are an (E, 2) array of room ids and the images and categories are tables indexed by room id.
+New instance files store this form under the key "map" as plain JSON lists:
+
+    {"rooms": [[2, 3], [1, 3], ...], "edges": [[0, 1], [1, 0], ...], "start": 0, "target": 1,
+     "imgs": ["...jpg", ...], "cats": [...], "moves": [[["east", 1]], ...]}
+
+Instances of older files (stringified tuples in mm_mapworld, literal_eval strings in textmapworld) are converted
+on load; `python -m shared.mapworld_instance <instances.json> ...` (in the repository root) adds the "map" key to
+existing files.
+"""
+import ast
+import json
+import sys
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from shared.mapworld_graph import MapGraph
+
+# number of game instances whose typed form is kept (the master and its players load the same instance)
+CACHE_SIZE = 64
+
+
+def _label(room):
+    """Room labels are stored as JSON, where grid positions become lists."""
+    return tuple(room) if isinstance(room, list) else room
+
+
+def _parse_position(position: str) -> Tuple[int, int]:
+    x, y = position.strip("() ").split(",")
+    return int(x), int(y)
+
+
+class MapInstance:
+    """
+    Args:
+        rooms: the labels of the rooms, indexed by room id
+        edges: the directed edges as pairs of room ids
+        start: the id of the room the game starts in
+        target: the id of the room to find (mm_mapworld_specificroom)
+        imgs: the image of every room (mm_mapworld)
+        cats: the categories of every room (mm_mapworld)
+        moves: the directions and the rooms (ids) they lead to, for every room, in the order they are presented to
+            the players (textmapworld); derived from the grid positions if not given
+    """
+
+    def __init__(self, rooms: List[Hashable], edges, start: int, target: Optional[int] = None,
+                 imgs: List[str] = None, cats: List = None, moves: List[List[Tuple[str, int]]] = None):
+        self.rooms = [_label(room) for room in rooms]
+        self.room_ids = {room: idx for idx, room in enumerate(self.rooms)}
+        self.edges = np.asarray(edges, dtype=np.int16).reshape(-1, 2)
+        self.start = start
+        self.target = target
+        self.imgs = imgs
+        self.cats = cats
+        self.moves = moves
+        self._graph = None
+
+    @property
+    def nodes(self) -> List[Hashable]:
+        return self.rooms
+
+    @property
+    def edge_labels(self) -> List[Tuple[Hashable, Hashable]]:
+        return [(self.rooms[source], self.rooms[target]) for source, target in self.edges.tolist()]
+
+    @property
+    def start_room(self) -> Hashable:
+        return self.rooms[self.start]
+
+    @property
+    def target_room(self) -> Optional[Hashable]:
+        return None if self.target is None else self.rooms[self.target]
+
+    def image(self, room: Hashable) -> str:
+        return self.imgs[self.room_ids[room]]
+
+    def category(self, room: Hashable):
+        return self.cats[self.room_ids[room]]
+
+    def direction_list(self) -> List[Tuple[Hashable, List[str]]]:
+        """The available directions of every room, as listed in the "Directions" of textmapworld instances."""
+        return [(room, [direction for direction, _ in self.moves[idx]]) for idx, room in enumerate(self.rooms)]
+
+    @property
+    def graph(self) -> MapGraph:
+        if self._graph is None:
+            directions = None
+            if self.moves is not None:
+                directions = {room: [(direction, self.rooms[target]) for direction, target in self.moves[idx]]
+                              for idx, room in enumerate(self.rooms)}
+            self._graph = MapGraph(self.rooms, self.edge_labels, directions)
+        return self._graph
+
+    def to_json(self) -> Dict:
+        encoded = {"rooms": [list(room) if isinstance(room, tuple) else room for room in self.rooms],
+                   "edges": self.edges.tolist(),
+                   "start": self.start}
+        if self.target is not None:
+            encoded["target"] = self.target
+        if self.imgs is not None:
+            encoded["imgs"] = self.imgs
+        if self.cats is not None:
+            encoded["cats"] = self.cats
+        if self.moves is not None:
+            encoded["moves"] = [[list(move) for move in room_moves] for room_moves in self.moves]
+        return encoded
+
+    @classmethod
+    def from_json(cls, encoded: Dict) -> "MapInstance":
+        moves = encoded.get("moves")
+        if moves is not None:
+            moves = [[tuple(move) for move in room_moves] for room_moves in moves]
+        return cls(encoded["rooms"], encoded["edges"], encoded["start"], encoded.get("target"),
+                   encoded.get("imgs"), encoded.get("cats"), moves)
+
+    @classmethod
+    def from_labels(cls, rooms: List[Hashable], edges: List[Tuple[Hashable, Hashable]], start: Hashable,
+                    target: Hashable = None, imgs: Dict = None, cats: Dict = None) -> "MapInstance":
+        """Builds the typed form from room labels, with the images and categories given per room label."""
+        room_ids = {room: idx for idx, room in enumerate(rooms)}
+        return cls(rooms, [(room_ids[edge[0]], room_ids[edge[1]]) for edge in edges], room_ids[start],
+                   None if target is None else room_ids[target],
+                   None if imgs is None else [imgs[room] for room in rooms],
+                   None if cats is None else [cats[room] for room in rooms])
+
+    @classmethod
+    def from_mm_instance(cls, instance: Dict) -> "MapInstance":
+        """Converts an mm_mapworld instance with stringified tuples ("(1, 2)") as nodes, edges and keys."""
+        edges = []
+        for edge in instance['edges']:
+            x1, y1, x2, y2 = edge.replace('(', '').replace(')', '').split(',')
+            edges.append(((int(x1), int(y1)), (int(x2), int(y2))))
+        return cls.from_labels([_parse_position(node) for node in instance['nodes']], edges,
+                               _parse_position(instance['start']),
+                               _parse_position(instance['target']) if 'target' in instance else None,
+                               {_parse_position(key): value for key, value in instance['imgs'].items()},
+                               {_parse_position(key): value for key, value in instance['cats'].items()})
+
+    @classmethod
+    def from_textmapworld_instance(cls, instance: Dict) -> "MapInstance":
+        """Converts a textmapworld instance, whose undirected edges are added in both directions."""
+        rooms = ast.literal_eval(instance['Graph_Nodes'])
+        room_ids = {room: idx for idx, room in enumerate(rooms)}
+        graph_edges = ast.literal_eval(instance['Graph_Edges'])
+        edges = [(room_ids[edge[1]], room_ids[edge[0]]) for edge in graph_edges]
+        edges += [(room_ids[edge[0]], room_ids[edge[1]]) for edge in graph_edges]
+        # the moves of a room may be listed more than once, the last entry is complete
+        node_moves = {move["node"]: move["node_moves"] for move in ast.literal_eval(instance['Moves'])}
+        moves = [[(direction, room_ids[target]) for direction, target in node_moves.get(room, [])] for room in rooms]
+        start = instance["Current_Position"]
+        if instance.get('Game_Type') == "unnamed_graph":
+            start = ast.literal_eval(start)
+        return cls(rooms, edges, room_ids[start], moves=moves)
+
+    @classmethod
+    def from_instance(cls, instance: Dict) -> "MapInstance":
+        if "map" in instance:
+            return cls.from_json(instance["map"])
+        if "Graph_Nodes" in instance:
+            return cls.from_textmapworld_instance(instance)
+        return cls.from_mm_instance(instance)
+
+
+_cache: "OrderedDict[int, Tuple[Dict, MapInstance]]" = OrderedDict()
+
+
+def load(instance: Dict) -> MapInstance:
+    """Returns the typed form of a game instance; the same instance object is only converted once."""
+    key = id(instance)
+    if key in _cache and _cache[key][0] is instance:
+        _cache.move_to_end(key)
+        return _cache[key][1]
+    map_instance = MapInstance.from_instance(instance)
+    _cache[key] = (instance, map_instance)
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return map_instance
+
+
+def convert_instances_file(path: str):
+    """Adds the typed form (key "map") to all instances of an instances file."""
+    with open(path, encoding="utf-8") as f:
+        instances = json.load(f)
+    for experiment in instances["experiments"]:
+        for instance in experiment["game_instances"]:
+            instance["map"] = MapInstance.from_instance(instance).to_json()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(instances, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    for instances_path in sys.argv[1:]:
+        convert_instances_file(instances_path)
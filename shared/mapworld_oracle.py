@@ -0,0 +1,103 @@
+"""
+Exploration-optimality oracle shared by the MapWorld scorers (mm_mapworld_* and textmapworld_*).
+
+A move is a good move if it lies on some shortest walk that visits every room that is adjacent to an already
+visited room but has not been visited itself (the frontier). The oracle computes all-pairs shortest paths once
+per graph and finds the optimal walks by a memoized DP over (current room, frontier rooms still to visit).
+"""
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+INF = float("inf")
+
+
+class ExplorationOracle:
+    """
+    Args:
+        edges: the (directed) moves of the map as (from_node, to_node) pairs; undirected maps list both directions
+        restrict_to_visited: if True, only moves from or to an already visited room can be used (the walker only
+            knows the visited rooms and their exits), otherwise the full map is used
+    """
+
+    def __init__(self, edges: Iterable[Tuple[Hashable, Hashable]], restrict_to_visited: bool = False):
+        self.node_ids: Dict[Hashable, int] = {}
+        self.nodes: List[Hashable] = []
+        moves = []
+        for edge in edges:
+            source, target = self._add_node(edge[0]), self._add_node(edge[1])
+            moves.append((source, target))
+        self.neighbors: List[List[int]] = [[] for _ in self.nodes]
+        for source, target in moves:
+            if target not in self.neighbors[source]:
+                self.neighbors[source].append(target)
+        self.restrict_to_visited = restrict_to_visited
+        # shortest paths per visited set (only one entry, keyed with None, if moves are not restricted)
+        self._distances: Dict[Optional[int], List[List[float]]] = {}
+
+    def _add_node(self, node: Hashable) -> int:
+        if node not in self.node_ids:
+            self.node_ids[node] = len(self.nodes)
+            self.nodes.append(node)
+        return self.node_ids[node]
+
+    def _allowed(self, visited_mask: int, source: int, target: int) -> bool:
+        return not self.restrict_to_visited or bool(visited_mask >> source & 1 or visited_mask >> target & 1)
+
+    def _shortest_paths(self, visited_mask: int) -> List[List[float]]:
+        key = visited_mask if self.restrict_to_visited else None
+        if key not in self._distances:
+            distances = []
+            for source in range(len(self.nodes)):
+                distance = [INF] * len(self.nodes)
+                distance[source] = 0
+                queue = deque([source])
+                while queue:
+                    node = queue.popleft()
+                    for neighbor in self.neighbors[node]:
+                        if distance[neighbor] == INF and self._allowed(visited_mask, node, neighbor):
+                            distance[neighbor] = distance[node] + 1
+                            queue.append(neighbor)
+                distances.append(distance)
+            self._distances[key] = distances
+        return self._distances[key]
+
+    def best_moves(self, current: Hashable, visited: Iterable[Hashable]) -> Set[Tuple[Hashable, Hashable]]:
+        """
+        Returns all moves (current, next) that are the first step of a shortest walk from current
+        that visits all frontier rooms. If there is no frontier left, all possible moves are returned.
+        """
+        visited_mask = 0
+        for node in visited:
+            if node in self.node_ids:
+                visited_mask |= 1 << self.node_ids[node]
+        if current not in self.node_ids:
+            return set()
+        start = self.node_ids[current]
+        frontier = sorted({target for source in range(len(self.nodes)) if visited_mask >> source & 1
+                           for target in self.neighbors[source] if not visited_mask >> target & 1})
+        moves = [target for target in self.neighbors[start] if self._allowed(visited_mask, start, target)]
+        if not frontier:
+            return {(current, self.nodes[target]) for target in moves}
+
+        distances = self._shortest_paths(visited_mask)
+        frontier_bit = {node: 1 << idx for idx, node in enumerate(frontier)}
+        memo: Dict[Tuple[int, int], float] = {}
+
+        def cost(node: int, remaining: int) -> float:
+            """Length of the shortest walk from node that visits all frontier rooms in the remaining bitmask."""
+            if not remaining:
+                return 0
+            if (node, remaining) not in memo:
+                best = INF
+                for idx, target in enumerate(frontier):
+                    if remaining >> idx & 1 and distances[node][target] < best:
+                        best = min(best, distances[node][target] + cost(target, remaining & ~(1 << idx)))
+                memo[(node, remaining)] = best
+            return memo[(node, remaining)]
+
+        all_frontier = (1 << len(frontier)) - 1
+        optimum = cost(start, all_frontier)
+        if optimum == INF:
+            return set()
+        return {(current, self.nodes[target]) for target in moves
+                if 1 + cost(target, all_frontier & ~frontier_bit.get(target, 0)) == optimum}
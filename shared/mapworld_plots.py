@@ -0,0 +1,206 @@
+"""
+Path plots and animations of the mm_mapworld scorers.
+
+The map (rooms and edges) is drawn once per episode, afterwards every frame only updates the colours of the rooms
+and edges and reveals the next arrow of the path. Frames are rendered into in-memory buffers (no pyplot, no
+temporary files), and the episodes are rendered in a pool of worker processes while scoring goes on. The benchmarks
+wait for the renderings when they are closed (wait_for_renders), so that failed renderings fail the score run.
+"""
+import atexit
+import logging
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import imageio
+import numpy as np
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+# what store_scores renders (overridable per experiment with the key "path_animation"):
+# "off" - nothing, "png" - the final path plot (path.png) only, "gif" - the final path plot and the animations
+ANIMATION_MODES = ["off", "png", "gif"]
+PATH_ANIMATION = "gif"
+# number of worker processes rendering the episodes; 0 renders in the scoring process itself
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+OFFSET = 0.05
+ROOM_STYLE = dict(color='brown', linewidth=20, markersize=25, zorder=9)
+EDGE_STYLE = dict(linestyle='--', zorder=5)
+
+Node = Tuple[int, int]
+
+
+class PathRenderer:
+    """
+    Draws a map on the given axes and moves a path over it.
+
+    Args:
+        ax: the axes to draw on
+        nodes: the rooms of the map
+        edges: the edges of the map
+        start: the room the path starts in
+        target: a room that is highlighted in orange once it has been visited
+        mark_path_edges: draw the edges between visited rooms in black
+        room_style: overrides of the marker style of the rooms
+        edge_style: overrides of the line style of the edges
+    """
+
+    def __init__(self, ax: Axes, nodes: List[Node], edges: List[Tuple[Node, Node]], start: Node,
+                 target: Optional[Node] = None, mark_path_edges: bool = False,
+                 room_style: Dict = None, edge_style: Dict = None):
+        self.ax = ax
+        self.start = start
+        self.target = target
+        self.mark_path_edges = mark_path_edges
+        self.rooms = {}
+        for node in nodes:
+            self.rooms[node], = ax.plot(node[0], node[1], 'o', mfc='tab:gray', **{**ROOM_STYLE, **(room_style or {})})
+        self.edges = []
+        for edge in edges:
+            line, = ax.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='gray',
+                            **{**EDGE_STYLE, **(edge_style or {})})
+            self.edges.append((edge, line))
+        self.arrows = []
+        self.path = []
+        # arrows into a room are shifted a bit further each time the room is entered
+        self.traveled = {start: 1}
+
+    def room_color(self, node: Node, visited: set) -> str:
+        if node not in visited:
+            return 'tab:gray'
+        if node == self.target:
+            return 'tab:orange'
+        if node == self.path[-1]:
+            return 'tab:cyan'
+        return 'tab:olive'
+
+    def extend(self, node: Node):
+        """Appends a room to the path; the arrow of the last move is red, the ones before are black."""
+        if self.path and node != self.path[-1]:
+            x1, y1 = self.arrows[-1][1] if self.arrows else self.start
+            t = sum(1 / (1 + j) for j in range(self.traveled.get(node, 0)))
+            self.traveled[node] = self.traveled.get(node, 0) + 1
+            x2, y2 = node[0] + t * OFFSET, node[1] + t * OFFSET
+            arrow = self.ax.arrow(x1, y1, x2 - x1, y2 - y1, color='red', width=0.005, head_width=0.05,
+                                  length_includes_head=True, zorder=10)
+            if self.arrows:
+                self.arrows[-1][0].set_color('black')
+            self.arrows.append((arrow, (x2, y2)))
+        elif self.arrows:
+            self.arrows[-1][0].set_color('black')
+        self.path.append(node)
+        visited = set(self.path)
+        for room, marker in self.rooms.items():
+            marker.set_markerfacecolor(self.room_color(room, visited))
+        if self.mark_path_edges:
+            for edge, line in self.edges:
+                line.set_color('black' if edge[0] in visited and edge[1] in visited else 'gray')
+
+
+def new_figure(figsize: Tuple[int, int], ncols: int = 1) -> Tuple[Figure, List[Axes]]:
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(1, ncols, sharex=True, sharey=True, squeeze=False)[0]
+    return fig, list(axes)
+
+
+def grab_frame(fig: Figure) -> np.ndarray:
+    fig.canvas.draw()
+    return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+
+def render_path(path: List[Node], map_info: Dict, interactions_dir: str, mode: str, grid_alpha: float = None):
+    """Stores the plot of the full path (path.png) and, in "gif" mode, the animation of all path prefixes."""
+    fig, (ax,) = new_figure((4, 4))
+    renderer = PathRenderer(ax, **map_info)
+    ax.set_xlim(-1, 4)
+    ax.set_ylim(-1, 4)
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.grid(True, alpha=grid_alpha)
+    images = []
+    for node in path:
+        renderer.extend(node)
+        if mode == "gif":
+            images.append(grab_frame(fig))
+    fig.savefig(os.path.join(interactions_dir, "path.png"))
+    if mode == "gif":
+        imageio.mimsave(os.path.join(interactions_dir, "animation.gif"), images, fps=1, loop=True)
+
+
+def render_generated_graphs(path: List[Node], gens: List[Dict], map_info: Dict, interactions_dir: str):
+    """Stores the target map next to the graph generated by the player for every turn, as pdf and animation."""
+    gen_dir = os.path.join(interactions_dir, "generated_graphs")
+    os.makedirs(gen_dir, exist_ok=True)
+    fig, (ax1, ax2) = new_figure((8, 4), ncols=2)
+    renderer = PathRenderer(ax1, **map_info, room_style=dict(markersize=17.5), edge_style=dict(linewidth=1.8))
+    ticks = np.arange(-2, 7)
+    for ax, title in [(ax1, "Target Graph"), (ax2, "Generated Graph")]:
+        ax.set_xlabel('X')
+        ax.grid(True)
+        ax.set_xticks(ticks)
+        ax.set_yticks(ticks)
+        ax.set_title(title)
+    ax1.set_ylabel('Y')
+    ax1.set_xlim(-3, 6)
+    ax1.set_ylim(-3, 6)
+    generated = []
+    images = []
+    for i, graph in enumerate(gens):
+        if i < len(path):
+            renderer.extend(path[i])
+        for artist in generated:
+            artist.remove()
+        generated = [ax2.plot(node[0], node[1], 'o', color='brown', linewidth=10, markersize=17.5, zorder=9,
+                              mfc='tab:gray')[0] for node in graph['V']]
+        generated += [ax2.plot([edge[0][0], edge[1][0]], [edge[0][1], edge[1][1]], color='gray', linestyle='--',
+                               zorder=5, linewidth=1.8)[0] for edge in graph['E']]
+        fig.savefig(os.path.join(gen_dir, f"{i}.pdf"))
+        images.append(grab_frame(fig))
+    if images:
+        imageio.mimsave(os.path.join(gen_dir, "animation.gif"), images, fps=1, loop=True)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+# the renderings submitted since the last wait_for_renders
+_pending: List[Future] = []
+
+
+def _log_failure(future: Future):
+    if future.exception() is not None:
+        logger.error("Rendering path plots failed", exc_info=future.exception())
+
+
+def submit(fn, *args):
+    """Runs a rendering function in the worker pool (or directly if RENDER_WORKERS is 0)."""
+    global _executor
+    if not RENDER_WORKERS:
+        fn(*args)
+        return
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS)
+        atexit.register(_executor.shutdown, wait=True)
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(_log_failure)
+    _pending.append(future)
+
+
+def wait_for_renders():
+    """Waits for the submitted renderings; raises a RuntimeError if any of them failed."""
+    pending = list(_pending)
+    _pending.clear()
+    failed = sum(future.exception() is not None for future in pending)
+    if failed:
+        raise RuntimeError(f"Rendering path plots failed for {failed} of {len(pending)} episodes "
+                           f"(see clembench.log)")
+
+
+def animation_mode(experiment: Dict) -> str:
+    mode = experiment.get("path_animation", PATH_ANIMATION)
+    if mode not in ANIMATION_MODES:
+        raise ValueError(f"Unknown path animation mode '{mode}', expected one of {ANIMATION_MODES}")
+    return mode
@@ -0,0 +1,87 @@
+"""
+Compiled prompt templates of the static benchmarks whose experiments share one few-shot prompt (bbh, mmlu_pro).
+
+The initial prompt of such an experiment is a long literal few-shot block followed by the instance placeholder, e.g.
+"<description><examples>\n\nQ: {{input}}\nA:". A PromptTemplate splits it once into this literal prefix and the
+compiled rest, so that setting up an instance only renders the short rest; the rendered prompt is the same as the
+one of the whole template. Experiments with the same template share the PromptTemplate, and the prefixes are kept
+once per text in PROMPT_PREFIXES (several bbh tasks have the same few-shot block), where they can be looked up by id.
+
+Every prompt of an experiment starts with its prefix, so backends that cache the key/values of shared prompt
+prefixes reuse them across all items of a task; the game masters also expose it in their state (state.prompt_prefix)
+for backends and runners that take the prefix explicitly.
+"""
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, Tuple
+
+from jinja2 import Template
+
+# the tokens that start a jinja expression, statement or comment
+TEMPLATE_START_TOKENS = ("{{", "{%", "{#")
+# number of compiled templates kept (one per distinct initial prompt)
+TEMPLATE_CACHE_SIZE = 256
+
+
+class PromptPrefixStore:
+    """The distinct prompt prefixes, keyed by a hash of their text."""
+
+    def __init__(self):
+        self.prefixes: Dict[str, str] = {}
+
+    def add(self, prefix: str) -> str:
+        """Stores the prefix (unless the same text is stored already) and returns its id."""
+        prefix_id = hashlib.sha1(prefix.encode("utf-8")).hexdigest()[:16]
+        self.prefixes.setdefault(prefix_id, prefix)
+        return prefix_id
+
+    def get(self, prefix_id: str) -> str:
+        return self.prefixes[prefix_id]
+
+    def __len__(self) -> int:
+        return len(self.prefixes)
+
+    def __contains__(self, prefix_id: str) -> bool:
+        return prefix_id in self.prefixes
+
+
+PROMPT_PREFIXES = PromptPrefixStore()
+
+
+def split_prompt_template(source: str) -> Tuple[str, str]:
+    """
+    Returns:
+        the literal text before the first jinja token of the template and the template from that token on (the whole
+        template and an empty prefix if there is no token: jinja drops a trailing newline of the rendered template)
+    """
+    starts = [start for start in (source.find(token) for token in TEMPLATE_START_TOKENS) if start != -1]
+    if not starts:
+        return "", source
+    # jinja renders every line break of the literal text as \n
+    return re.sub(r"\r\n?", "\n", source[:min(starts)]), source[min(starts):]
+
+
+class PromptTemplate:
+    """
+    An initial prompt template split into its literal prefix and the compiled rest.
+
+    Args:
+        source: the jinja template of the initial prompt
+    """
+
+    def __init__(self, source: str):
+        prefix, rest = split_prompt_template(source)
+        self.prefix_id = PROMPT_PREFIXES.add(prefix)
+        # the stored text, so that experiments with the same few-shot block keep one copy of it
+        self.prefix = PROMPT_PREFIXES.get(self.prefix_id)
+        self.template = Template(rest)
+
+    def render(self, **kwargs) -> str:
+        return self.prefix + self.template.render(**kwargs)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def prompt_template(source: str) -> PromptTemplate:
+    """The (cached) PromptTemplate of an initial prompt template, compiled once per distinct template."""
+    return PromptTemplate(source)
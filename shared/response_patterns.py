@@ -0,0 +1,36 @@
+"""
+Compiled response patterns of the games that check player responses against regexes from their instances
+(referencegame, multimodal_referencegame, imagegame).
+
+Patterns are compiled once per process, keyed by (pattern, flags), so the many localized patterns of the
+multilingual instance files are not compiled again for every episode. A ResponseMatcher also keeps the match of the
+latest response per pattern: validating and parsing a response match it only once.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+# number of distinct (pattern, flags) pairs kept compiled
+PATTERN_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def compile_pattern(pattern: str, flags: int = 0) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+class ResponseMatcher:
+    """Matches the responses of one episode; create one per game master."""
+
+    def __init__(self):
+        self._latest: Dict[Tuple[str, int], Tuple[str, Optional[re.Match]]] = {}
+
+    def match(self, pattern: str, response: str, flags: int = 0) -> Optional[re.Match]:
+        """Like re.match, but returns the match of the previous call if it was for the same pattern and response."""
+        key = (pattern, flags)
+        latest = self._latest.get(key)
+        if latest is not None and latest[0] == response:
+            return latest[1]
+        match = compile_pattern(pattern, flags).match(response)
+        self._latest[key] = (response, match)
+        return match
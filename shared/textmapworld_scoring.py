@@ -0,0 +1,297 @@
+"""
+Streaming scorer core of the textmapworld games (textmapworld_main, textmapworld_specificroom,
+textmapworld_graphreasoning).
+
+An episode is consumed event by event: the state (current room, visited and seen rooms, the loop window, the move
+counters) is updated in place, so every event costs the same no matter how long the episode already is. The reference
+graph of the graph reasoning variant is built once per episode, on the first "graph" event.
+
+`replay_results_dir` replays all episodes of a results directory in a pool of worker processes before they are scored;
+the scorers then only log the scores of the replayed episodes. The workers import this module from the shared
+package, so the pool works with every process start method.
+"""
+import ast
+import glob
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import networkx as nx
+
+from shared import mapworld_instance
+from shared.graph_similarity import calculate_similarity
+from shared.mapworld_oracle import ExplorationOracle
+
+logger = logging.getLogger(__name__)
+
+# number of worker processes replaying the episodes of a results directory; 0 leaves them to the scorers
+SCORING_WORKERS = min(4, os.cpu_count() or 1)
+# episodes per task sent to a worker
+SCORING_CHUNK_SIZE = 16
+
+EpisodeKey = Tuple
+
+
+def lowercase_list_strings(original_list):
+    return [item.lower() for item in original_list]
+
+
+def lowercase_tuple_strings(original_list, type):
+    if type == "generated":
+        combined_list = [value for sublist in original_list.values() for value in sublist]
+        return [(item[0].lower(), item[1].lower()) for item in combined_list]
+    elif type == "original":
+        return [(item[0].lower(), item[1].lower()) for item in original_list]
+    elif type == "none":
+        return original_list
+
+
+def create_graph(nodes, edges, type):
+    """Creates a networkx graph from the logged graph data."""
+    G = nx.Graph()
+    if type == "generated" or type == "original":
+        nodes = lowercase_list_strings(nodes)
+    edges = lowercase_tuple_strings(edges, type)
+    G.add_nodes_from(nodes)
+    for edge in edges:
+        if len(edge) == 2:
+            G.add_edge(edge[0], edge[1])
+    return G
+
+
+class LoopDetector:
+    """
+    Counts loops over the rooms entered so far, keeping only the last four of them (see mapworld_graph.detect_loop).
+
+    Args:
+        start: the room the episode starts in
+        reset_on_loop: start over with an empty window once a loop is detected (textmapworld_specificroom)
+    """
+
+    def __init__(self, start: Hashable, reset_on_loop: bool = False):
+        self.window = deque([start], maxlen=4)
+        self.reset_on_loop = reset_on_loop
+        self.count = 0
+
+    def push(self, room: Hashable) -> bool:
+        self.window.append(room)
+        if len(self.window) == 4 and len(set(self.window)) < 3:
+            self.count += 1
+            if self.reset_on_loop:
+                self.window.clear()
+            return True
+        return False
+
+
+class ExplorationEpisode:
+    """
+    Incremental state of one textmapworld episode.
+
+    Args:
+        graph: the MapGraph of the instance
+        oracle: the ExplorationOracle of the instance, deciding which moves are efficient
+        start: the room the episode starts in
+        game_type: "named_graph" or "unnamed_graph"; rooms of unnamed graphs are logged as JSON lists
+        reset_loops_on_detection: see LoopDetector
+    """
+
+    def __init__(self, graph, oracle, start: Hashable, game_type: str, reset_loops_on_detection: bool = False):
+        self.graph = graph
+        self.oracle = oracle
+        self.game_type = game_type
+        self.n_rooms = len(graph.nodes)
+        self.current = start
+        self.path = [start]
+        self.visited = {start}
+        self.seen = {start}
+        self.seen.update(graph.adj(start))
+        self.loops = LoopDetector(start, reset_loops_on_detection)
+        self.valid_moves = 0
+        self.invalid_moves = 0
+        self.good_moves: List[bool] = []
+        self.aborted = False
+        self.stopped = False
+        self.turns_limit_reached = False
+        self.non_processable = False
+        # (generated graph or None if it could not be read, similarity in percent) per "graph" event
+        self.generated_graphs: List[tuple] = []
+        self._reference_graph: Optional[nx.Graph] = None
+        self._handlers = self._event_handlers()
+
+    def _event_handlers(self) -> Dict[str, Callable[[Dict], None]]:
+        return {
+            "aborted": self._on_aborted,
+            "move": self._on_move,
+            "graph": self._on_graph,
+            "stop": self._on_stop,
+            "turns_limit": self._on_turns_limit,
+            "non_processable": self._on_non_processable,
+        }
+
+    def __getstate__(self):
+        # the handlers are bound methods; they are set up again where a replayed episode is unpickled
+        state = self.__dict__.copy()
+        del state["_handlers"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._handlers = self._event_handlers()
+
+    def consume(self, action: Dict):
+        handler = self._handlers.get(action["type"])
+        if handler is not None:
+            handler(action)
+
+    def consume_interactions(self, episode_interactions: Dict) -> "ExplorationEpisode":
+        for turn in episode_interactions["turns"]:
+            for event in turn:
+                self.consume(event["action"])
+        return self
+
+    def _room(self, logged_room) -> Hashable:
+        return tuple(logged_room) if self.game_type == "unnamed_graph" else logged_room
+
+    def _on_aborted(self, action: Dict):
+        if action["content"]:
+            self.aborted = True
+
+    def _on_stop(self, action: Dict):
+        if action["content"]:
+            self.stopped = True
+
+    def _on_turns_limit(self, action: Dict):
+        self.turns_limit_reached = True
+
+    def _on_non_processable(self, action: Dict):
+        self.non_processable = True
+
+    def _on_move(self, action: Dict):
+        move = json.loads(action["content"])
+        new = self._room(move["new"])
+        if self._room(move["old"]) != new:
+            self.valid_moves += 1
+        else:
+            self.invalid_moves += 1
+        efficient = (self.current, new) in self.oracle.best_moves(self.current, self.visited)
+        self.good_moves.append(efficient and len(self.visited) != self.n_rooms)
+        self.current = new
+        self.path.append(new)
+        self.visited.add(new)
+        self.seen.update(self.graph.adj(new))
+        self.loops.push(new)
+
+    @property
+    def reference_graph(self) -> nx.Graph:
+        if self._reference_graph is None:
+            self._reference_graph = create_graph(self.graph.nodes, self.graph.edges, "original")
+        return self._reference_graph
+
+    def _on_graph(self, action: Dict):
+        try:
+            generated = ast.literal_eval(action["content"])
+            generated_graph = create_graph(generated["nodes"], generated["edges"], "generated")
+            similarity = calculate_similarity(self.reference_graph, generated_graph) * 100
+        except Exception:
+            self.generated_graphs.append((None, 0))
+            return
+        self.generated_graphs.append((generated, similarity))
+
+    @property
+    def loop_count(self) -> int:
+        return self.loops.count
+
+    @property
+    def exploration(self) -> float:
+        return (len(self.visited) / self.n_rooms * 100) if self.n_rooms else 0
+
+    @property
+    def efficiency(self) -> float:
+        return (sum(self.good_moves) / len(self.good_moves) * 100) if self.good_moves else 0
+
+    @property
+    def harmonic_score(self) -> float:
+        """Harmonic mean of efficiency and exploration."""
+        efficiency, exploration = self.efficiency, self.exploration
+        return (2 * efficiency * exploration / (efficiency + exploration)) if (efficiency + exploration) else 0
+
+    def visited_all(self) -> bool:
+        return len(self.visited) == self.n_rooms and self.visited == set(self.graph.nodes)
+
+    def exploration_scores(self) -> Dict[str, float]:
+        """The episode scores shared by all variants, in the order they are logged (NaN unless stopped)."""
+        scores = {
+            'moves': self.valid_moves + self.invalid_moves,
+            'valid_moves': self.valid_moves,
+            'invalid_moves': self.invalid_moves,
+            'stopped': int(self.stopped),
+            'turns_limit': int(self.turns_limit_reached),
+            'loops': self.loop_count,
+            'number_visited': len(self.visited),
+            'seen': len(self.seen),
+            'efficiency': self.efficiency,
+            'exploration': self.exploration,
+        }
+        if not self.stopped:
+            scores = {name: float("nan") for name in scores}
+        return scores
+
+
+def new_episode(game_instance: Dict, reset_loops_on_detection: bool = False) -> ExplorationEpisode:
+    """The episode of a game instance before its first event."""
+    game_map = mapworld_instance.load(game_instance)
+    graph = game_map.graph
+    return ExplorationEpisode(graph, ExplorationOracle(graph.edges), game_map.start_room, game_instance['Game_Type'],
+                              reset_loops_on_detection)
+
+
+def episode_key(episode_interactions: Dict) -> Optional[EpisodeKey]:
+    """Identifies an episode within a results directory (None if its interactions have no meta data)."""
+    meta = episode_interactions.get("meta")
+    if not meta:
+        return None
+    return meta.get("game_name"), meta.get("results_folder"), meta.get("experiment_name"), meta.get("game_id")
+
+
+def replay_episode(interaction_file: str, reset_loops_on_detection: bool = False) \
+        -> Optional[Tuple[EpisodeKey, ExplorationEpisode]]:
+    """Replays the episode of an interactions.json file; None if it cannot be replayed (its scorer reports why)."""
+    try:
+        with open(interaction_file, encoding="utf-8") as f:
+            interactions = json.load(f)
+        with open(Path(interaction_file).parent / "instance.json", encoding="utf-8") as f:
+            instance = json.load(f)
+        episode = new_episode(instance, reset_loops_on_detection).consume_interactions(interactions)
+    except Exception:
+        return None
+    return episode_key(interactions), episode
+
+
+def replay_results_dir(results_dir: str, game_name: str, reset_loops_on_detection: bool = False,
+                       workers: int = None) -> Dict[EpisodeKey, ExplorationEpisode]:
+    """
+    Replays all episodes of a game in a results directory in a pool of worker processes.
+
+    Args:
+        workers: number of worker processes (defaults to SCORING_WORKERS); with 0 (or a single episode) nothing is
+            replayed in advance
+    Returns:
+        the replayed episodes by their episode_key
+    """
+    workers = SCORING_WORKERS if workers is None else workers
+    interaction_files = [interaction_file for interaction_file
+                         in glob.glob(os.path.join(results_dir, '**', 'interactions.json'), recursive=True)
+                         if game_name in Path(interaction_file).parts]
+    if not workers or len(interaction_files) < 2:
+        return {}
+    replay = partial(replay_episode, reset_loops_on_detection=reset_loops_on_detection)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        replayed = [result for result in executor.map(replay, interaction_files, chunksize=SCORING_CHUNK_SIZE)
+                    if result is not None and result[0] is not None]
+    logger.info(f"{game_name}: Replayed {len(replayed)} of {len(interaction_files)} episodes")
+    return dict(replayed)
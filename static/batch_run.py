@@ -0,0 +1,209 @@
+"""
+Batched execution of the single-turn static benchmarks (bbh, mmlu_pro, ifeval, eqbench, cladder).
+
+All game instances of a run are set up first (so all prompts are built up front), their requests are then sent to the
+backend in batches, and the game masters validate and score the responses as usual; the records are written by the
+same recorders as `clem run`. Backends that generate batches themselves get the batches as a whole; for all other
+backends (e.g. remote APIs) the requests of a batch are sent concurrently, at most max_concurrency at a time. As in
+`clem run`, an episode whose request fails is skipped: its records are not written, so it is not scored either.
+
+    python static/batch_run.py -g bbh -m <model> -b 64 -c 8
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple, Union
+
+import clemcore.backends as backends
+from clemcore.backends import BatchGenerativeModel, HumanModel, Model
+from clemcore.cli import experiment_filter, read_gen_args
+from clemcore.clemgame import GameRegistry, GameSpec, InstanceFileSaver, ExperimentFileSaver, \
+    InteractionsFileSaver, GameBenchmarkCallbackList, RunFileSaver, GameInstanceIterator, ResultsFolder, \
+    GameBenchmark, GameMaster
+from clemcore.clemgame.callbacks.base import GameStep
+from clemcore.clemgame.runners import batchwise
+
+logger = logging.getLogger(__name__)
+
+# number of game instances whose requests are sent together
+BATCH_SIZE = 64
+# number of requests of a batch that are sent at the same time to backends that cannot generate batches
+MAX_CONCURRENCY = 8
+# attempts per request to backends that cannot generate batches, and seconds before the first retry (doubled after
+# every further failed attempt)
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2.0
+
+
+class FailedResponse(str):
+    """
+    Stands in for the response to a request that failed in all attempts, so that the other requests of the batch go on.
+
+    It is empty, and no records are written for its episode (see SkipFailedEpisodes).
+    """
+
+    def __new__(cls, error: Exception):
+        response = super().__new__(cls, "")
+        response.error = error
+        return response
+
+
+class SkipFailedEpisodes(GameBenchmarkCallbackList):
+    """
+    Passes on the callbacks of an episode only as long as none of its requests failed.
+
+    An episode with a FailedResponse is skipped like an episode whose model call raises in `clem run`. It is still
+    played to its end, but its further steps and its end are not recorded, so no interactions are written or scored.
+    """
+
+    def __init__(self, callbacks: List = None):
+        super().__init__(callbacks)
+        # ids of the game masters of the running episodes with a failed request
+        self.failed: Set[int] = set()
+
+    def on_game_step(self, game_master: GameMaster, game_instance: Dict, game_step: GameStep):
+        if isinstance(game_step.response, FailedResponse):
+            self.failed.add(id(game_master))
+        if id(game_master) not in self.failed:
+            super().on_game_step(game_master, game_instance, game_step)
+
+    def on_game_end(self, game_master: GameMaster, game_instance: Dict):
+        if id(game_master) in self.failed:
+            self.failed.discard(id(game_master))
+            logger.error(f"{game_master.game_spec.game_name}: Skipped instance {game_instance['game_id']} "
+                         f"of experiment {game_master.experiment['name']} because a request failed")
+            return
+        super().on_game_end(game_master, game_instance)
+
+
+class ConcurrentModel(BatchGenerativeModel):
+    """
+    Generates the responses of a batch with concurrent single requests to a model that cannot generate batches.
+
+    The wrapped model keeps the model spec and the generation arguments, so the records are the same as for the model.
+    A failing request is retried (MAX_ATTEMPTS); if it still fails, the error is logged and it gets a FailedResponse.
+    Its episode is then skipped, and the other episodes of the run go on.
+    """
+
+    def __init__(self, model: Model, max_concurrency: int = MAX_CONCURRENCY):
+        super().__init__(model.model_spec)
+        self.model = model
+        self.max_concurrency = max_concurrency
+
+    def get_gen_arg(self, arg_name):
+        return self.model.get_gen_arg(arg_name)
+
+    def set_gen_args(self, **gen_args):
+        self.model.set_gen_args(**gen_args)
+
+    def set_gen_arg(self, arg_name, arg_value):
+        self.model.set_gen_arg(arg_name, arg_value)
+
+    def generate_response(self, messages: List[Dict]) -> Tuple[Any, Any, str]:
+        return self.model.generate_response(messages)
+
+    def _generate_isolated_response(self, messages: List[Dict]) -> Tuple[Any, Any, str]:
+        delay = RETRY_DELAY
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                return self.model.generate_response(messages)
+            except Exception as error:
+                if attempt == MAX_ATTEMPTS:
+                    logger.exception(f"{self.model.name}: Request failed {attempt} times (skip its episode)")
+                    return messages, None, FailedResponse(error)
+                logger.warning(f"{self.model.name}: Request failed ({error!r}), retry in {delay}s")
+                time.sleep(delay)
+                delay *= 2
+
+    def generate_batch_response(self, batch_messages: List[List[Dict]]) -> List[Tuple[Any, Any, str]]:
+        if self.max_concurrency <= 1 or len(batch_messages) == 1:
+            return [self._generate_isolated_response(messages) for messages in batch_messages]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batch_messages))) as executor:
+            return list(executor.map(self._generate_isolated_response, batch_messages))
+
+    def reset(self):
+        self.model.reset()
+
+
+def batch_capable(model: Model, max_concurrency: int = MAX_CONCURRENCY) -> Model:
+    """The model itself if it generates batches (or is played by a human), otherwise a ConcurrentModel of it."""
+    if model.supports_batching() or isinstance(model, HumanModel):
+        return model
+    return ConcurrentModel(model, max_concurrency)
+
+
+def run(game_selector: Union[str, Dict, GameSpec],
+        model_selectors: List[backends.ModelSpec],
+        *,
+        gen_args: Dict,
+        experiment_name: str = None,
+        instances_filename: str = None,
+        results_dir_path: Path = Path("results"),
+        batch_size: int = BATCH_SIZE,
+        max_concurrency: int = MAX_CONCURRENCY):
+    """
+    Plays the instances of the selected games batchwise (see clemcore.cli.run for the arguments).
+
+    Args:
+        batch_size: number of game instances whose requests are sent together
+        max_concurrency: number of requests sent at the same time to backends that cannot generate batches
+    """
+    game_registry = GameRegistry.from_directories_and_cwd_files()
+    game_specs = game_registry.get_game_specs_that_unify_with(game_selector)
+    player_models = [batch_capable(model, max_concurrency) for model in backends.load_models(model_selectors, gen_args)]
+
+    results_folder = ResultsFolder(results_dir_path, player_models)
+    model_infos = Model.to_infos(player_models)
+    callbacks = SkipFailedEpisodes([
+        InstanceFileSaver(results_folder),
+        ExperimentFileSaver(results_folder, model_infos),
+        InteractionsFileSaver(results_folder, model_infos),
+        RunFileSaver(results_folder, model_infos)
+    ])
+    sub_selector = None
+    if experiment_name:
+        logger.info("Only running experiment: %s", experiment_name)
+        sub_selector = partial(experiment_filter, selected_experiment=experiment_name, game_ids=None)
+    for game_spec in game_specs:
+        if instances_filename:
+            game_spec.instances = instances_filename
+        with GameBenchmark.load_from_spec(game_spec) as game_benchmark:
+            time_start = datetime.now()
+            game_instance_iterator = GameInstanceIterator.from_game_spec(game_spec, sub_selector=sub_selector)
+            game_instance_iterator.reset(verbose=True)
+            batchwise.run(game_benchmark, game_instance_iterator, player_models, callbacks=callbacks,
+                          batch_size=batch_size)
+            logger.info(f"Running {game_spec['game_name']} took: %s", datetime.now() - time_start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the single-turn static benchmarks batchwise.")
+    parser.add_argument("-g", "--game", type=str, required=True, help="A game name, e.g. bbh or mmlu_pro.")
+    parser.add_argument("-m", "--models", type=str, nargs="*", required=True, help="The model to run.")
+    parser.add_argument("-e", "--experiment_name", type=str, help="Only run this experiment.")
+    parser.add_argument("-i", "--instances_filename", type=str, default=None)
+    parser.add_argument("-r", "--results_dir", type=Path, default="results")
+    parser.add_argument("-t", "--temperature", type=float, default=0.0)
+    parser.add_argument("-l", "--max_tokens", type=int, default=300)
+    parser.add_argument("-b", "--batch_size", type=int, default=BATCH_SIZE,
+                        help=f"Number of game instances whose requests are sent together. Default: {BATCH_SIZE}.")
+    parser.add_argument("-c", "--max_concurrency", type=int, default=MAX_CONCURRENCY,
+                        help="Number of requests sent at the same time to backends that cannot generate batches. "
+                             f"Default: {MAX_CONCURRENCY}.")
+    args = parser.parse_args()
+    run(args.game,
+        model_selectors=backends.ModelSpec.from_strings(args.models),
+        gen_args=read_gen_args(args),
+        experiment_name=args.experiment_name,
+        instances_filename=args.instances_filename,
+        results_dir_path=args.results_dir,
+        batch_size=args.batch_size,
+        max_concurrency=args.max_concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ from clemcore.clemgame.legacy.scorer import GameScorer
 from clemcore.clemgame.legacy.master import DialogueGameMaster
 from clemcore.clemgame.metrics import METRIC_ABORTED, METRIC_LOSE, METRIC_SUCCESS, METRIC_REQUEST_COUNT, \
     METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT_VIOLATED, BENCH_SCORE
-from jinja2 import Template
+
+from shared.prompt_templates import prompt_template
 
 
 class Answerer(Player):
@@ -27,6 +28,7 @@ class Answerer(Player):
 class GameState:
     target: str
     initial_prompt: str
+    prompt_prefix: str  # The few-shot block that all prompts of the experiment start with
     success: bool = False  # When response format is adhered to and exact match is achieved
     failure: bool = False  # When response format is adhered to, but no exact match
     aborted: bool = False  # When response format is violated todo: extract possible choices for each experiment
@@ -34,11 +36,11 @@ class GameState:
 
 class BbhFewShotGameMaster(DialogueGameMaster):
     def _on_setup(self, **instance):
-        initial_prompt_template = Template(self.experiment["initial_prompt"])
+        initial_prompt_template = prompt_template(self.experiment["initial_prompt"])
         initial_prompt = initial_prompt_template.render(input=instance["input"])
 
         # Setup game state (arguments in same order as above)
-        self.state = GameState(instance["target"], initial_prompt)
+        self.state = GameState(instance["target"], initial_prompt, initial_prompt_template.prefix)
 
         # Setup player
         self.answerer = Answerer(self.player_models[0], self.state.target)
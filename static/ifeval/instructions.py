@@ -171,7 +171,7 @@ class ResponseLanguageChecker(Instruction):
         assert isinstance(value, str)
 
         try:
-            return langdetect.detect(value) == self._language
+            return instructions_util.detect_language(value) == self._language
         except langdetect.LangDetectException as e:
             # Count as instruction is followed.
             logging.error(
@@ -245,7 +245,7 @@ class NumberOfSentences(Instruction):
             ValueError if the string in `instruction_args` is not in
             [`less_than`, `at_least`].
         """
-        num_sentences = instructions_util.count_sentences(value)
+        num_sentences = instructions_util.analyze_response(value).num_sentences
         if self._comparison_relation == _COMPARISON_RELATION[0]:
             return num_sentences < self._num_sentences_threshold
         elif self._comparison_relation == _COMPARISON_RELATION[1]:
@@ -902,7 +902,7 @@ class NumberOfWords(Instruction):
 
     def check_following(self, value):
         """Checks if the response contains the expected number of words."""
-        num_words = instructions_util.count_words(value)
+        num_words = instructions_util.analyze_response(value).num_words
 
         if self._comparison_relation == _COMPARISON_RELATION[0]:
             return num_words < self._num_words
@@ -1101,7 +1101,7 @@ class KeySentenceChecker(Instruction):
     def check_following(self, value):
         """Checks if the response contains the expected key sentences."""
         count = 0
-        sentences = instructions_util.split_into_sentences(value)
+        sentences = instructions_util.analyze_response(value).sentences
         for sentence in self._key_sentences:
             if sentence in sentences:
                 count += 1
@@ -1199,7 +1199,7 @@ class RephraseParagraph(Instruction):
         return ["original_paragraph", "low", "high"]
 
     def check_following(self, value):
-        val_words = re.findall(r"\w+", value.lower())
+        val_words = instructions_util.analyze_response(value).lowercase_words
         original_words = re.findall(r"\w+", self._original_paragraph.lower())
         similar_words = 0
 
@@ -1458,7 +1458,7 @@ class CapitalLettersEnglishChecker(Instruction):
         assert isinstance(value, str)
 
         try:
-            return value.isupper() and langdetect.detect(value) == "en"
+            return value.isupper() and instructions_util.detect_language(value) == "en"
         except langdetect.LangDetectException as e:
             # Count as instruction is followed.
             logging.error(
@@ -1490,7 +1490,7 @@ class LowercaseLettersEnglishChecker(Instruction):
         assert isinstance(value, str)
 
         try:
-            return value.islower() and langdetect.detect(value) == "en"
+            return value.islower() and instructions_util.detect_language(value) == "en"
         except langdetect.LangDetectException as e:
             # Count as instruction is followed.
             logging.error(
@@ -1576,7 +1576,7 @@ class CapitalWordFrequencyChecker(Instruction):
     def check_following(self, value):
         """Checks the frequency of words with all capital letters."""
         # Hyphenated words will count as one word
-        words = instructions_util.nltk.word_tokenize(value)
+        words = instructions_util.analyze_response(value).nltk_words
         capital_words = [word for word in words if word.isupper()]
 
         capital_words = len(capital_words)
@@ -14,14 +14,18 @@
 
 """Utility library of instructions."""
 
+import collections
 import functools
+import hashlib
 import os
 import random
 import re
 from importlib.metadata import version
 
 import immutabledict
+import langdetect
 import nltk
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
 from packaging.version import parse as parse_version
 
 # Downloading 'punkt' with nltk<3.9 has a remote code vuln.
@@ -1675,10 +1679,12 @@ def split_into_sentences(text):
     return sentences
 
 
+_WORD_TOKENIZER = nltk.tokenize.RegexpTokenizer(r"\w+")
+
+
 def count_words(text):
     """Counts the number of words."""
-    tokenizer = nltk.tokenize.RegexpTokenizer(r"\w+")
-    tokens = tokenizer.tokenize(text)
+    tokens = _WORD_TOKENIZER.tokenize(text)
     num_words = len(tokens)
     return num_words
 
@@ -1695,6 +1701,130 @@ def count_sentences(text):
     return len(tokenized_sentences)
 
 
+# Number of analyzed responses kept (the loose evaluation checks up to eight variants of a response).
+_RESPONSE_CACHE_SIZE = 1024
+
+
+class ResponseAnalysis:
+    """Features of a response that several instructions check, each computed once on first use."""
+
+    def __init__(self, text):
+        self.text = text
+
+    @functools.cached_property
+    def num_words(self):
+        return count_words(self.text)
+
+    @functools.cached_property
+    def num_sentences(self):
+        return count_sentences(self.text)
+
+    @functools.cached_property
+    def sentences(self):
+        return split_into_sentences(self.text)
+
+    @functools.cached_property
+    def nltk_words(self):
+        return nltk.word_tokenize(self.text)
+
+    @functools.cached_property
+    def lowercase_words(self):
+        return re.findall(r"\w+", self.text.lower())
+
+
+@functools.lru_cache(maxsize=_RESPONSE_CACHE_SIZE)
+def analyze_response(text):
+    """Returns the (shared) ResponseAnalysis of a response."""
+    return ResponseAnalysis(text)
+
+
+# Seed of the language detection (langdetect samples n-grams at random, its results vary between runs otherwise).
+LANGDETECT_SEED = 0
+
+# Number of detected languages kept.
+_LANGUAGE_CACHE_SIZE = 4096
+
+# Frequent English words that are rare in other languages written in ASCII, used by the English prefilter.
+_ENGLISH_WORDS = frozenset(
+    ["the", "and", "of", "to", "is", "that", "it", "for", "with", "was", "are", "this", "by", "have", "from", "or",
+     "not", "but", "you", "they", "we", "at", "which", "will", "can", "has", "their", "were", "there", "been",
+     "would", "what", "if", "all", "your", "my", "be", "how", "when", "about", "more", "should", "could"]
+)
+_ENGLISH_MIN_WORDS = 5
+_ENGLISH_MIN_RATIO = 0.2
+
+
+class LanguageDetector:
+    """Seeded langdetect with the detected languages cached by a hash of the text.
+
+    Args:
+      seed: The seed of the detection.
+      english_prefilter: Whether ASCII text with many frequent English words is
+        taken as English without running langdetect.
+    """
+
+    def __init__(self, seed=LANGDETECT_SEED, english_prefilter=False):
+        self.seed = seed
+        self.english_prefilter = english_prefilter
+        self._factory = None
+        # language (or the LangDetectException) per sha1 digest of the text
+        self._languages = collections.OrderedDict()
+
+    def _detector(self, text):
+        if self._factory is None:
+            self._factory = DetectorFactory()
+            self._factory.load_profile(PROFILES_DIRECTORY)
+            self._factory.set_seed(self.seed)
+        detector = self._factory.create()
+        detector.append(text)
+        return detector
+
+    def is_obviously_english(self, text):
+        """Whether the text is ASCII and frequent English words make up much of it."""
+        if not text.isascii():
+            return False
+        words = _WORD_TOKENIZER.tokenize(text.lower())
+        if len(words) < _ENGLISH_MIN_WORDS:
+            return False
+        return sum(word in _ENGLISH_WORDS for word in words) >= _ENGLISH_MIN_RATIO * len(words)
+
+    def detect(self, text):
+        """Returns the language code of the text, like langdetect.detect.
+
+        Raises:
+          langdetect.LangDetectException: if no language can be detected.
+        """
+        key = hashlib.sha1(text.encode("utf-8")).digest()
+        if key in self._languages:
+            self._languages.move_to_end(key)
+        else:
+            if self.english_prefilter and self.is_obviously_english(text):
+                language = "en"
+            else:
+                try:
+                    language = self._detector(text).detect()
+                except langdetect.LangDetectException as e:
+                    language = e
+            self._languages[key] = language
+            if len(self._languages) > _LANGUAGE_CACHE_SIZE:
+                self._languages.popitem(last=False)
+        language = self._languages[key]
+        if isinstance(language, langdetect.LangDetectException):
+            raise langdetect.LangDetectException(language.get_code(), str(language))
+        return language
+
+
+# The language detector of all instructions.
+LANGUAGE_DETECTOR = LanguageDetector(
+    english_prefilter=os.environ.get("IFEVAL_ENGLISH_PREFILTER", "0") == "1"
+)
+
+
+def detect_language(text):
+    """Detects the language of the text with the shared LanguageDetector."""
+    return LANGUAGE_DETECTOR.detect(text)
+
+
 def generate_keywords(num_keywords):
     """Randomly generates a few keywords."""
     return random.sample(WORD_LIST, k=num_keywords)
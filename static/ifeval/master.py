@@ -1,3 +1,4 @@
+import json
 import logging
 from dataclasses import dataclass
 from typing import Dict, List
@@ -9,10 +10,16 @@ from clemcore.clemgame.legacy.master import DialogueGameMaster
 from clemcore.clemgame.metrics import METRIC_ABORTED, METRIC_LOSE, METRIC_SUCCESS, METRIC_REQUEST_COUNT, \
     METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT_VIOLATED, BENCH_SCORE
 
+import instructions
 import instructions_registry
 
 logger = logging.getLogger(__name__)
 
+# the model, its max_tokens before the first running episode and the number of running episodes, per model id
+_running_episodes: Dict[int, List] = {}
+# configured instructions per instance targets (see configured_instructions)
+_configured_instructions: Dict[str, List[instructions.Instruction]] = {}
+
 
 class InstructionFollower(Player):
     def __init__(self, model: Model):
@@ -31,33 +38,44 @@ class GameState:
     aborted: bool = False  # When response format is violated (not applicable to IFEval)
 
 
+def configured_instructions(targets: Dict) -> List[instructions.Instruction]:
+    """The instructions of an instance, built once per instance (the same targets)"""
+    key = json.dumps(targets, sort_keys=True)
+    if key not in _configured_instructions:
+        configured = []
+        for instruction_id, kwargs in targets.items():
+            instruction_cls = instructions_registry.INSTRUCTION_DICT[instruction_id]
+            instruction = instruction_cls(instruction_id)
+            instruction.build_description(**kwargs)
+            configured.append(instruction)
+        _configured_instructions[key] = configured
+    return _configured_instructions[key]
+
+
 def is_successful(response: str, targets: Dict) -> bool:
     """This implements test_instruction_following_strict of the original work"""
     is_following_list = []
-    for instruction_id, kwargs in targets.items():
-        instruction_cls = instructions_registry.INSTRUCTION_DICT[instruction_id]
-        instruction = instruction_cls(instruction_id)
-        instruction.build_description(**kwargs)
+    for instruction in configured_instructions(targets):
         is_following_list.append(response.strip()  # not empty string
                                  and instruction.check_following(response))
     return all(is_following_list)
 
 
+def restore_max_tokens():
+    """Resets max_tokens of the models whose episodes did not all end (see IFEvalGameBenchmark.close)"""
+    for model, initial_max_tokens, _ in _running_episodes.values():
+        logger.debug(f"restore_max_tokens(): Reset max_tokens={initial_max_tokens} to the initial value.")
+        model.set_gen_arg("max_tokens", initial_max_tokens)
+    _running_episodes.clear()
+
+
 class IFEvalGameMaster(DialogueGameMaster):
     def _on_setup(self, **instance):
         # Setup game state (arguments in same order as above)
         self.state = GameState(instance["target"], instance["input"])
 
         # Setup player
-        required_max_tokens = self.experiment["meta"]["generation_kwargs"]["max_gen_toks"]
         model = self.player_models[0]
-        self.initial_max_tokens = model.max_tokens
-        if model.max_tokens < required_max_tokens:
-            logger.debug(f"_on_setup(): "
-                        f"Increase max_tokens={required_max_tokens}, "
-                        f"because the current value '{model.max_tokens}' "
-                        f"is lower than the required value for the task.")
-            model.set_gen_arg("max_tokens", required_max_tokens)
         self.follower = InstructionFollower(model)
         self.add_player(self.follower, initial_context=self.state.initial_prompt)
 
@@ -66,6 +84,19 @@ class IFEvalGameMaster(DialogueGameMaster):
         self.parsed_request_counts: int = 0
         self.violated_request_counts: int = 0
 
+        # Count the episode as running only once it is set up, so that _on_after_game resets max_tokens;
+        # episodes can run interleaved (batchwise runner): keep the value from before the first running episode
+        required_max_tokens = self.experiment["meta"]["generation_kwargs"]["max_gen_toks"]
+        running = _running_episodes.setdefault(id(model), [model, model.max_tokens, 0])
+        running[2] += 1
+        self.initial_max_tokens = running[1]
+        if model.max_tokens < required_max_tokens:
+            logger.debug(f"_on_setup(): "
+                        f"Increase max_tokens={required_max_tokens}, "
+                        f"because the current value '{model.max_tokens}' "
+                        f"is lower than the required value for the task.")
+            model.set_gen_arg("max_tokens", required_max_tokens)
+
     def _does_game_proceed(self):
         return not (self.state.aborted or self.state.failure or self.state.success)
 
@@ -92,8 +123,13 @@ class IFEvalGameMaster(DialogueGameMaster):
         self.log_key(METRIC_REQUEST_COUNT_PARSED, self.parsed_request_counts)
         self.log_key(METRIC_REQUEST_COUNT_VIOLATED, self.violated_request_counts)
 
-        logger.debug(f"_on_after_game(): Reset max_tokens={self.initial_max_tokens} to the initial value.")
-        self.player_models[0].set_gen_arg("max_tokens", self.initial_max_tokens)
+        model = self.player_models[0]
+        running = _running_episodes[id(model)]
+        running[2] -= 1
+        if running[2] == 0:  # the last running episode
+            del _running_episodes[id(model)]
+            logger.debug(f"_on_after_game(): Reset max_tokens={self.initial_max_tokens} to the initial value.")
+            model.set_gen_arg("max_tokens", self.initial_max_tokens)
 
 
 class IFEvalGameScorer(GameScorer):
@@ -113,3 +149,8 @@ class IFEvalGameBenchmark(GameBenchmark):
 
     def create_game_scorer(self, experiment: Dict, game_instance: Dict) -> GameScorer:
         return IFEvalGameScorer(self.game_name, experiment, game_instance)
+
+    def close(self):
+        # episodes that failed after their setup never reach _on_after_game
+        restore_max_tokens()
+        super().close()
@@ -11,7 +11,8 @@ from clemcore.clemgame.legacy.scorer import GameScorer
 from clemcore.clemgame.legacy.master import DialogueGameMaster
 from clemcore.clemgame.metrics import METRIC_ABORTED, METRIC_LOSE, METRIC_SUCCESS, METRIC_REQUEST_COUNT, \
     METRIC_REQUEST_COUNT_PARSED, METRIC_REQUEST_COUNT_VIOLATED, BENCH_SCORE
-from jinja2 import Template
+
+from shared.prompt_templates import prompt_template
 
 
 class Answerer(Player):
@@ -49,6 +50,7 @@ def parse_response(response: str, choices: List, regex_pattern) -> str:
 class GameState:
     target: str
     initial_prompt: str
+    prompt_prefix: str  # The few-shot block that all prompts of the experiment start with
     choices: List[str]
     regex_pattern: str
     parsed_response: Optional[str] = None
@@ -60,9 +62,11 @@ class GameState:
 class MMLUProGameMaster(DialogueGameMaster):
     def _on_setup(self, **instance):
         # Setup game state (arguments in same order as above)
-        initial_prompt = Template(self.experiment["initial_prompt"]).render(input=instance["input"])
+        initial_prompt_template = prompt_template(self.experiment["initial_prompt"])
+        initial_prompt = initial_prompt_template.render(input=instance["input"])
         self.state = GameState(instance["target"],
                                initial_prompt,
+                               initial_prompt_template.prefix,
                                self.experiment["choices"],
                                self.experiment["regex_pattern"])  # pattern is case-sensitive!
 
@@ -6,6 +6,12 @@ import matplotlib.pyplot as plt
 import time
 import networkx as nx
 
+from shared.map_generation import generate_maps, save_maps
+
+# constraint of the batch map generation for the cycle types ("adding_cycle" walks without a cycle and
+# generate_instance adds one afterwards)
+CYCLE_CONSTRAINTS = {"cycle_true": True, "cycle_false": False, "random": None, "adding_cycle": False}
+
 class SaveGraphInfo:
 
     def direction_list_maker(node, directions_list):
@@ -83,7 +89,11 @@ class GraphGenerator:
             self.G.add_node(self.current_pos)
 
 
-    def generate_instance(self):
+    def generate_instance(self, grid_map=None):
+        """
+        Builds the instance of a map; if no map (as generated by map_generation.generate_maps) is given,
+        the map is generated by a random walk first.
+        """
 
         dir2delta = {'north': np.array((0, 1)),
                      'south': np.array((0, -1)),
@@ -187,6 +197,15 @@ class GraphGenerator:
         # check the cycle variable
         cycle_types=["cycle_true", "cycle_false", "random", "adding_cycle"]
         assert self.cycle in cycle_types, "The cycle variable is not valid"
+        if grid_map is not None:
+            # the map already fulfills the cycle constraint, only its moves are needed
+            delta2dir = {tuple(delta): direction for direction, delta in dir2delta.items()}
+            self.G = nx.Graph()
+            self.G.add_nodes_from(grid_map[0])
+            self.G.add_edges_from(grid_map[1])
+            paths = [(tuple(edge[0]), delta2dir[(edge[1][0] - edge[0][0], edge[1][1] - edge[0][1])], tuple(edge[1]))
+                     for edge in grid_map[1]]
+            self.current_pos = tuple(grid_map[0][-1])
         while self.G.number_of_nodes() < self.n_rooms :
             # Prevent diagonal moves when cycle is set to "random"
             random_dir = np.random.choice(list(dir2delta.keys()))
@@ -219,7 +238,7 @@ class GraphGenerator:
             self.current_pos = new_pos
 
         # control time complexity
-        if self.cycle=="cycle_true" and find_cycle(source=self.current_pos, orientation="ignore") == "No cycle found": 
+        if self.cycle=="cycle_true" and grid_map is None and find_cycle(source=self.current_pos, orientation="ignore") == "No cycle found": 
             # this is the case graph does not contain but it should have one
             flag_2= False
             start_time = time.time()
@@ -247,11 +266,17 @@ class GraphGenerator:
                 return "The graph already contains a cycle"
             else:
                 # we add a cycle to the graph by adding an edge between two neibouring nodes
+                added = False
                 for random_node in  list(self.G.nodes()):
-                    for neighbor in self.G.neighbors(random_node):
-                        if not self.G.has_edge(random_node, neighbor):
-                            self.G.add_edge(neighbor, random_node)
+                    for direction, delta in dir2delta.items():
+                        neighbor = (random_node[0] + int(delta[0]), random_node[1] + int(delta[1]))
+                        if neighbor in self.G and not self.G.has_edge(random_node, neighbor):
+                            self.G.add_edge(random_node, neighbor)
+                            paths.append((random_node, direction, neighbor))
+                            added = True
                             break
+                    if added:
+                        break
 
         if len(list(self.G.nodes())) < self.n_rooms:
             return "No graph generated"
@@ -379,3 +404,18 @@ class GraphGenerator:
             
             graph_dict= {"Picture_Name":picture_name, "Graph_Type": self.graph_type, "Grid_Dimension": str(self.n), "Graph_Nodes":renamed_nodes, "Graph_Edges":renamed_edges , "N_edges": len(list(self.G.edges())) , "Initial_Position": self.random_room, "Directions": renamed_graph_directions , "Moves": renamed_moves_nodes_list ,"Cycle":self.cycle, 'Ambiguity': self.ambiguity, "Mapping": self.node_label_mapping}
         return  graph_dict
+
+
+def generate_graphs(num_graphs, graph_type, n, m, n_rooms, cycle, ambiguity, game_name, game_path, seed=0,
+                    maps_path=None):
+    """
+    Generates the instances of num_graphs unique maps; the maps are generated in one batch by a pool of worker
+    processes and, if maps_path is given, stored there as compact edge lists.
+    """
+    if cycle not in CYCLE_CONSTRAINTS:
+        raise ValueError(f"Unknown cycle type '{cycle}', expected one of {list(CYCLE_CONSTRAINTS)}")
+    grid_maps = generate_maps(n, m, n_rooms, num_graphs, cycle=CYCLE_CONSTRAINTS[cycle], seed=seed)
+    if maps_path is not None:
+        save_maps(grid_maps, maps_path)
+    return [GraphGenerator(graph_type, n, m, n_rooms, cycle, ambiguity, game_name, game_path).generate_instance(grid_map)
+            for grid_map in grid_maps]
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import networkx as nx
+
+from textmapworld.graph_generator import generate_graphs
+
+
+class GenerateGraphsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.game_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.game_path)
+        os.makedirs(os.path.join(self.game_path, "generated", "images"))
+
+    def generate(self, cycle):
+        return generate_graphs(1, "unnamed_graph", 4, 4, 8, cycle, None, "textmapworld", self.game_path, seed=3)
+
+    def test_every_cycle_type_generates_a_map(self):
+        for cycle in ["cycle_true", "cycle_false", "random", "adding_cycle"]:
+            with self.subTest(cycle=cycle):
+                graphs = self.generate(cycle)
+                self.assertEqual(len(graphs), 1)
+                graph = graphs[0]
+                self.assertIsInstance(graph, dict)
+                self.assertEqual(graph["Cycle"], cycle)
+                self.assertEqual(len(graph["Graph_Nodes"]), 8)
+                has_cycle = bool(nx.cycle_basis(nx.Graph(graph["Graph_Edges"])))
+                if cycle == "cycle_false":
+                    self.assertFalse(has_cycle)
+                elif cycle != "random":
+                    self.assertTrue(has_cycle)
+
+    def test_unknown_cycle_type(self):
+        with self.assertRaises(ValueError):
+            self.generate("cycle_maybe")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,8 @@ import os
 import shutil
 from typing import Dict, List
 
-from textmapworld.graph_generator import GraphGenerator
+from textmapworld.graph_generator import generate_graphs
+from shared.mapworld_instance import MapInstance
 from clemcore.clemgame import GameInstanceGenerator
 
 
@@ -38,17 +39,10 @@ def check_graphs(graphs, instance_number, game_type):
     return grids
 
 
-def create_graphs(num_graphs, graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path) -> List[Dict]:
-    descriptors = []
-    num_retries = 0
-    while len(descriptors) < num_graphs:
-        new_instance = GraphGenerator(graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path)
-        descriptor = new_instance.generate_instance()
-        if descriptor != "No graph generated":  # ps: this seems rather weird, b.c. there can be more error types
-            descriptors.append(descriptor)
-            num_retries += 1
-        assert num_retries <= 100, f"Counted {num_retries} while generating {num_graphs} graphs. Abort."
-    return descriptors
+def create_graphs(num_graphs, graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path, seed=0,
+                  maps_path=None) -> List[Dict]:
+    return generate_graphs(num_graphs, graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path,
+                           seed=seed, maps_path=maps_path)
 
 
 "Enter the parameters for the game instance generator"
@@ -104,8 +98,9 @@ class TextMapWorldGraphGameInstanceGenerator(GameInstanceGenerator):
             print(f"Add experiment {experiment_name}")
             experiment = self.add_experiment(experiment_name)
             graph_file_name = create_graph_file_name(game_type, size, cycle_type, ambiguity)
+            maps_path = os.path.join(generated_dir, "graphs", os.path.splitext(graph_file_name)[0] + "_maps.jsonl")
             graphs = create_graphs(instance_number, game_type, n, m, size, cycle_type, ambiguity,
-                                   game_name, self.game_path)
+                                   game_name, self.game_path, seed, maps_path)
             self.store_file("\n".join([str(g) for g in graphs]), graph_file_name, "generated/graphs")
             grids = check_graphs(graphs, instance_number, game_type)
             for grid in grids:
@@ -133,6 +128,7 @@ class TextMapWorldGraphGameInstanceGenerator(GameInstanceGenerator):
                 game_instance["Max_Turns_Reminder_Text"] = reminders_file["max_turns_reminder"]
                 game_instance["Mapping"] = str(grid["Mapping"])
                 game_instance["Strict"] = strict
+                game_instance["map"] = MapInstance.from_textmapworld_instance(game_instance).to_json()
                 game_id += 1
 
 
@@ -9,13 +9,14 @@ from typing import Dict, List
 import json
 import numpy as np
 import re
-import ast
-from queue import Queue
-from copy import deepcopy
 import random
 
-from textmapworld_utils import loop_identification, get_directions_main, string_available_directions, \
-    have_common_element, get_nextnode_label
+from shared import mapworld_instance
+from shared.mapworld_graph import detect_loop
+from shared.mapworld_oracle import ExplorationOracle
+from textmapworld_utils import get_directions_main, string_available_directions, \
+    have_common_element
+from shared.textmapworld_scoring import ExplorationEpisode, episode_key, replay_results_dir
 
 "°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°°"
 INVALID = 0
@@ -35,20 +36,19 @@ class PathDescriber(Player):
         super().__init__(CustomResponseModel())
         self.graph_type = game_instance['Game_Type']
         self.ambiguity = game_instance["Ambiguity"]
-        self.moves = ast.literal_eval(game_instance['Moves'])
-        self.directions = ast.literal_eval(game_instance['Directions'])
+        self.map = mapworld_instance.load(game_instance)
+        self.directions = self.map.direction_list()
         self.move_construction = game_instance["Move_Construction"]
         self.stop_construction = game_instance["Stop_Construction"]
-        self.nodes = ast.literal_eval(game_instance['Graph_Nodes'])
-        self.edges = ast.literal_eval(game_instance['Graph_Edges'])
+        self.nodes = self.map.nodes
+        self.graph = self.map.graph
         self.positive_answer = game_instance["Player2_positive_answer"]
         self.negative_answer = game_instance["Player2_negative_answer"]
         self.directions_next_node = None
         self.old_node = None
         self.move_type = None
         self.visited_nodes = []
-        self.current_node = game_instance["Current_Position"] if self.graph_type == "named_graph" else ast.literal_eval(
-            game_instance["Current_Position"])
+        self.current_node = self.map.start_room
         self.visited_nodes.append(self.current_node)
 
     def check_path_answer(self, utterance: str, directions: List[str], node, saved_node) -> List[Dict]:
@@ -74,8 +74,8 @@ class PathDescriber(Player):
             self.directions_next_node = string_available_directions(self.directions_next_node)
             return "not valid"
         else:
-            next_node_label, self.move_type = get_nextnode_label(self.moves, the_last_node, utterance,
-                                                                 self.move_construction)
+            self.move_type = utterance.strip()
+            next_node_label = self.graph.move(the_last_node, self.move_type)
             self.current_node = next_node_label
             if next_node_label in self.nodes:
                 self.visited_nodes.append(next_node_label)
@@ -134,11 +134,10 @@ class Textmapworld(DialogueGameMaster):
 
     def _on_setup(self, **game_instance):
         self.graph_type = game_instance['Game_Type']
-        self.initial_position = game_instance[
-            "Current_Position"] if self.graph_type == "named_graph" else ast.literal_eval(
-            game_instance["Current_Position"])
         self.playerA_initial_prompt = game_instance["Prompt"]
-        self.directions = ast.literal_eval(game_instance['Directions'])
+        self.map = mapworld_instance.load(game_instance)
+        self.initial_position = self.map.start_room
+        self.directions = self.map.direction_list()
         self.ambiguity = game_instance["Ambiguity"]
         self.move_construction = game_instance["Move_Construction"]
         self.stop_construction = game_instance["Stop_Construction"]
@@ -238,7 +237,7 @@ class Textmapworld(DialogueGameMaster):
         if player == self.guesser:
             self.set_context_for(self.describer, utterance)
         if player == self.describer:
-            if self.reprompting_parameter and loop_identification(self.visited_nodes, False):
+            if self.reprompting_parameter and detect_loop(self.visited_nodes):
                 self.log_to_self("loop_detected", "Loop detected in the visited nodes list")
                 self.reprompting_parameter = False
                 utterance = self.loop_reprompting + "\n" + utterance
@@ -255,162 +254,83 @@ class Textmapworld(DialogueGameMaster):
             if not self.game_stop and not self.invalid_response and not self.limit_reached and not self.game_error:
                 self.log_to_self(type_="move", value=json.dumps({"old": old_node, "new": new_node}))
                 self.visited_nodes.append(new_node)
-                if self.reprompting_parameter and loop_identification(self.visited_nodes, False):
+                if self.reprompting_parameter and detect_loop(self.visited_nodes):
                     self.visited_nodes.clear()
                     self.reprompting_parameter = True
 
 
 class GraphGameScorer(GameScorer):
 
-    def __init__(self, game_name: str, experiment: Dict, game_instance: Dict):
+    def __init__(self, game_name: str, experiment: Dict, game_instance: Dict, replayed_episodes: Dict = None):
         super().__init__(game_name, experiment, game_instance)
-        self.nodes = ast.literal_eval(game_instance['Graph_Nodes'])
+        # episodes replayed in advance (see GraphGameBenchmark.compute_scores)
+        self.replayed_episodes = replayed_episodes if replayed_episodes is not None else {}
+        self.map = mapworld_instance.load(game_instance)
+        self.nodes = self.map.nodes
         self.game_type = game_instance['Game_Type']
         self.ambiguity = game_instance['Ambiguity']
-        old_edges = ast.literal_eval(game_instance['Graph_Edges'])
-        new_edges = [(edge[1], edge[0]) for edge in old_edges]
-        new_edges.extend(old_edges)
-        self.edges = new_edges
-        self.start = game_instance["Current_Position"] if self.game_type == "named_graph" else ast.literal_eval(
-            game_instance["Current_Position"])
+        self.graph = self.map.graph
+        self.edges = self.graph.edges
+        self.oracle = ExplorationOracle(self.edges)
+        self.start = self.map.start_room
 
     def visited_all(self, visited, to_visit):
         return all([n in visited for n in to_visit])
 
     def get_available_moves(self, node):
-        return [edge for edge in self.edges if node == edge[0]]
+        return self.graph.available_moves(node)
 
     def adj(self, node):
-        return set([ed[1] for ed in self.edges if ed[0] == node])
+        return self.graph.adj(node)
 
     def find_best_moves(self, current, visited):
-
-        to_visit = [ed[1] for ed in self.edges if ed[0] in visited and ed[1] not in visited]
-        start = [current]
-        q = Queue()
-        q.put(start)
-        found = set()
-        max_len = 100
-        while True:
-            n = q.get()
-            if len(n) > max_len:
-                break
-            if self.visited_all(n, to_visit):
-                if len(n) > 1:
-                    found.add((n[0], n[1]))
-                    max_len = len(n)
-
-            avail = self.get_available_moves(n[-1])
-            if all([move[1] in n for move in avail]):
-                for move in avail:
-                    new = deepcopy(n)
-                    new.append(move[1])
-                    q.put(new)
-            else:
-                for move in avail:
-                    if not move[1] in n:
-                        new = deepcopy(n)
-                        new.append(move[1])
-                        q.put(new)
-        return found
+        return self.oracle.best_moves(current, visited)
 
     def compute_scores(self, episode_interactions) -> None:
+        episode = self.replayed_episodes.pop(episode_key(episode_interactions), None)
+        if episode is None:
+            episode = ExplorationEpisode(self.graph, self.oracle, self.start, self.game_type)
+            episode.consume_interactions(episode_interactions)
 
-        current = self.start
-        seen = {self.start}
-        seen.update(self.adj(self.start))
-        visited = {self.start}
-        valid_moves = 0
-        invalid_moves = 0
-        stopped = False
-        aborted = False
-        played = False
-        turns_limit_reached = False
-        good_move = []
-        loops = []
-        count_loops = 0
-        loops.append(self.start)
-        for turn in episode_interactions["turns"]:
-            for event in turn:
-                action = event["action"]
-                if action["type"] == "aborted":
-                    if action["content"]:
-                        aborted = True
-                if action['type'] == "move":
-                    cont = json.loads(action['content'])
-                    if not cont["old"] == cont["new"]:
-                        valid_moves += 1
-                    else:
-                        invalid_moves += 1
-
-                    best_moves = self.find_best_moves(current, visited)
-                    new_move = tuple(cont["new"]) if self.game_type == "unnamed_graph" else cont["new"]
-                    if (current, new_move) in best_moves:
-                        if len(visited) != len(self.nodes):
-                            good_move.append(True)
-                        else:
-                            good_move.append(False)
-                    else:
-                        good_move.append(False)
-                    current = tuple(cont["new"]) if self.game_type == "unnamed_graph" else cont["new"]
-                    seen.update(self.adj(current))
-                    loops.append(current)
-                    visited.add(current)
-                    if loop_identification(loops):
-                        count_loops += 1
-
-                if action['type'] == "stop":
-                    if action["content"]:
-                        stopped = True
-
-                if action['type'] == "turns_limit":
-                    turns_limit_reached = True
-
-        for i, val in enumerate(good_move):
+        for i, val in enumerate(episode.good_moves):
             self.log_turn_score(i, "effiencient_move", val)
-        if aborted:
+        if episode.aborted or not episode.stopped:
             self.log_episode_score(METRIC_ABORTED, 1)
             self.log_episode_score(METRIC_SUCCESS, 0)
             self.log_episode_score(METRIC_LOSE, 0)
+        elif episode.visited_all():
+            self.log_episode_score(METRIC_SUCCESS, 1)
+            self.log_episode_score(METRIC_ABORTED, 0)
+            self.log_episode_score(METRIC_LOSE, 0)
         else:
-            if not stopped:
-                self.log_episode_score(METRIC_ABORTED, 1)
-                self.log_episode_score(METRIC_SUCCESS, 0)
-                self.log_episode_score(METRIC_LOSE, 0)
-            else:
-                if visited == set(self.nodes):
-                    self.log_episode_score(METRIC_SUCCESS, 1)
-                    self.log_episode_score(METRIC_ABORTED, 0)
-                    self.log_episode_score(METRIC_LOSE, 0)
-                else:
-                    self.log_episode_score(METRIC_SUCCESS, 0)
-                    self.log_episode_score(METRIC_ABORTED, 0)
-                    self.log_episode_score(METRIC_LOSE, 1)
-
-        # if nominator and denominator are 0, the result is NaN
-        exploration = (len(visited) / len(self.nodes) * 100) if len(self.nodes) else 0
-        efficiency = (sum(good_move) / len(good_move) * 100) if good_move else 0
-        bench_score = (2 * efficiency * exploration / (efficiency + exploration)) if (efficiency + exploration) else 0
-        self.log_episode_score('moves', valid_moves + invalid_moves if stopped else np.NaN)
-        self.log_episode_score('valid_moves', valid_moves if stopped else np.NaN)
-        self.log_episode_score('invalid_moves', invalid_moves if stopped else np.NaN)
-        self.log_episode_score('stopped', int(stopped) if stopped else np.NaN)
-        self.log_episode_score('turns_limit', int(turns_limit_reached) if stopped else np.NaN)
-        self.log_episode_score('loops', count_loops if stopped else np.NaN)
-        self.log_episode_score('number_visited', len(visited) if stopped else np.NaN)
-        self.log_episode_score('seen', len(seen) if stopped else np.NaN)
-        self.log_episode_score('efficiency', efficiency if stopped else np.NaN)
-        self.log_episode_score('exploration', exploration if stopped else np.NaN)
-        self.log_episode_score(BENCH_SCORE, bench_score if stopped else np.NaN)
+            self.log_episode_score(METRIC_SUCCESS, 0)
+            self.log_episode_score(METRIC_ABORTED, 0)
+            self.log_episode_score(METRIC_LOSE, 1)
+
+        for name, value in episode.exploration_scores().items():
+            self.log_episode_score(name, value)
+        self.log_episode_score(BENCH_SCORE, episode.harmonic_score if episode.stopped else np.NaN)
 
 
 class GraphGameBenchmark(GameBenchmark):
 
+    def __init__(self, game_spec: GameSpec):
+        super().__init__(game_spec)
+        self.replayed_episodes: Dict = {}
+
     def create_game_master(self, experiment: Dict, player_models: List[Model]) -> GameMaster:
         return Textmapworld(self.game_spec, experiment, player_models)
 
     def create_game_scorer(self, experiment: Dict, game_instance: Dict) -> GameScorer:
-        return GraphGameScorer(self.game_name, experiment, game_instance)
+        return GraphGameScorer(self.game_name, experiment, game_instance, self.replayed_episodes)
+
+    def compute_scores(self, results_dir: str):
+        # replay the episodes in parallel first, the scorers then only log their scores
+        self.replayed_episodes = replay_results_dir(results_dir, self.game_name)
+        try:
+            super().compute_scores(results_dir)
+        finally:
+            self.replayed_episodes = {}
 
 
 def main():
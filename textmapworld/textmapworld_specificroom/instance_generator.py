@@ -4,7 +4,9 @@ import random
 import networkx as nx
 
 from typing import Dict, List
-from textmapworld.graph_generator import GraphGenerator
+from textmapworld.graph_generator import generate_graphs
+from shared.mapworld_instance import MapInstance
+from textmapworld.textmapworld_utils import distance_buckets
 from clemcore.clemgame import GameInstanceGenerator
 
 
@@ -40,17 +42,10 @@ def check_graphs(graphs, instance_number, game_type):
     return grids
 
 
-def create_graphs(num_graphs, graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path) -> List[Dict]:
-    descriptors = []
-    num_retries = 0
-    while len(descriptors) < num_graphs:
-        new_instance = GraphGenerator(graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path)
-        descriptor = new_instance.generate_instance()
-        if descriptor != "No graph generated":  # ps: this seems rather weird, b.c. there can be more error types
-            descriptors.append(descriptor)
-            num_retries += 1
-        assert num_retries <= 100, f"Counted {num_retries} while generating {num_graphs} graphs. Abort."
-    return descriptors
+def create_graphs(num_graphs, graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path, seed=0,
+                  maps_path=None) -> List[Dict]:
+    return generate_graphs(num_graphs, graph_type, n, m, rooms, cycle_bool, abiguity, game_name, game_path,
+                           seed=seed, maps_path=maps_path)
 
 
 def create_nxgraph(nodes, edges):
@@ -111,8 +106,9 @@ class TextMapWorldRoomGameInstanceGenerator(GameInstanceGenerator):
         Player2_negative_answer = answers_file["NegativeAnswerNamedGame"]
         # create only a single graphs file
         graph_file_name = create_graph_file_name(game_type, size, cycle_type, ambiguity)
+        maps_path = os.path.join(generated_dir, "graphs", os.path.splitext(graph_file_name)[0] + "_maps.jsonl")
         graphs = create_graphs(instance_number, game_type, n, m, size, cycle_type, ambiguity,
-                               game_name, self.game_path)
+                               game_name, self.game_path, seed, maps_path)
         self.store_file("\n".join([str(g) for g in graphs]), graph_file_name, "generated/graphs")
         grids = check_graphs(graphs, instance_number, game_type)
         game_id = 0
@@ -145,25 +141,20 @@ class TextMapWorldRoomGameInstanceGenerator(GameInstanceGenerator):
                 game_instance["Mapping"] = str(grid["Mapping"])
                 game_instance["Strict"] = strict
                 generated_graph = create_nxgraph(grid["Graph_Nodes"], grid["Graph_Edges"])
-                dists = dict(nx.all_pairs_shortest_path_length(generated_graph))
+                # only the distances from the initial position are needed, unless no room has the drawn distance
                 random_distance = random.choice(distances)
-                distance_found = False
-                for k, v in dists.items():
-                    if k == grid["Initial_Position"]:
-                        for neighbor, distance in v.items():
-                            if distance == random_distance:
-                                game_instance["Specific_Room"] = neighbor
-                                game_instance["Specific_Room_Distance"] = str(random_distance)
-                                distance_found = True
-                                break
-                if not distance_found:
-                    for room, val in dists.items():
-                        for neighbor, distance in val.items():
-                            if distance == random_distance:
-                                game_instance['Current_Position'] = room
-                                game_instance["Specific_Room"] = neighbor
-                                game_instance["Specific_Room_Distance"] = str(random_distance)
-                                break
+                rooms_at_distance = distance_buckets(generated_graph, grid["Initial_Position"]).get(random_distance)
+                if rooms_at_distance:
+                    game_instance["Specific_Room"] = rooms_at_distance[0]
+                    game_instance["Specific_Room_Distance"] = str(random_distance)
+                else:
+                    for room in generated_graph.nodes:
+                        rooms_at_distance = distance_buckets(generated_graph, room).get(random_distance)
+                        if rooms_at_distance:
+                            game_instance['Current_Position'] = room
+                            game_instance["Specific_Room"] = rooms_at_distance[0]
+                            game_instance["Specific_Room_Distance"] = str(random_distance)
+                game_instance["map"] = MapInstance.from_textmapworld_instance(game_instance).to_json()
 
 
 if __name__ == '__main__':
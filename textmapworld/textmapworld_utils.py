@@ -1,6 +1,6 @@
+import functools
 import random
 import networkx as nx
-import numpy as np
 
 "----------------------------------------------------"
 "The functions used in master.py"
@@ -83,15 +83,43 @@ def loop_identification(visited_nodes):
 "----------------------------------------------------"
 "The functions used in instance_generator.py"
 
+# number of (graph, source) BFS layers kept: the generators ask for the same graphs and rooms once per experiment
+DISTANCE_CACHE_SIZE = 1024
+
+class _GraphKey:
+    """Hashable by the nodes and edges of a graph, so that the BFS of equal graphs is cached once."""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.key = (tuple(graph.nodes), tuple(graph.edges))
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+@functools.lru_cache(maxsize=DISTANCE_CACHE_SIZE)
+def _distance_buckets(graph_key, source):
+    buckets = {}
+    for node, distance in nx.single_source_shortest_path_length(graph_key.graph, source).items():
+        buckets.setdefault(distance, []).append(node)
+    return {distance: tuple(nodes) for distance, nodes in buckets.items()}
+
+def distance_buckets(graph, source):
+    """Returns {distance: nodes at that distance from source} (nodes in BFS order), computed with a single BFS."""
+    return _distance_buckets(_GraphKey(graph), source)
+
 # Function to get nodes at a certain distance from the initial node
 def get_nodes_at_distance(graph, initial_node, distance):
-    return [node for node in nx.single_source_shortest_path_length(graph, initial_node) if nx.single_source_shortest_path_length(graph, initial_node)[node] == distance]
+    return list(distance_buckets(graph, initial_node).get(distance, ()))
 
 # Randomly select nodes at various distances from the initial node
 def select_nodes_at_distances(G, initial_position, max_distance):
     chosen_nodes = {}
+    buckets = distance_buckets(G, initial_position)
     for distance in range(max_distance):
-        nodes_at_distance = get_nodes_at_distance(G, initial_position, distance)
+        nodes_at_distance = buckets.get(distance)
         if nodes_at_distance:
             random_node = random.choice(nodes_at_distance)
             chosen_nodes[str(distance)] = random_node
@@ -99,42 +127,6 @@ def select_nodes_at_distances(G, initial_position, max_distance):
             print(f"No nodes found at distance {distance} from {initial_position}")
     return chosen_nodes
 
-def lowercase_list_strings(original_list):
-    return [item.lower() for item in original_list]
-
-def lowercase_tuple_strings(original_list, type):
-    if type == "generated":
-        combined_list = [value for sublist in original_list.values() for value in sublist]
-        return [(item[0].lower(), item[1].lower()) for item in combined_list]
-    elif type == "original":
-        return [(item[0].lower(), item[1].lower()) for item in original_list]
-    elif type == "none":
-        return original_list
-    
-def create_graph(nodes, edges, type):
-    G = nx.Graph()
-    if type == "generated" or type == "original":
-        nodes= lowercase_list_strings(nodes)
-    edges= lowercase_tuple_strings(edges, type)
-    G.add_nodes_from(nodes)
-    for edge in edges:
-        if len(edge) == 2:
-            G.add_edge(edge[0], edge[1])
-    return G
-
-#Create a networkx graph from the given graph data.
-
-def normalize(distance):
-        normalized_distance = 1 / (1 + np.exp(-0.5 * distance))
-        normalized_distance = 2*(normalized_distance - 0.5)
-        return normalized_distance
-    
-def calculate_similarity(graph1, graph2):
-    distance = nx.graph_edit_distance(graph1, graph2)
-    normalized_distance = normalize(distance)
-    similarity = 1 - normalized_distance
-    return similarity
-
 def count_word_in_sentence(sentence, word):
     # Split the sentence into words
     words = sentence.split()